@@ -0,0 +1,177 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Zigbee2mqtt - Plugin © Autolog 2023
+#
+
+import colorsys
+import functools
+import random
+import time
+
+from lazyImport import lazy_import, module_available
+
+# Conversion of Zigbee xy and hue / saturation colors to Indigo RGB levels (0 - 100).
+#
+# The xy conversion gives the same result as colormath's convert_color(xyYColor(x, y, 1.0), sRGBColor) as previously
+# used by the plugin: the xyY color (D50 reference white) is adapted to D65 (Bradford), converted to linear sRGB (with
+# negative values limited to 0.0) and then sRGB companded. The chromatic adaptation and sRGB matrices are combined into
+# a single matrix when this module loads, and the result for each (quantized) xy value is cached as most color messages
+# repeat the same coordinates.
+
+XY_QUANTIZATION = 4  # Decimal places - Zigbee2mqtt reports x and y to 4 decimal places
+COLOR_CACHE_SIZE = 4096
+
+# Values as used by colormath (2 degree observer)
+ILLUMINANT_D50 = (0.96422, 1.0, 0.82521)
+ILLUMINANT_D65 = (0.95047, 1.0, 1.08883)
+BRADFORD = ((0.8951, 0.2664, -0.1614),
+            (-0.7502, 1.7135, 0.0367),
+            (0.0389, -0.0685, 1.0296))
+SRGB_XYZ_TO_RGB = ((3.24071, -1.53726, -0.498571),
+                   (-0.969258, 1.87599, 0.0415557),
+                   (0.0556352, -0.203996, 1.05707))
+
+
+def _multiply(matrix_a, matrix_b):
+    return tuple(tuple(sum(matrix_a[row][index] * matrix_b[index][column] for index in range(3)) for column in range(3)) for row in range(3))
+
+
+def _transform(matrix, vector):
+    return tuple(sum(matrix[row][index] * vector[index] for index in range(3)) for row in range(3))
+
+
+def _inverse(matrix):
+    (a, b, c), (d, e, f), (g, h, i) = matrix
+    determinant = a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)
+    return ((( e * i - f * h) / determinant, -(b * i - c * h) / determinant, ( b * f - c * e) / determinant),
+            (-(d * i - f * g) / determinant, ( a * i - c * g) / determinant, -(a * f - c * d) / determinant),
+            (( d * h - e * g) / determinant, -(a * h - b * g) / determinant, ( a * e - b * d) / determinant))
+
+
+def _xyz_d50_to_linear_srgb_matrix():
+    cone_source = _transform(BRADFORD, ILLUMINANT_D50)
+    cone_target = _transform(BRADFORD, ILLUMINANT_D65)
+    cone_ratio = tuple(tuple(cone_target[row] / cone_source[row] if row == column else 0.0 for column in range(3)) for row in range(3))
+    adaptation = _multiply(_multiply(_inverse(BRADFORD), cone_ratio), BRADFORD)
+    return _multiply(SRGB_XYZ_TO_RGB, adaptation)
+
+
+XYZ_D50_TO_LINEAR_SRGB = _xyz_d50_to_linear_srgb_matrix()
+
+
+def _compand(value):
+    if value <= 0.0031308:
+        return value * 12.92
+    return 1.055 * value ** (1 / 2.4) - 0.055
+
+
+def xy_to_rgb(x, y):
+    # Returns the sRGB values for the xy color at Y = 1.0 (values can be above 1.0 for colors outside the sRGB gamut)
+    if y == 0.0:
+        return 0.0, 0.0, 0.0
+    xyz = (x / y, 1.0, (1.0 - x - y) / y)
+    return tuple(_compand(max(value, 0.0)) for value in _transform(XYZ_D50_TO_LINEAR_SRGB, xyz))
+
+
+def _indigo_level(value):
+    # As previously: values above 1.0 are limited to 1.0 and then scaled to an Indigo level (0 - 100)
+    if value > 1.0:
+        value = 1.0
+    return int(value * 100)
+
+
+@functools.lru_cache(maxsize=COLOR_CACHE_SIZE)
+def _xy_to_indigo_rgb(x, y):
+    red, green, blue = xy_to_rgb(x, y)
+    return _indigo_level(red), _indigo_level(green), _indigo_level(blue)
+
+
+def xy_to_indigo_rgb(x, y):
+    # Returns the Indigo red, green and blue levels (0 - 100) for the Zigbee xy color
+    return _xy_to_indigo_rgb(round(float(x), XY_QUANTIZATION), round(float(y), XY_QUANTIZATION))
+
+
+@functools.lru_cache(maxsize=COLOR_CACHE_SIZE)
+def hsv_to_indigo_rgb(hue, saturation, brightness):
+    # Returns the Indigo red, green and blue levels (0 - 100) for the Zigbee hue (0 - 360), saturation (0 - 255) and
+    # brightness (0 - 255)
+    red, green, blue = colorsys.hsv_to_rgb(float(hue) / 360.0, float(saturation) / 255.0, float(brightness) / 255.0)
+    return int(red * 100.0), int(green * 100.0), int(blue * 100.0)
+
+
+def xy_to_indigo_rgb_batch(xy_colors):
+    # Returns a list of Indigo (red, green, blue) levels for a list of Zigbee (x, y) colors. Uses numpy (if available)
+    # to convert the whole list at once, otherwise converts each color via the cache.
+    if not module_available("numpy"):
+        return [xy_to_indigo_rgb(x, y) for x, y in xy_colors]
+    numpy = lazy_import("numpy")
+    xy = numpy.round(numpy.asarray(xy_colors, dtype=float).reshape(-1, 2), XY_QUANTIZATION)
+    x = xy[:, 0]
+    y = xy[:, 1]
+    valid = y != 0.0
+    safe_y = numpy.where(valid, y, 1.0)
+    xyz = numpy.stack((x / safe_y, numpy.ones_like(x), (1.0 - x - y) / safe_y))
+    linear = numpy.maximum(numpy.asarray(XYZ_D50_TO_LINEAR_SRGB) @ xyz, 0.0)
+    linear[:, ~valid] = 0.0
+    rgb = numpy.where(linear <= 0.0031308, linear * 12.92, 1.055 * numpy.power(numpy.maximum(linear, 0.0031308), 1 / 2.4) - 0.055)
+    levels = (numpy.minimum(rgb, 1.0) * 100).astype(int)  # astype(int) truncates towards zero as int() does
+    return [tuple(int(level) for level in color) for color in levels.T]
+
+
+def color_cache_statistics():
+    xy_cache = _xy_to_indigo_rgb.cache_info()
+    hsv_cache = hsv_to_indigo_rgb.cache_info()
+    return xy_cache.hits + hsv_cache.hits, xy_cache.misses + hsv_cache.misses, xy_cache.currsize + hsv_cache.currsize
+
+
+def benchmark_color_conversion(message_count=10000, distinct_colors=50):
+    # Compares the colormath conversion previously used for each xy color message against the cached and batch
+    # conversions, for message_count messages using distinct_colors different colors (most messages repeat a color).
+    # Returns the results as a list of (label, value).
+    generator = random.Random(0)
+    colors = list()
+    while len(colors) < distinct_colors:
+        x = round(generator.uniform(0.05, 0.70), 4)
+        y = round(generator.uniform(0.05, 0.80), 4)
+        if x + y < 1.0:
+            colors.append((x, y))
+    messages = [colors[generator.randrange(distinct_colors)] for _ in range(message_count)]
+
+    results = [("Color Messages:", f"{message_count} [{distinct_colors} distinct colors]")]
+
+    if module_available("colormath"):
+        color_objects = lazy_import("colormath.color_objects")
+        color_conversions = lazy_import("colormath.color_conversions")
+
+        def colormath_indigo_rgb(x, y):
+            rgb = color_conversions.convert_color(color_objects.xyYColor(x, y, 1.0, observer='10'), color_objects.sRGBColor)
+            return tuple(_indigo_level(value) for value in rgb.get_value_tuple())
+
+        start_time = time.perf_counter()
+        expected = [colormath_indigo_rgb(x, y) for x, y in messages]
+        colormath_time = time.perf_counter() - start_time
+        results.append(("Colormath:", f"{colormath_time * 1e6 / message_count:.1f} µs per message"))
+    else:
+        expected = None
+        colormath_time = None
+        results.append(("Colormath:", "Not installed"))
+
+    _xy_to_indigo_rgb.cache_clear()
+    start_time = time.perf_counter()
+    cached = [xy_to_indigo_rgb(x, y) for x, y in messages]
+    cached_time = time.perf_counter() - start_time
+    results.append(("Cached:", f"{cached_time * 1e6 / message_count:.2f} µs per message"))
+
+    start_time = time.perf_counter()
+    batch = xy_to_indigo_rgb_batch(messages)
+    batch_time = time.perf_counter() - start_time
+    results.append(("Batch:", f"{batch_time * 1e6 / message_count:.2f} µs per message{'' if module_available('numpy') else ' [numpy not installed]'}"))
+
+    if expected is not None:
+        results.append(("Speed Up (Cached):", f"{colormath_time / cached_time:.0f}x"))
+        cached_deviation = max(abs(level - expected_level) for color, expected_color in zip(cached, expected) for level, expected_level in zip(color, expected_color))
+        batch_deviation = max(abs(level - expected_level) for color, expected_color in zip(batch, expected) for level, expected_level in zip(color, expected_color))
+        results.append(("Max Deviation:", f"{cached_deviation}% cached, {batch_deviation}% batch"))
+
+    return results
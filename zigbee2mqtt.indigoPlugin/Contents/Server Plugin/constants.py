@@ -45,14 +45,23 @@ MQTT_ROOT_TOPIC_DEFAULT = "zigbee2mqtt"
 ADDRESS = constant_id("ADDRESS")
 API_VERSION = constant_id("API_VERSION")
 AVAILABLE = constant_id("AVAILABLE")
+BULK_ACTION_STATISTICS = constant_id("BULK_ACTION_STATISTICS")
 CH_EVENT = constant_id("CH_EVENT")
 CH_THREAD = constant_id("CH_THREAD")
 COLOR_DEBUG = constant_id("COLOR_DEBUG")
 DEBUG = constant_id("DEBUG")
 HANDLE_ZIGBEE_COORDINATOR_MQTT_TOPIC = constant_id("HANDLE_ZIGBEE_BRIDGE_MQTT_TOPIC")
+HANDLE_ZIGBEE_DEVICE_ACTION_MQTT_TOPIC = constant_id("HANDLE_ZIGBEE_DEVICE_ACTION_MQTT_TOPIC")
+HANDLE_ZIGBEE_DEVICE_EXPRESSED_MQTT_TOPIC = constant_id("HANDLE_ZIGBEE_DEVICE_EXPRESSED_MQTT_TOPIC")
 HANDLE_ZIGBEE_DEVICE_MQTT_TOPIC = constant_id("HANDLE_ZIGBEE_DEVICE_MQTT_TOPIC")
 HANDLE_ZIGBEE_GROUP_MQTT_TOPIC = constant_id("HANDLE_ZIGBEE_GROUP_MQTT_TOPIC")
+INDIGO_DEVICE_CACHE = constant_id("INDIGO_DEVICE_CACHE")
+INDIGO_STATE_SHADOW = constant_id("INDIGO_STATE_SHADOW")
+INDIGO_WRITER_EVENT = constant_id("INDIGO_WRITER_EVENT")
+INDIGO_WRITER_FLUSH_INTERVAL = constant_id("INDIGO_WRITER_FLUSH_INTERVAL")
+INDIGO_WRITER_THREAD = constant_id("INDIGO_WRITER_THREAD")
 KNOWN_TO_COORDINATOR = constant_id("KNOWN_TO_COORDINATOR")
+LAST_SEEN_UPDATE_INTERVAL = constant_id("LAST_SEEN_UPDATE_INTERVAL")
 LOCAL_IP = constant_id("LOCAL_IP")
 LOCAL_MAC = constant_id("LOCAL_MAC")
 LOCK_ZC = constant_id("LOCK_ZC")
@@ -62,21 +71,29 @@ MQTT_BROKERS = constant_id("MQTT_BROKERS")
 MQTT_CLIENT = constant_id("MQTT_CLIENT")
 MQTT_CLIENT_ID = constant_id("MQTT_CLIENT_ID")
 MQTT_CLIENT_PREFIX = constant_id("MQTT_CLIENT_PREFIX")
+MQTT_COALESCE_MESSAGES = constant_id("MQTT_COALESCE_MESSAGES")
 MQTT_CONNECTED = constant_id("MQTT_CONNECTED")
 MQTT_CONNECTION_INITIALISED = constant_id("MQTT_CONNECTION_INITIALISED")
 MQTT_ENCRYPTION_KEY = constant_id("MQTT_ENCRYPTION_KEY")
+MQTT_GROUP_PUBLISH_BURST = constant_id("MQTT_GROUP_PUBLISH_BURST")
+MQTT_GROUP_PUBLISH_RATE = constant_id("MQTT_GROUP_PUBLISH_RATE")
 MQTT_IP = constant_id("MQTT_IP")
 MQTT_FILTERS = constant_id("MQTT_FILTERS")
+MQTT_MESSAGES_DROPPED = constant_id("MQTT_MESSAGES_DROPPED")
+MQTT_MESSAGES_RECEIVED = constant_id("MQTT_MESSAGES_RECEIVED")
 MQTT_PASSWORD = constant_id("MQTT_PASSWORD")
 MQTT_PORT = constant_id("MQTT_PORT")
 MQTT_PROCESS_COMMAND_HANDLE_STOP_THREAD = constant_id("MQTT_PROCESS_COMMAND_HANDLE_STOP_THREAD")
 MQTT_PROTOCOL = constant_id("MQTT_PROTOCOL")
+MQTT_PUBLISH_BURST = constant_id("MQTT_PUBLISH_BURST")
+MQTT_PUBLISH_RATE = constant_id("MQTT_PUBLISH_RATE")
 MQTT_PUBLISH_TO_ZIGBEE2MQTT = constant_id("MQTT_PUBLISH_TO_ZIGBEE2MQTT")
 MQTT_ROOT_TOPIC = constant_id("MQTT_ROOT_TOPIC")
 MQTT_SUBSCRIBED_TOPICS = constant_id("MQTT_SUBSCRIBED_TOPICS")
 MQTT_SUBSCRIBE_TO_ZIGBEE2MQTT = constant_id("MQTT_SUBSCRIBE_TO_ZIGBEE2MQTT")
 MQTT_SUPPRESS_IEEE_MISSING = constant_id("MQTT_SUPPRESS_IEEE_MISSING")
 MQTT_USERNAME = constant_id("MQTT_USERNAME")
+MQTT_ZIGBEE2MQTT_EXPRESS_QUEUE = constant_id("MQTT_ZIGBEE2MQTT_EXPRESS_QUEUE")
 MQTT_ZIGBEE2MQTT_QUEUE = constant_id("MQTT_ZIGBEE2MQTT_QUEUE")
 PATH = constant_id("PATH")
 PLUGIN_DISPLAY_NAME = constant_id("PLUGIN_DISPLAY_NAME")
@@ -85,14 +102,29 @@ PLUGIN_INFO = constant_id("PLUGIN_INFO")
 PLUGIN_PREFS_FOLDER = constant_id("PLUGIN_PREFS_FOLDER")
 PLUGIN_VERSION = constant_id("PLUGIN_VERSION")
 QUEUES = constant_id("QUEUES")
+REPORTING_FILTER = constant_id("REPORTING_FILTER")
+SCHEDULER_EVENT = constant_id("SCHEDULER_EVENT")
+SCHEDULER_THREAD = constant_id("SCHEDULER_THREAD")
+STARTUP_COMPLETE = constant_id("STARTUP_COMPLETE")
+STARTUP_FIRST_CONNECTED = constant_id("STARTUP_FIRST_CONNECTED")
+STARTUP_LOAD_START = constant_id("STARTUP_LOAD_START")
+STARTUP_MODULES_LOADED = constant_id("STARTUP_MODULES_LOADED")
+STARTUP_TIMINGS = constant_id("STARTUP_TIMINGS")
 ZC = constant_id("ZC [ZIGBEE COORDINATORS]")
+ZC_DEVICES_HASH = constant_id("ZC_DEVICES_HASH")
+ZC_DEVICES_KNOWN = constant_id("ZC_DEVICES_KNOWN")
+ZC_DEVICES_PEAK_RSS = constant_id("ZC_DEVICES_PEAK_RSS")
+ZC_DEVICES_PEAK_RSS_INCREASE = constant_id("ZC_DEVICES_PEAK_RSS_INCREASE")
 ZC_TO_INDIGO_ID = constant_id("ZC_TO_INDIGO_ID")
 ZC_LIST = constant_id("ZC_LIST")
 ZC_IEEE = constant_id("ZC_IEEE")
+ZC_IEEE_TO_COORDINATOR = constant_id("ZC_IEEE_TO_COORDINATOR")
+ZC_INDIGO_DEVICE_ID = constant_id("ZC_INDIGO_DEVICE_ID")
 ZD = constant_id("ZD [ZIGBEE DEVICE]")
 ZD_BATTERY = constant_id("ZD_BATTERY")
 ZD_CONTACT = constant_id("ZD_CONTACT")
-ZD_DEFINITION = constant_id("ZD_DISABLED")
+ZD_DEFINITION = constant_id("ZD_DEFINITION")
+ZD_DEFINITION_HASH = constant_id("ZD_DEFINITION_HASH")
 ZD_DESCRIPTION_HW = constant_id("ZD_DESCRIPTION_HW")
 ZD_DESCRIPTION_USER = constant_id("ZD_DESCRIPTION_USER")
 ZD_DEVICES = constant_id("ZD_DEVICES")
@@ -101,6 +133,7 @@ ZD_DEVICE_STATES = constant_id("ZD_DEVICE_STATES")
 ZD_DISABLED = constant_id("ZD_DISABLED")
 ZD_EXPOSES = constant_id("ZD_EXPOSES")
 ZD_FRIENDLY_NAME = constant_id("ZD_FRIENDLY_NAME")
+ZD_FRIENDLY_NAME_TO_IEEE = constant_id("ZD_FRIENDLY_NAME_TO_IEEE")
 ZD_HUBS = constant_id("ZD_HUBS")
 ZD_HUB_EVENT = constant_id("ZD_HUB_EVENT")
 ZD_HUB_THREAD = constant_id("ZD_HUB_THREAD")
@@ -108,16 +141,21 @@ ZD_HUMIDITY = constant_id("ZD_HUMIDITY")
 ZD_INDIGO_DEVICE_ID = constant_id("ZD_INDIGO_DEVICE_ID")
 ZD_INDIGO_DEVICE_ID_LIST = constant_id("ZD_INDIGO_DEVICE_ID_LIST")
 ZD_INDIGO_HUB_ID = constant_id("ZD_INDIGO_HUB_ID")
+ZD_LAST_SEEN = constant_id("ZD_LAST_SEEN")
+ZD_LAST_SEEN_WRITTEN = constant_id("ZD_LAST_SEEN_WRITTEN")
 ZD_LINKED_INDIGO_DEVICES = constant_id("ZD_LINKED_INDIGO_DEVICES")
 ZD_MANUFACTURER = constant_id("ZD_MANUFACTURER")
 ZD_MESSAGE_COUNT = constant_id("ZD_MESSAGE_COUNT")
 ZD_MODEL = constant_id("ZD_MODEL")
 ZD_MODEL_ID = constant_id("ZD_MODEL_ID")
+ZD_MODEL_DEFINITION = constant_id("ZD_MODEL_DEFINITION")
+ZD_MODELS = constant_id("ZD_MODELS")
 ZD_MOTION = constant_id("ZD_MOTION")
 ZD_MQTT_FILTERS = constant_id("ZD_MQTT_FILTERS")
 ZD_MQTT_FILTER_DEVICES = constant_id("ZD_MQTT_FILTER_DEVICES")
 ZD_MQTT_FILTER_HUB = constant_id("ZD_MQTT_FILTER_HUB")
 ZD_OUTLET = constant_id("ZD_OUTLET")
+ZD_PIPELINES = constant_id("ZD_PIPELINES")
 ZD_POWER_SOURCE = constant_id("ZD_POWER_SOURCE")
 ZD_PREVIOUS_POWER_LEVEL = constant_id("ZD_PREVIOUS_POWER_LEVEL")
 ZD_PREVIOUS_POWER_LEVEL_LEFT = constant_id("ZD_PREVIOUS_POWER_LEVEL_LEFT")
@@ -125,6 +163,7 @@ ZD_PREVIOUS_POWER_LEVEL_RIGHT = constant_id("ZD_PREVIOUS_POWER_LEVEL_RIGHT")
 ZD_PROPERTIES = constant_id("ZD_PROPERTIES")
 ZD_ROTATION_INITIAL = constant_id("ZD_ROTATION_INITIAL")
 ZD_ROTATION_VARIABLE = constant_id("ZD_ROTATION_VARIABLE")
+ZD_SECONDARY_DEVICES = constant_id("ZD_SECONDARY_DEVICES")
 ZD_SOFTWARE_BUILD_ID = constant_id("ZD_SOFTWARE_BUILD_ID")
 ZD_STATES = constant_id("ZD_STATES")
 ZD_STATE_DIM = constant_id("ZD_STATE_DIM")
@@ -133,8 +172,13 @@ ZD_TEMPERATURE = constant_id("ZD_TEMPERATURE")
 ZD_TO_INDIGO_ID = constant_id("ZD_TO_INDIGO_ID")
 ZD_VENDOR = constant_id("ZD_VENDOR")
 ZH_EVENT = constant_id("ZH_EVENT")
+ZH_EXPRESS_THREAD = constant_id("ZH_EXPRESS_THREAD")
 ZH_THREAD = constant_id("ZH_THREAD")
+ZH_WORKERS = constant_id("ZH_WORKERS")
 ZIGBEE2MQTT_ROOT_TOPIC = constant_id("ZIGBEE2MQTT_ROOT_TOPIC")
+ZIGBEE_SET_TRANSITION = constant_id("ZIGBEE_SET_TRANSITION")
+ZP_EVENT = constant_id("ZP_EVENT")
+ZP_THREAD = constant_id("ZP_THREAD")
 
 ZD_PROPERTIES_SUPPORTED_BY_DEVICE_TYPES = dict()
 ZD_PROPERTIES_SUPPORTED_BY_DEVICE_TYPES["acceleration"] = ["humiditySensor", "illuminanceSensor", "motionSensor", "multiSensor"]
@@ -188,6 +232,8 @@ ZD_PROPERTIES_SUPPORTED_BY_DEVICE_TYPES["vibration"] = ["vibrationSensor"]
 ZD_PROPERTIES_SUPPORTED_BY_DEVICE_TYPES["voltage"] = ["button", "contactSensor", "motionSensor", "outlet", "temperatureSensor", "vibrationSensor"]
 ZD_PROPERTIES_SUPPORTED_BY_DEVICE_TYPES["refresh"] = ["outlet", "thermostat"]
 
+ZD_PROPERTIES_SPECIAL_PROCESSING = frozenset(("device_temperature", "illuminance_lux"))  # Handled properties with special processing
+
 ZD_PRIMARY_INDIGO_DEVICE_TYPES_AND_ZIGBEE_PROPERTIES = dict()
 ZD_PRIMARY_INDIGO_DEVICE_TYPES_AND_ZIGBEE_PROPERTIES["button"] = ["action"]
 ZD_PRIMARY_INDIGO_DEVICE_TYPES_AND_ZIGBEE_PROPERTIES["blind"] = ["position"]
@@ -218,6 +264,17 @@ ZG_ID = constant_id("ZG_ID")
 ZG_MEMBERS = constant_id("ZG_MEMBERS")
 ZG_INDIGO_DEVICE_ID = constant_id("ZG_INDIGO_DEVICE_ID")
 
+ZM_CAPABILITIES = constant_id("ZM_CAPABILITIES")
+ZM_DEFINITION = constant_id("ZM_DEFINITION")
+ZM_DEFINITION_HASH = constant_id("ZM_DEFINITION_HASH")
+ZM_EXPOSES = constant_id("ZM_EXPOSES")
+ZM_PROPERTIES = constant_id("ZM_PROPERTIES")
+ZM_PROPERTIES_SET = constant_id("ZM_PROPERTIES_SET")
+ZM_UNSUPPORTED_PROPERTIES = constant_id("ZM_UNSUPPORTED_PROPERTIES")
+
+# Zigbee2mqtt specific expose types - recorded as a Zigbee model's capabilities
+ZIGBEE_SPECIFIC_EXPOSE_TYPES = frozenset(("climate", "cover", "fan", "light", "lock", "switch"))
+
 ZS = constant_id("ZS [ZIGBEE Scene]")
 
 INDIGO_PRIMARY_DEVICE_MAIN_UI_STATE = "0"
@@ -360,6 +417,12 @@ LOG_LEVEL_TRANSLATION[LOG_LEVEL_WARNING] = "Warning"
 LOG_LEVEL_TRANSLATION[LOG_LEVEL_ERROR] = "Error"
 LOG_LEVEL_TRANSLATION[LOG_LEVEL_CRITICAL] = "Critical"
 
+# MQTT message drop reasons (classified before being queued)
+MQTT_DROP_REASON_ECHO = "set | get | action echo"
+MQTT_DROP_REASON_INVALID_TOPIC = "invalid topic"
+MQTT_DROP_REASON_UNLINKED_DEVICE = "no linked Indigo device"
+MQTT_DROP_REASON_UNLINKED_GROUP = "no linked Indigo group"
+
 # QUEUE Priorities
 QUEUE_PRIORITY_STOP_THREAD    = 0
 QUEUE_PRIORITY_COMMAND_HIGH   = 100
@@ -367,6 +430,14 @@ QUEUE_PRIORITY_COMMAND_MEDIUM = 200
 QUEUE_PRIORITY_POLLING        = 300
 QUEUE_PRIORITY_LOW            = 400
 
+# Zigbee handler worker number of the express worker that handles button / remote 'action' events for a Zigbee Coordinator
+ZIGBEE_HANDLER_EXPRESS_WORKER = -1
+PUBLISH_COALESCE_WINDOW = 0.1  # Seconds a level command (e.g. brightness) is held for later values of the same level to replace it
+ACTION_LATENCY_SAMPLES = 1000  # Number of most recent press-to-state latencies kept for the express worker statistics
+
+# Zigbee device properties that are only telemetry - a message with no other properties is queued at low priority
+ZIGBEE_TELEMETRY_PROPERTIES = frozenset(("linkquality", "last_seen", "voltage"))
+
 # Rounded  Kelvin Descriptions (from iOS LIFX App)
 ROUNDED_KELVINS =dict()
 ROUNDED_KELVINS[1500] = ((246, 221, 184), "~ Candlelight")  # TODO: Set correct RGB values
@@ -10,13 +10,6 @@ try:
 except ImportError:
     pass
 
-try:
-    from cryptography.fernet import Fernet
-    from cryptography.hazmat.primitives import hashes
-    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-except ImportError:
-    pass
-
 # try:
 #     import paho.mqtt.client as mqtt
 # except ImportError:
@@ -27,19 +20,26 @@ try:
 except ImportError:
     pass
 
+import re
 import sys
 import threading
 import traceback
 import time
 
 from constants import *
+from lazyImport import lazy_import
+
+PAYLOAD_KEY_PATTERN = re.compile(r'"([^"\\]*)"\s*:')  # Keys of a JSON payload (including those of nested objects), found without decoding it
+PAYLOAD_ACTION_PATTERN = re.compile(r'"action"\s*:\s*"[^"]')  # A JSON payload with a (non-empty) button / remote 'action' event
 
 
 # https://cryptography.io/en/latest/fernet/#using-passwords-with-fernet
 def decode(key, encrypted_password):
     # print(f"Python 3 Decode, Arguments: Key='{key}', Encrypted Password='{encrypted_password}'")
 
-    f = Fernet(key)
+    fernet = lazy_import("cryptography.fernet")  # Only needed when connecting, so not imported until first used
+
+    f = fernet.Fernet(key)
     unencrypted_password = f.decrypt(encrypted_password)
 
     # print(f"Python 3 Decode: Unencrypted Password = {unencrypted_password}")
@@ -176,6 +176,7 @@ class ThreadCoordinatorHandler(threading.Thread):
             self.globals[ZC][self.zc_dev_id][MQTT_PUBLISH_TO_ZIGBEE2MQTT] = self.publish_to_zigbee2mqtt  # TODO: WHAT IS THIS???
 
             self.globals[ZC][self.zc_dev_id][MQTT_CONNECTED] = True
+            self.globals[STARTUP_TIMINGS].setdefault(STARTUP_FIRST_CONNECTED, time.perf_counter())
             zc_dev = indigo.devices[self.zc_dev_id]
             zc_dev.updateStateOnServer(key="status", value="connected")
             zc_dev.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
@@ -229,25 +230,133 @@ class ThreadCoordinatorHandler(threading.Thread):
 
     def handle_message(self, client, userdata, msg):  # noqa [Unused parameter values: client, userdata]
         try:
+            received = time.perf_counter()
             self.mqtt_message_sequence += 1
+            zc_internal = self.globals[ZC][self.zc_dev_id]
+            zc_internal.mqtt_messages_received += 1
             topic_list = msg.topic.split("/")  # noqa [Duplicated code fragment!]
-            payload = msg.payload.decode('utf-8')
 
             if len(topic_list) < 2:
+                self.drop_message(MQTT_DROP_REASON_INVALID_TOPIC)
                 return
 
-            if topic_list[0] == self.globals[ZC][self.zc_dev_id][MQTT_ROOT_TOPIC]:  # e.g: "zigbee2mqtt"
+            if topic_list[0] == zc_internal.mqtt_root_topic:  # e.g: "zigbee2mqtt"
                 # self.mqttHandlerLogger.warning(f"ZIGBEE2MQTT-2 [{self.mqtt_message_sequence}]: Topic={msg.topic}, Payload={msg.payload}")
                 # self.mqttHandlerLogger.warning(f"QUEUEING [{self.mqtt_message_sequence}]: Topic={msg.topic}")
 
-                if topic_list[1] == "bridge":
-                    zigbee_process_command = HANDLE_ZIGBEE_COORDINATOR_MQTT_TOPIC
-                elif topic_list[1] in self.globals[ZG][indigo.devices[self.zc_dev_id].address]:
-                    zigbee_process_command = HANDLE_ZIGBEE_GROUP_MQTT_TOPIC
+                zigbee_process_command, shard_key = self.classify_message(topic_list)
+                if zigbee_process_command is None:
+                    return  # Dropped - nothing would be done with it by the Zigbee handler
+
+                payload = msg.payload.decode('utf-8')
+
+                # Shard across the Zigbee handler workers so that all messages for a Zigbee device are processed in order by the same worker
+                zigbee_queues = self.globals[QUEUES][MQTT_ZIGBEE2MQTT_QUEUE][self.zc_dev_id]
+                zigbee_queue = zigbee_queues[hash(shard_key) % len(zigbee_queues)] if shard_key is not None else zigbee_queues[0]
+
+                priority = self.classify_priority(zigbee_process_command, topic_list, payload)
+
+                if zigbee_process_command == HANDLE_ZIGBEE_DEVICE_MQTT_TOPIC and '"action"' in payload and not msg.retain:
+                    if self.queue_express_action(msg.topic, topic_list, payload, received):
+                        zigbee_process_command = HANDLE_ZIGBEE_DEVICE_EXPRESSED_MQTT_TOPIC  # The device's worker skips the action processors
+
+                queue_entry = [self.mqtt_message_sequence, zigbee_process_command, self.zc_dev_id, msg.topic, topic_list, payload, received]
+                if zc_internal.mqtt_coalesce_messages and zigbee_process_command != HANDLE_ZIGBEE_COORDINATOR_MQTT_TOPIC:
+                    # Latest wins per device topic, except for button 'action' events which must never be coalesced
+                    zigbee_queue.put(queue_entry, priority, coalesce_key=msg.topic, coalescable='"action"' not in payload, order_key=shard_key)
                 else:
-                    zigbee_process_command = HANDLE_ZIGBEE_DEVICE_MQTT_TOPIC
+                    zigbee_queue.put(queue_entry, priority, order_key=shard_key)
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def queue_express_action(self, topic, topic_list, payload, received):
+        # Button / remote 'action' events are queued for the express worker so that they don't wait behind telemetry
+        # (or the processing of the rest of the message) before their states are updated. Returns True if queued, in
+        # which case the message is still queued as normal for the rest of its properties, but the device's worker
+        # skips the action processors. The payload isn't decoded here so as not to hold up the MQTT client thread.
+        # Retained messages aren't expressed so that an old action isn't replayed on connection.
+        try:
+            express_queue = self.globals[QUEUES][MQTT_ZIGBEE2MQTT_EXPRESS_QUEUE].get(self.zc_dev_id, None)
+            if express_queue is None or PAYLOAD_ACTION_PATTERN.search(payload) is None:
+                return False
+
+            express_queue.put([self.mqtt_message_sequence, HANDLE_ZIGBEE_DEVICE_ACTION_MQTT_TOPIC, self.zc_dev_id, topic, topic_list, payload, received], QUEUE_PRIORITY_COMMAND_HIGH)
+            return True
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+            return False
+
+    def classify_message(self, topic_list):
+        # Returns the Zigbee handler command for the topic (None if the message is to be dropped before being decoded and queued)
+        # and the key used to shard the message across the Zigbee handler workers (None for the bridge which is always handled by the first worker)
+        try:
+            if topic_list[1] == "bridge":
+                return HANDLE_ZIGBEE_COORDINATOR_MQTT_TOPIC, None
+
+            if topic_list[-1] in ("set", "get", "action"):  # Note: '/action' is added if Home Assistant Integration is enabled in Zigbee2mqtt settings
+                self.drop_message(MQTT_DROP_REASON_ECHO)
+                return None, None
+
+            zigbee_coordinator_ieee = self.globals[ZC][self.zc_dev_id].get(ZC_IEEE, "")
+
+            zigbee_group = self.globals[ZG].get(zigbee_coordinator_ieee, dict()).get(topic_list[1], None)
+            if zigbee_group is not None:
+                if zigbee_group.indigo_device_id == 0:
+                    self.drop_message(MQTT_DROP_REASON_UNLINKED_GROUP)
+                    return None, None
+                return HANDLE_ZIGBEE_GROUP_MQTT_TOPIC, topic_list[1]
+
+            if topic_list[-1] == "availability":
+                topic_friendly_name = "/".join(topic_list[1:-1])
+            else:
+                topic_friendly_name = "/".join(topic_list[1:])
+
+            friendly_name_to_ieee = self.globals[ZD_FRIENDLY_NAME_TO_IEEE].get(zigbee_coordinator_ieee, None)
+            if friendly_name_to_ieee is None:  # Only filter once the bridge devices message has been processed
+                return HANDLE_ZIGBEE_DEVICE_MQTT_TOPIC, topic_friendly_name
+
+            zigbee_device_ieee = friendly_name_to_ieee.get(topic_friendly_name, None)
+            if zigbee_device_ieee is not None and zigbee_device_ieee not in self.globals[ZD_LINKED_INDIGO_DEVICES].get(zigbee_coordinator_ieee, set()):
+                self.drop_message(MQTT_DROP_REASON_UNLINKED_DEVICE)
+                return None, None
 
-                self.globals[QUEUES][MQTT_ZIGBEE2MQTT_QUEUE][self.zc_dev_id].put([self.mqtt_message_sequence, zigbee_process_command, self.zc_dev_id, msg.topic, topic_list, payload])
+            # Always shard on the topic friendly name (rather than e.g. the ieee once the index exists) so that a device's
+            # messages never move to another worker, where they could be processed out of order
+            return HANDLE_ZIGBEE_DEVICE_MQTT_TOPIC, topic_friendly_name
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
+            return None, None
+
+    def classify_priority(self, zigbee_process_command, topic_list, payload):
+        # Returns the Zigbee handler queue priority for the message:
+        #   High   - button / remote 'action' events and the bridge devices and groups lists
+        #   Low    - telemetry only updates (e.g. just link quality and last seen)
+        #   Medium - everything else
+        try:
+            if zigbee_process_command == HANDLE_ZIGBEE_COORDINATOR_MQTT_TOPIC:
+                if len(topic_list) > 2 and topic_list[2] in ("devices", "groups"):
+                    return QUEUE_PRIORITY_COMMAND_HIGH
+                return QUEUE_PRIORITY_COMMAND_MEDIUM
+
+            if '"action"' in payload:
+                return QUEUE_PRIORITY_COMMAND_HIGH
+
+            if zigbee_process_command == HANDLE_ZIGBEE_DEVICE_MQTT_TOPIC and topic_list[-1] != "availability":
+                # Scan the keys rather than decode the payload on the MQTT client thread - the keys of a nested object
+                # are never telemetry properties, so a payload with one isn't classed as telemetry only
+                payload_keys = PAYLOAD_KEY_PATTERN.findall(payload)
+                if len(payload_keys) > 0 and ZIGBEE_TELEMETRY_PROPERTIES.issuperset(payload_keys):
+                    return QUEUE_PRIORITY_LOW
+
+            return QUEUE_PRIORITY_COMMAND_MEDIUM
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+            return QUEUE_PRIORITY_COMMAND_MEDIUM
+
+    def drop_message(self, reason):
+        dropped = self.globals[ZC][self.zc_dev_id][MQTT_MESSAGES_DROPPED]
+        dropped[reason] = dropped.get(reason, 0) + 1
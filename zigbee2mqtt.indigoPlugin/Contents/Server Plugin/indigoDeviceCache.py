@@ -0,0 +1,96 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Zigbee2mqtt - Plugin © Autolog 2023
+#
+
+try:
+    # noinspection PyUnresolvedReferences
+    import indigo
+except ImportError:
+    pass
+import threading
+
+
+# noinspection PyPep8Naming
+class IndigoDeviceCache:
+
+    # This class is a read-through cache of Indigo device objects and their pluginProps, shared by the plugin and the
+    # Zigbee handler threads, so that processing an MQTT message doesn't need a round-trip to the Indigo server for
+    # each device and property lookup.
+    #
+    # Entries are refreshed or invalidated by the plugin from its device_updated / deviceDeleted callbacks (the plugin
+    # subscribes to device changes). Device states are read from the state shadow (IndigoStateShadow) rather than from
+    # the cached device, so a cached device doesn't need to be dropped when its states are updated.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.devices = dict()  # Indigo device id -> Indigo device object
+        self.plugin_props = dict()  # Indigo device id -> dict copy of the device's pluginProps
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def device(self, dev_id):
+        # Returns the Indigo device, raising KeyError (as indigo.devices does) if it doesn't exist
+        with self.lock:
+            dev = self.devices.get(dev_id, None)
+            if dev is not None:
+                self.hits += 1
+                return dev
+            self.misses += 1
+        dev = indigo.devices[dev_id]
+        with self.lock:
+            self.devices[dev_id] = dev
+        return dev
+
+    def exists(self, dev_id):
+        with self.lock:
+            if dev_id in self.devices:
+                self.hits += 1
+                return True
+        try:
+            self.device(dev_id)
+            return True
+        except KeyError:
+            return False
+
+    def props(self, dev_id):
+        # Returns a dict copy of the Indigo device's pluginProps - callers must treat it as read-only
+        with self.lock:
+            plugin_props = self.plugin_props.get(dev_id, None)
+            if plugin_props is not None:
+                self.hits += 1
+                return plugin_props
+            self.misses += 1
+            dev = self.devices.get(dev_id, None)
+        if dev is None:
+            dev = indigo.devices[dev_id]
+        plugin_props = dict(dev.pluginProps)
+        with self.lock:
+            self.plugin_props[dev_id] = plugin_props
+        return plugin_props
+
+    def refresh(self, dev, props_changed):
+        # Replace the cached device with the latest copy (e.g. as supplied to device_updated)
+        with self.lock:
+            if dev.id in self.devices:
+                self.devices[dev.id] = dev
+            if props_changed:
+                self.plugin_props.pop(dev.id, None)
+
+    def invalidate(self, dev_id, props_changed=True):
+        with self.lock:
+            if self.devices.pop(dev_id, None) is not None:
+                self.invalidations += 1
+            if props_changed:
+                self.plugin_props.pop(dev_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.devices.clear()
+            self.plugin_props.clear()
+
+    def statistics(self):
+        with self.lock:
+            return self.hits, self.misses, self.invalidations, len(self.devices)
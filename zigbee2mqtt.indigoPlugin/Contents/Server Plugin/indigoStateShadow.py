@@ -0,0 +1,83 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Zigbee2mqtt - Plugin © Autolog 2023
+#
+
+import threading
+
+
+# noinspection PyPep8Naming
+class IndigoStateShadow:
+
+    # This class holds an in-plugin copy of the states of the plugin's Indigo devices so that the Zigbee handlers can
+    # compare received values without reading device states from the Indigo server, and so that only states whose
+    # value has changed are sent to the server.
+    #
+    # The shadow copy of a device's states is seeded from the Indigo device the first time it is needed and is then
+    # kept up to date by the plugin for every state it writes. Only the plugin can update the states of its own
+    # devices, so the shadow stays in step with the server. UI values are held under "<state>.ui" keys, as Indigo does.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.shadow_states = dict()  # Indigo device id -> dict of state values
+        self.suppressed = dict()  # Indigo device id -> [number of suppressed state updates, number of skipped server writes]
+
+    def states(self, dev):
+        # Returns the shadow states of the Indigo device - callers must treat it as read-only
+        shadow_states = self.shadow_states.get(dev.id, None)
+        if shadow_states is None:
+            with self.lock:
+                shadow_states = self.shadow_states.get(dev.id, None)
+                if shadow_states is None:
+                    shadow_states = dict(dev.states)
+                    self.shadow_states[dev.id] = shadow_states
+        return shadow_states
+
+    def changed_states(self, dev, key_value_list):
+        # Returns the key value list reduced to the states that differ from the shadow copy, with any duplicate keys
+        # removed (the last update for a key wins). The shadow copy is updated with the returned values.
+        shadow_states = self.states(dev)
+
+        latest_updates = dict()
+        for key_value in key_value_list:
+            latest_updates.pop(key_value["key"], None)  # Re-insert so that the order of the final updates is preserved
+            latest_updates[key_value["key"]] = key_value
+
+        changed_key_value_list = list()
+        for key, key_value in latest_updates.items():
+            if key in shadow_states and shadow_states[key] == key_value["value"]:
+                if "uiValue" not in key_value or shadow_states.get(f"{key}.ui", None) == key_value["uiValue"]:
+                    continue
+            changed_key_value_list.append(key_value)
+            self.update_shadow_state(shadow_states, key, key_value["value"], key_value.get("uiValue", None))
+
+        suppressed_count = len(key_value_list) - len(changed_key_value_list)
+        if suppressed_count > 0:
+            with self.lock:
+                suppressed = self.suppressed.setdefault(dev.id, [0, 0])
+                suppressed[0] += suppressed_count
+                if len(changed_key_value_list) == 0:
+                    suppressed[1] += 1
+
+        return changed_key_value_list
+
+    def update_state(self, dev, key, value, ui_value=None):
+        # Records a state that has been written directly to the Indigo server (i.e. not via changed_states)
+        self.update_shadow_state(self.states(dev), key, value, ui_value)
+
+    @staticmethod
+    def update_shadow_state(shadow_states, key, value, ui_value):
+        shadow_states[key] = value
+        if ui_value is not None:
+            shadow_states[f"{key}.ui"] = ui_value
+        else:
+            shadow_states.pop(f"{key}.ui", None)  # UI value derived by Indigo, so unknown
+
+    def invalidate(self, dev_id):
+        with self.lock:
+            self.shadow_states.pop(dev_id, None)
+
+    def statistics(self):
+        with self.lock:
+            return {dev_id: tuple(suppressed) for dev_id, suppressed in self.suppressed.items()}
@@ -0,0 +1,129 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Zigbee2mqtt - Plugin © Autolog 2023
+#
+
+try:
+    # noinspection PyUnresolvedReferences
+    import indigo
+except ImportError:
+    pass
+import logging
+import sys
+import threading
+import traceback
+
+from constants import *
+
+
+# noinspection PyPep8Naming
+class ThreadIndigoWriter(threading.Thread):
+
+    # This class writes device state and state image updates to the Indigo server on behalf of the Zigbee handlers.
+    #
+    # The Zigbee handlers queue their (already de-duplicated) state updates and state image changes per Indigo device
+    # and carry on decoding MQTT messages. The writer flushes everything pending at the configured flush interval,
+    # with repeated updates of the same state (or state image) since the last flush merged so that the latest wins.
+    # States are written before the state image for each device. All writes are made by the writer thread, so that
+    # they are made in the order queued; a flush can be requested ahead of the interval (e.g. for button actions).
+
+    def __init__(self, pluginGlobals, event):
+        try:
+            threading.Thread.__init__(self)
+
+            self.globals = pluginGlobals
+
+            self.device_cache = self.globals[INDIGO_DEVICE_CACHE]  # Read-through cache of Indigo devices and their pluginProps
+
+            self.lock = threading.Lock()
+            self.pending_states = dict()  # Indigo device id -> dict of state key -> key value entry
+            self.pending_images = dict()  # Indigo device id -> Indigo state image
+            self.flush_requested = threading.Event()
+
+            self.flushes = 0
+            self.writes = 0
+            self.merged = 0
+
+            self.indigoWriterLogger = logging.getLogger("Plugin.Zigbee")
+
+            self.threadStop = event
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def exception_handler(self, exception_error_message, log_failing_statement):
+        filename, line_number, method, statement = traceback.extract_tb(sys.exc_info()[2])[-1]  # noqa [Ignore duplicate code warning]
+        module = filename.split('/')
+        log_message = f"'{exception_error_message}' in module '{module[-1]}', method '{method} [{self.globals[PLUGIN_INFO][PLUGIN_VERSION]}]'"
+        if log_failing_statement:
+            log_message = log_message + f"\n   Failing statement [line {line_number}]: '{statement}'"
+        else:
+            log_message = log_message + f" at line {line_number}"
+        self.indigoWriterLogger.error(log_message)
+
+    def run(self):
+        try:
+            while not self.threadStop.is_set():
+                self.flush_requested.wait(self.globals[INDIGO_WRITER_FLUSH_INTERVAL])
+                self.flush_requested.clear()
+                self.flush()
+            self.flush()  # Write anything still pending before stopping
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def update_states(self, dev_id, key_value_list):
+        # Queues state updates for the Indigo device - the latest update for a state since the last flush wins
+        with self.lock:
+            pending_states = self.pending_states.setdefault(dev_id, dict())
+            for key_value in key_value_list:
+                if key_value["key"] in pending_states:
+                    self.merged += 1
+                pending_states[key_value["key"]] = key_value
+
+    def update_state_image(self, dev_id, state_image):
+        # Queues a state image change for the Indigo device - the latest image since the last flush wins
+        with self.lock:
+            if dev_id in self.pending_images:
+                self.merged += 1
+            self.pending_images[dev_id] = state_image
+
+    def request_flush(self):
+        # Wakes the writer to write everything pending now rather than at the end of the flush interval (used by the
+        # express worker so that button / remote actions don't wait for the next flush)
+        self.flush_requested.set()
+
+    def flush(self):
+        try:
+            with self.lock:
+                if len(self.pending_states) == 0 and len(self.pending_images) == 0:
+                    return
+                pending_states = self.pending_states
+                pending_images = self.pending_images
+                self.pending_states = dict()
+                self.pending_images = dict()
+                self.flushes += 1
+
+            for dev_id in set(pending_states) | set(pending_images):
+                try:
+                    if not self.device_cache.exists(dev_id):
+                        continue  # Device deleted since the update was queued
+                    dev = self.device_cache.device(dev_id)
+                    if not dev.enabled:
+                        continue
+                    if dev_id in pending_states:
+                        dev.updateStatesOnServer(list(pending_states[dev_id].values()))
+                        self.writes += 1
+                    if dev_id in pending_images:
+                        dev.updateStateImageOnServer(pending_images[dev_id])
+                        self.writes += 1
+                except Exception as exception_error:
+                    self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def statistics(self):
+        with self.lock:
+            return self.flushes, self.writes, self.merged
@@ -0,0 +1,43 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Zigbee2mqtt - Plugin © Autolog 2023
+#
+
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+
+# Heavy optional libraries (colormath / numpy, cryptography) are imported the first time they are used rather than when
+# the plugin loads. The time taken by each import made via lazy_import is recorded for the plugin information report.
+
+_import_lock = threading.Lock()
+_import_timings = dict()  # Module name -> seconds taken to import it
+
+
+def module_available(module_name):
+    # Checks that a module can be imported without importing it
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy_import(module_name):
+    module = sys.modules.get(module_name, None)
+    if module is not None:
+        return module
+    with _import_lock:
+        module = sys.modules.get(module_name, None)
+        if module is None:
+            start_time = time.perf_counter()
+            module = importlib.import_module(module_name)
+            _import_timings[module_name] = time.perf_counter() - start_time
+    return module
+
+
+def import_timings():
+    with _import_lock:
+        return dict(_import_timings)
@@ -11,16 +11,14 @@
 # import requirements
 
 # ============================== Native Imports ===============================
+import time
+PLUGIN_LOAD_START = time.perf_counter()  # Used to report the plugin startup timings
+
 import base64
-from cryptography.fernet import Fernet  # noqa
-from cryptography.hazmat.primitives import hashes  # noqa
-from cryptography.hazmat.primitives import hashes  # noqa
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC  # noqa
 from datetime import datetime
 import json
 import os
 import platform
-import queue
 import re
 import socket
 import sys
@@ -35,21 +33,29 @@ try:
 except ImportError:
     pass
 
+from colorConversion import benchmark_color_conversion, color_cache_statistics
 from constants import *
 from coordinatorHandler import ThreadCoordinatorHandler
+from indigoDeviceCache import IndigoDeviceCache
+from indigoStateShadow import IndigoStateShadow
+from indigoWriter import ThreadIndigoWriter
+from lazyImport import import_timings, lazy_import, module_available
+from pluginScheduler import ThreadScheduler
+from reportingFilter import ReportingFilter
+from zigbeeGroupCover import greedy_group_cover, has_multiple_endpoints, zigbee_device_members, zigbee_group_members
 from zigbeeHandler import ThreadZigbeeHandler
+from zigbeePayload import ZigbeeSetPayload
+from zigbeePublisher import ThreadZigbeePublisher
+from zigbeeQueue import ZigbeeCoalescingQueue, ZigbeePriorityQueue
+from zigbeeRecords import benchmark_registry_layouts, ZigbeeCoordinatorRecord, ZigbeeDeviceRecord, ZigbeeGroupRecord
 
+# Check the required libraries are present without importing them - cryptography is only imported when first used (see lazyImport)
 import_errors = []
-try:
-    import paho.mqtt.client as mqtt
-except ImportError:
-    import_errors.append("paho-mqtt")
+for module_name, package in (("paho.mqtt.client", "paho-mqtt"), ("cryptography", "cryptography")):
+    if not module_available(module_name):
+        import_errors.append(package)
 
-try:
-    from colormath.color_objects import XYZColor, sRGBColor, xyYColor
-    from colormath.color_conversions import convert_color
-except ImportError:
-    import_errors.append("colormath")
+PLUGIN_MODULES_LOADED = time.perf_counter()
 
 
 # ================================== Header ===================================
@@ -69,12 +75,16 @@ def encode(unencrypted_password):
     internal_password = MQTT_ENCRYPTION_PASSWORD_PYTHON_3  # Byte string
     # print(f"Python 3 Encode - Internal Password: {internal_password}")
 
+    hashes = lazy_import("cryptography.hazmat.primitives.hashes")
+    pbkdf2 = lazy_import("cryptography.hazmat.primitives.kdf.pbkdf2")
+    fernet = lazy_import("cryptography.fernet")
+
     salt = os.urandom(16)
-    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=390000)
+    kdf = pbkdf2.PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=390000)
     key = base64.urlsafe_b64encode(kdf.derive(internal_password))
     # print(f"Python 3 Encode - Key: {key}")
 
-    f = Fernet(key)
+    f = fernet.Fernet(key)
 
     unencrypted_password = unencrypted_password.encode()  # str -> b
     encrypted_password = f.encrypt(unencrypted_password)
@@ -86,7 +96,9 @@ def encode(unencrypted_password):
 def decode(key, encrypted_password):
     # print(f"Python 3 Decode, Arguments: Key='{key}', Encrypted Password='{encrypted_password}'")
 
-    f = Fernet(key)
+    fernet = lazy_import("cryptography.fernet")
+
+    f = fernet.Fernet(key)
     unencrypted_password = f.decrypt(encrypted_password)
 
     # print(f"Python 3 Decode: Unencrypted Password = {unencrypted_password}")
@@ -112,6 +124,10 @@ class Plugin(indigo.PluginBase):
         # Initialise dictionary to store plugin Globals
         self.globals = dict()
 
+        self.globals[STARTUP_TIMINGS] = dict()  # Plugin startup timings (time.perf_counter values) reported by "Display Plugin Information"
+        self.globals[STARTUP_TIMINGS][STARTUP_LOAD_START] = PLUGIN_LOAD_START
+        self.globals[STARTUP_TIMINGS][STARTUP_MODULES_LOADED] = PLUGIN_MODULES_LOADED
+
         # MASTER DEBUG FLAG FOR DEVELOPMENT ONLY
         self.globals[DEBUG] = False
 
@@ -119,6 +135,7 @@ class Plugin(indigo.PluginBase):
         self.globals[LOCK_ZD_LINKED_INDIGO_DEVICES] = threading.Lock()  # Used to lock updating of 'self.globals[ZD][zigbee_coordinator_ieee]
         self.globals[QUEUES] = dict()
         self.globals[QUEUES][MQTT_ZIGBEE2MQTT_QUEUE] = dict()
+        self.globals[QUEUES][MQTT_ZIGBEE2MQTT_EXPRESS_QUEUE] = dict()  # One per Zigbee Coordinator - button / remote action events
 
         self.globals[LOCAL_IP] = socket.gethostbyname('localhost')
 
@@ -152,9 +169,36 @@ class Plugin(indigo.PluginBase):
         self.globals[ZG] = dict()  # Dictionary of Zigbee groups within a dictionary of Zigbee Coordinators - keyed on Zigbee Coordinator Address
 
         self.globals[ZC_TO_INDIGO_ID] = dict()
+        self.globals[ZC_IEEE_TO_COORDINATOR] = dict()  # Zigbee Coordinator ieee -> Zigbee Coordinator record (holding the live MQTT client) - used to publish
 
         self.globals[ZD_TO_INDIGO_ID] = dict()  # Zigbee device to primary Indigo device
 
+        self.globals[ZD_FRIENDLY_NAME_TO_IEEE] = dict()  # Zigbee device friendly name to Zigbee device ieee within a dictionary of Zigbee Coordinators - keyed on Zigbee Coordinator Address
+
+        self.globals[ZD_LINKED_INDIGO_DEVICES] = dict()  # Set of Zigbee device ieees linked to an Indigo device within a dictionary of Zigbee Coordinators - keyed on Zigbee Coordinator Address
+
+        self.globals[ZD_MODELS] = dict()  # Model definitions (exposes, properties and capabilities) shared by Zigbee devices of the same model within a dictionary of Zigbee Coordinators - keyed on Zigbee Coordinator Address
+
+        self.globals[ZD_PIPELINES] = dict()  # Compiled processor pipelines (resolved props and enabled processors) - keyed on Indigo device id
+
+        self.globals[ZD_SECONDARY_DEVICES] = dict()  # Secondary Indigo device ids keyed on secondary device type id within a dictionary keyed on primary Indigo device id
+
+        self.globals[INDIGO_DEVICE_CACHE] = IndigoDeviceCache()  # Read-through cache of Indigo devices and their pluginProps used by the Zigbee handlers
+
+        self.globals[INDIGO_STATE_SHADOW] = IndigoStateShadow()  # In-plugin copy of Indigo device states, used to suppress updates of unchanged states
+
+        self.globals[REPORTING_FILTER] = ReportingFilter(self.globals)  # Deadband / hysteresis filter for numeric sensor states, configured per Indigo device
+
+        self.globals[INDIGO_WRITER_FLUSH_INTERVAL] = 0.050  # Seconds between batched writes of state updates to the Indigo server (set from plugin config)
+
+        self.globals[LAST_SEEN_UPDATE_INTERVAL] = 60  # Minimum seconds between updates of a device's 'last_seen' state (set from plugin config)
+        self.globals[ZIGBEE_SET_TRANSITION] = 0.0  # Transition (seconds) sent with brightness and color commands - zero for the device default (set from plugin config)
+        self.globals[INDIGO_WRITER_EVENT] = None
+        self.globals[INDIGO_WRITER_THREAD] = None
+        self.globals[SCHEDULER_EVENT] = None
+        self.globals[SCHEDULER_THREAD] = None  # Single timer thread for e.g. resetting button / remote actions to idle
+        self.globals[BULK_ACTION_STATISTICS] = [0, 0, 0, 0]  # Bulk Set Devices actions: [actions, devices, Zigbee group commands, Zigbee device commands]
+
         self.globals[MQTT_FILTERS] = dict()
 
         self.globals[MQTT_SUPPRESS_IEEE_MISSING] = False
@@ -181,6 +225,18 @@ class Plugin(indigo.PluginBase):
                 startup_message_ui += f"{'Python Version:':<30} {sys.version.split(' ')[0]}\n"
                 startup_message_ui += f"{'Mac OS Version:':<30} {platform.mac_ver()[0]}\n"
                 startup_message_ui += f"{'Plugin Process ID:':<30} {os.getpid()}\n"
+                startup_message_ui += f"{'':-{'^'}80}\n"
+                startup_timings = self.globals[STARTUP_TIMINGS]
+                load_start = startup_timings[STARTUP_LOAD_START]
+                startup_message_ui += f"{'Plugin Modules Loaded:':<30} {(startup_timings[STARTUP_MODULES_LOADED] - load_start) * 1000:.0f} ms\n"
+                if STARTUP_COMPLETE in startup_timings:
+                    startup_message_ui += f"{'Plugin Startup Complete:':<30} {(startup_timings[STARTUP_COMPLETE] - load_start) * 1000:.0f} ms\n"
+                if STARTUP_FIRST_CONNECTED in startup_timings:
+                    startup_message_ui += f"{'First Coordinator Connected:':<30} {(startup_timings[STARTUP_FIRST_CONNECTED] - load_start) * 1000:.0f} ms\n"
+                else:
+                    startup_message_ui += f"{'First Coordinator Connected:':<30} Not yet connected\n"
+                for module_name, import_time in sorted(import_timings().items()):
+                    startup_message_ui += f"{'Import Time:':<30} {import_time * 1000:.0f} ms [{module_name}]\n"
                 startup_message_ui += f"{'':={'^'}80}\n"
                 return startup_message_ui
 
@@ -189,6 +245,91 @@ class Plugin(indigo.PluginBase):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
+    def display_coordinator_statistics(self):
+        try:
+            statistics_message_ui = "Zigbee Coordinator Statistics:\n"
+            statistics_message_ui += f"{'':={'^'}80}\n"
+            for zc_dev_id, zc_dev_details in self.globals[ZC].items():
+                if zc_dev_id not in indigo.devices:
+                    continue
+                statistics_message_ui += f"{'Zigbee Coordinator:':<30} {indigo.devices[zc_dev_id].name}\n"
+                statistics_message_ui += f"{'MQTT Messages Received:':<30} {zc_dev_details.get(MQTT_MESSAGES_RECEIVED, 0)}\n"
+                zigbee_coordinator_ieee = zc_dev_details.get(ZC_IEEE, "")
+                if zigbee_coordinator_ieee in self.globals[ZD_MODELS]:
+                    statistics_message_ui += f"{'Zigbee Models:':<30} {len(self.globals[ZD_MODELS][zigbee_coordinator_ieee])} [{len(self.globals[ZD].get(zigbee_coordinator_ieee, dict()))} Zigbee devices]\n"
+                if ZC_DEVICES_PEAK_RSS in zc_dev_details:
+                    statistics_message_ui += f"{'Bridge Devices Peak RSS:':<30} {zc_dev_details[ZC_DEVICES_PEAK_RSS] // 1024} KB [last message raised it by {zc_dev_details.get(ZC_DEVICES_PEAK_RSS_INCREASE, 0) // 1024} KB]\n"
+                for reason, count in sorted(zc_dev_details.get(MQTT_MESSAGES_DROPPED, dict()).items()):
+                    statistics_message_ui += f"{'MQTT Messages Dropped:':<30} {count} [{reason}]\n"
+                for worker_number, zigbee_queue in enumerate(self.globals[QUEUES][MQTT_ZIGBEE2MQTT_QUEUE].get(zc_dev_id, list())):
+                    statistics_message_ui += f"{f'Worker {worker_number + 1} Queue Depth:':<30} {zigbee_queue.qsize()}\n"
+                    lane_sizes = zigbee_queue.lane_sizes()
+                    statistics_message_ui += f"{f'Worker {worker_number + 1} Lanes H/M/L:':<30} {lane_sizes[QUEUE_PRIORITY_COMMAND_HIGH]} / {lane_sizes[QUEUE_PRIORITY_COMMAND_MEDIUM]} / {lane_sizes[QUEUE_PRIORITY_LOW]}\n"
+                    if isinstance(zigbee_queue, ZigbeeCoalescingQueue):
+                        statistics_message_ui += f"{f'Worker {worker_number + 1} Coalesced:':<30} {zigbee_queue.coalesced_count}\n"
+                if ZP_THREAD in zc_dev_details:
+                    published, collapsed, publish_queue_depth, publish_wait_average, publish_wait_maximum = zc_dev_details[ZP_THREAD].statistics()
+                    statistics_message_ui += f"{'MQTT Commands Published:':<30} {published} [{collapsed} collapsed, {publish_queue_depth} queued]\n"
+                    statistics_message_ui += f"{'MQTT Command Wait:':<30} {publish_wait_average * 1000:.1f} ms average, {publish_wait_maximum * 1000:.1f} ms maximum\n"
+                if ZH_EXPRESS_THREAD in zc_dev_details:
+                    action_count, action_latency_p50, action_latency_p99 = zc_dev_details[ZH_EXPRESS_THREAD].action_latency_statistics()
+                    statistics_message_ui += f"{'Express Actions:':<30} {action_count} [latency p50 {action_latency_p50 * 1000:.1f} ms, p99 {action_latency_p99 * 1000:.1f} ms]\n"
+                statistics_message_ui += f"{'':-{'^'}80}\n"
+            cache_hits, cache_misses, cache_invalidations, cache_size = self.globals[INDIGO_DEVICE_CACHE].statistics()
+            statistics_message_ui += f"{'Device Cache Hits:':<30} {cache_hits}\n"
+            statistics_message_ui += f"{'Device Cache Misses:':<30} {cache_misses}\n"
+            statistics_message_ui += f"{'Device Cache Invalidations:':<30} {cache_invalidations}\n"
+            statistics_message_ui += f"{'Device Cache Size:':<30} {cache_size}\n"
+            for dev_id, (suppressed_states, suppressed_writes) in sorted(self.globals[INDIGO_STATE_SHADOW].statistics().items()):
+                if dev_id in indigo.devices:
+                    statistics_message_ui += f"{'Suppressed State Updates:':<30} {suppressed_states} [{suppressed_writes} writes skipped] '{indigo.devices[dev_id].name}'\n"
+            filter_passed, filter_suppressed, filter_devices = self.globals[REPORTING_FILTER].statistics()
+            statistics_message_ui += f"{'Reporting Filter:':<30} {filter_suppressed} suppressed, {filter_passed} written [{filter_devices} devices filtered]\n"
+            color_cache_hits, color_cache_misses, color_cache_size = color_cache_statistics()
+            statistics_message_ui += f"{'Color Cache Hits:':<30} {color_cache_hits} [{color_cache_misses} misses, {color_cache_size} colors]\n"
+            if self.globals[INDIGO_WRITER_THREAD] is not None:
+                writer_flushes, writer_writes, writer_merged = self.globals[INDIGO_WRITER_THREAD].statistics()
+                statistics_message_ui += f"{'Indigo Writer Flushes:':<30} {writer_flushes}\n"
+                statistics_message_ui += f"{'Indigo Writer Writes:':<30} {writer_writes}\n"
+                statistics_message_ui += f"{'Indigo Writer Merged Updates:':<30} {writer_merged}\n"
+            if self.globals[SCHEDULER_THREAD] is not None:
+                scheduler_scheduled, scheduler_fired, scheduler_cancelled, scheduler_pending = self.globals[SCHEDULER_THREAD].statistics()
+                statistics_message_ui += f"{'Scheduler Timers:':<30} {scheduler_scheduled} scheduled, {scheduler_fired} fired, {scheduler_cancelled} cancelled [{scheduler_pending} pending]\n"
+            bulk_actions, bulk_devices, bulk_group_commands, bulk_device_commands = self.globals[BULK_ACTION_STATISTICS]
+            statistics_message_ui += f"{'Bulk Actions:':<30} {bulk_actions} [{bulk_devices} devices sent {bulk_group_commands} group and {bulk_device_commands} device commands]\n"
+            statistics_message_ui += f"{'':={'^'}80}\n"
+
+            self.logger.info(statistics_message_ui)
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def display_color_conversion_benchmark(self):
+        try:
+            benchmark_message_ui = "Color Conversion Benchmark:\n"
+            benchmark_message_ui += f"{'':={'^'}80}\n"
+            for label, value in benchmark_color_conversion():
+                benchmark_message_ui += f"{label:<30} {value}\n"
+            benchmark_message_ui += f"{'':={'^'}80}\n"
+
+            self.logger.info(benchmark_message_ui)
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def display_registry_benchmark(self):
+        try:
+            benchmark_message_ui = "Zigbee Registry Layout Benchmark:\n"
+            benchmark_message_ui += f"{'':={'^'}80}\n"
+            for label, value in benchmark_registry_layouts(1000):
+                benchmark_message_ui += f"{label:<30} {value}\n"
+            benchmark_message_ui += f"{'':={'^'}80}\n"
+
+            self.logger.info(benchmark_message_ui)
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
     def exception_handler(self, exception_error_message, log_failing_statement):
         filename, line_number, method, statement = traceback.extract_tb(sys.exc_info()[2])[-1]
         module = filename.split('/')
@@ -445,9 +586,8 @@ class Plugin(indigo.PluginBase):
                             else:
                                 action_ui = "dim"
                         new_brightness_ui = f"{new_brightness}%"
-                        new_brightness_255 = int((new_brightness * 255) / 100)
-                        topic_payload = f'{{"brightness": {new_brightness_255}}}'
-                        self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload)
+                        topic_payload = ZigbeeSetPayload(self.globals[ZIGBEE_SET_TRANSITION]).set_brightness(new_brightness).payload()
+                        self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload, coalesce_attribute="brightness")
 
                         self.logger.info(f"sending \"{action_ui} to {new_brightness_ui}\" to \"{dev.name}\"")
                     case "multiDimmer" | "multiDimmerSecondary2" | "multiDimmerSecondary3":
@@ -459,10 +599,9 @@ class Plugin(indigo.PluginBase):
                             else:
                                 action_ui = "dim"
                         new_brightness_ui = f"{new_brightness}%"
-                        new_brightness_255 = int((new_brightness * 255) / 100)
                         dimmer_number = dev.deviceTypeId[-1]  # Get last character from deviceTypeId i.e. "1", "2" or "3"
-                        topic_payload = f'{{"brightness_l{dimmer_number}": {new_brightness_255}}}'
-                        self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload)
+                        topic_payload = ZigbeeSetPayload(self.globals[ZIGBEE_SET_TRANSITION]).set_brightness(new_brightness, f"brightness_l{dimmer_number}").payload()
+                        self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload, coalesce_attribute=f"brightness_l{dimmer_number}")
 
                         self.logger.info(f"sending \"{action_ui} to {new_brightness_ui}\" to \"{dev.name}\"")
                     case "blind":
@@ -475,7 +614,7 @@ class Plugin(indigo.PluginBase):
                                 action_ui = "close"
                         new_brightness_ui = f"{new_brightness}%"
                         topic_payload = f'{{"position": {new_brightness}}}'
-                        self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload)
+                        self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload, coalesce_attribute="position")
 
                         self.logger.info(f"sending \"{action_ui} to {new_brightness_ui}\" to \"{dev.name}\"")
 
@@ -495,7 +634,7 @@ class Plugin(indigo.PluginBase):
                             new_brightness_ui = f"{new_brightness}%"
 
                             topic_payload = f'{{"brightness": {new_brightness_255}}}'
-                            self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload)
+                            self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload, coalesce_attribute="brightness")
                             self.logger.info(f"sending brighten by {brighten_by_ui} to {new_brightness_ui}\" to \"{dev.name}\"")
                         else:
                             self.logger.info(f"Ignoring brighten request for \"{dev.name}\" as device is already at full brightness")
@@ -510,7 +649,7 @@ class Plugin(indigo.PluginBase):
                             new_brightness_ui = f"{new_brightness}%"
                             dimmer_number = dev.deviceTypeId[-1]  # Get last character from deviceTypeId i.e. "1", "2" or "3"
                             topic_payload = f'{{"brightness_l{dimmer_number}": {new_brightness_255}}}'
-                            self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload)
+                            self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload, coalesce_attribute=f"brightness_l{dimmer_number}")
                             self.logger.info(f"sending brighten by {brighten_by_ui} to {new_brightness_ui}\" to \"{dev.name}\"")
                         else:
                             self.logger.info(f"Ignoring brighten request for \"{dev.name}\" as device is already at full brightness")
@@ -523,7 +662,7 @@ class Plugin(indigo.PluginBase):
                             brighten_by_ui = f"{brighten_by}%"
                             new_brightness_ui = f"{new_brightness}%"
                             topic_payload = f'{{"position": {new_brightness_ui}}}'
-                            self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload)
+                            self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload, coalesce_attribute="position")
                             self.logger.info(f"sending open by {brighten_by_ui} to {new_brightness_ui}\" to \"{dev.name}\"")
                         else:
                             self.logger.info(f"Ignoring Position request for \"{dev.name}\" as device is already fully open")
@@ -548,7 +687,7 @@ class Plugin(indigo.PluginBase):
                                 new_brightness_ui = f"{new_brightness}%"
 
                                 topic_payload = f'{{"brightness": {new_brightness_255}}}'
-                                self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload)
+                                self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload, coalesce_attribute="brightness")
                                 self.logger.info(f"sending \"dim by {dim_by_ui} to {new_brightness_ui}\" to \"{dev.name}\"")
                         else:
                             self.logger.info(f"Ignoring dim request for '{dev.name}'' as device is already Off")
@@ -569,7 +708,7 @@ class Plugin(indigo.PluginBase):
                                 new_brightness_ui = f"{new_brightness}%"
                                 dimmer_number = dev.deviceTypeId[-1]  # Get last character from deviceTypeId i.e. "1", "2" or "3"
                                 topic_payload = f'{{"brightness_l{dimmer_number}": {new_brightness_255}}}'
-                                self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload)
+                                self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload, coalesce_attribute=f"brightness_l{dimmer_number}")
                                 self.logger.info(f"sending \"dim by {dim_by_ui} to {new_brightness_ui}\" to \"{dev.name}\"")
                         else:
                             self.logger.info(f"Ignoring dim request for '{dev.name}'' as device is already Off")
@@ -588,7 +727,7 @@ class Plugin(indigo.PluginBase):
                                 new_brightness_ui = f"{new_brightness}%"
 
                                 topic_payload = f'{{"position": {new_brightness}}}'
-                                self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload)
+                                self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload, coalesce_attribute="position")
                                 self.logger.info(f"sending close by {dim_by_ui} to {new_brightness_ui}\" to \"{dev.name}\"")
                         else:
                             self.logger.info(f"Ignoring Position request for \"{dev.name}\" as device is already fully closed")
@@ -607,19 +746,23 @@ class Plugin(indigo.PluginBase):
         try:
             if self.globals[DEBUG]: self.logger.warning(f"processSetColorLevels ACTION:\n{action} ")
 
+            # All the levels being changed are sent to the Zigbee device in a single command
+            set_payload = ZigbeeSetPayload(self.globals[ZIGBEE_SET_TRANSITION])
             if "redLevel" in action.actionValue and "greenLevel" in action.actionValue and  "blueLevel" in action.actionValue:
                 # RGB colour being changed
-                self.action_control_device_set_color_levels_rgb(action, dev, zigbee_coordinator_ieee, friendly_name, topic)
+                self.action_control_device_set_color_levels_rgb(action, dev, set_payload)
             if "whiteLevel" in action.actionValue:
                 white_level = int(float(action.actionValue["whiteLevel"]))
-                self.action_control_device_set_color_levels_white_level(white_level, dev, zigbee_coordinator_ieee, friendly_name, topic)
+                self.action_control_device_set_color_levels_white_level(white_level, dev, set_payload)
             if "whiteTemperature" in action.actionValue:
                 white_temperature = int(float(action.actionValue["whiteTemperature"]))
-                self.action_control_device_set_color_levels_white_temperature(white_temperature, dev, zigbee_coordinator_ieee, friendly_name, topic)
+                self.action_control_device_set_color_levels_white_temperature(white_temperature, dev, set_payload)
+            if set_payload:
+                self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, set_payload.payload(), coalesce_attribute=set_payload.coalesce_attribute())
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def action_control_device_set_color_levels_rgb(self, action, dev, zigbee_coordinator_ieee, friendly_name, topic):
+    def action_control_device_set_color_levels_rgb(self, action, dev, set_payload):
         try:
             props = dev.pluginProps
             if ("SupportsRGB" in props) and props["SupportsRGB"]:  # Check device supports color
@@ -641,24 +784,22 @@ class Plugin(indigo.PluginBase):
                 blue = int((blue_level * 256.0) / 100.0)
                 blue = 255 if blue > 255 else blue
 
-                topic_payload = f'{{"color":{{"r":{red},"g":{green},"b":{blue}}}}}'
-                self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload)
+                set_payload.set_color_rgb(red, green, blue)
 
-                self.logger.info(f"sent \"{dev.name}\" RGB Levels: Red {int(red_level)}%, Green {int(green_level)}%, Blue {int(blue_level)}%")
+                self.logger.info(f"sending \"{dev.name}\" RGB Levels: Red {int(red_level)}%, Green {int(green_level)}%, Blue {int(blue_level)}%")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def action_control_device_set_color_levels_white_level(self, white_level, dev, zigbee_coordinator_ieee, friendly_name, topic):
+    def action_control_device_set_color_levels_white_level(self, white_level, dev, set_payload):
         try:
             if dev.states["colorMode"] != "color_temp":
-                # To force the Zigbee device into White Temperature [Color Temperature] mode, publish the devices current White Temperature
+                # To force the Zigbee device into White Temperature [Color Temperature] mode, include the devices current White Temperature
+                # (replaced if a White Temperature is also being set)
                 white_temperature = dev.whiteTemperature
                 kelvin = min(ROUNDED_KELVINS, key=lambda x: abs(x - white_temperature))
                 mired = int(1000000 / kelvin)
-                topic_payload = f'{{"color_temp": {mired}}}'
-
-                self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload)
+                set_payload.set_color_temp(mired)
 
             action_ui = "set"
             if white_level > 0:
@@ -667,24 +808,20 @@ class Plugin(indigo.PluginBase):
                 else:
                     action_ui = "dim"
             white_level_ui = f"{white_level}%"
-            white_level_255 = int((white_level * 255) / 100)
-            topic_payload = f'{{"brightness": {white_level_255}}}'
-            self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload)
+            set_payload.set_brightness(white_level)
             self.logger.info(f"sending \"{action_ui} to {white_level_ui}\" to \"{dev.name}\"")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def action_control_device_set_color_levels_white_temperature(self, white_temperature, dev, zigbee_coordinator_ieee, friendly_name, topic):
+    def action_control_device_set_color_levels_white_temperature(self, white_temperature, dev, set_payload):
         try:
             kelvin = min(ROUNDED_KELVINS, key=lambda x: abs(x - white_temperature))
             mired = int(1000000 / kelvin)
             # rgb, kelvin_description = ROUNDED_KELVINS[kelvin]
-            topic_payload = f'{{"color_temp": {mired}}}'
-
-            self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, topic_payload)
+            set_payload.set_color_temp(mired)
 
-            self.logger.info(f"sent \"{dev.name}\" set White Temperature to \"{white_temperature}K\"")
+            self.logger.info(f"sending \"{dev.name}\" set White Temperature to \"{white_temperature}K\"")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
@@ -753,6 +890,10 @@ class Plugin(indigo.PluginBase):
                 self.logger.threaddebug(f"'closedDeviceConfigUi' called with userCancelled = {str(user_cancelled)}")
                 return
 
+            self.globals[INDIGO_DEVICE_CACHE].invalidate(dev_id)
+            if type_id != "zigbeeCoordinator":
+                self.globals[ZD_PIPELINES].pop(dev_id, None)  # Force the processor pipeline to be recompiled with the updated config
+
             if type_id == "zigbeeCoordinator":
                 self.closed_device_config_ui_zigbee_coordinator(values_dict, type_id, dev_id)
             elif type_id == "zigbeeGroupDimmer" or type_id == "zigbeeGroupRelay":
@@ -767,7 +908,7 @@ class Plugin(indigo.PluginBase):
         try:
             with self.globals[LOCK_ZC]:
                 if dev_id not in self.globals[ZC]:
-                    self.globals[ZC][dev_id] = dict()
+                    self.globals[ZC][dev_id] = ZigbeeCoordinatorRecord()
 
             self.globals[ZC][dev_id][MQTT_CLIENT_PREFIX] = values_dict.get("mqttClientPrefix", "indigo_mac")
             self.globals[ZC][dev_id][MQTT_CLIENT_ID] = f"{self.globals[ZC][dev_id][MQTT_CLIENT_PREFIX]}-D{dev_id}"
@@ -802,6 +943,8 @@ class Plugin(indigo.PluginBase):
                         if zigbee_device_ieee in self.globals[ZD][zigbee_coordinator_ieee]:
                             self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_INDIGO_DEVICE_ID] = dev_id
                             self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MESSAGE_COUNT] = 0
+                            with self.globals[LOCK_ZD_LINKED_INDIGO_DEVICES]:
+                                self.globals[ZD_LINKED_INDIGO_DEVICES].setdefault(zigbee_coordinator_ieee, set()).add(zigbee_device_ieee)
 
             match type_id:
                 case "button":
@@ -898,6 +1041,12 @@ class Plugin(indigo.PluginBase):
 
             self.globals[MQTT_SUPPRESS_IEEE_MISSING] = bool(values_dict.get("suppress_ieee_missing", False))
 
+            self.globals[INDIGO_WRITER_FLUSH_INTERVAL] = int(values_dict.get("indigoWriterFlushInterval", 50)) / 1000.0  # Milliseconds -> Seconds
+
+            self.globals[LAST_SEEN_UPDATE_INTERVAL] = int(values_dict.get("lastSeenUpdateInterval", 60))
+
+            self.globals[ZIGBEE_SET_TRANSITION] = float(values_dict.get("setTransition", 0))
+
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
             return True
@@ -935,6 +1084,11 @@ class Plugin(indigo.PluginBase):
                 self.logger.info(f"Start cancelled as '{dev.name}' not enabled")
                 return
 
+            self.globals[ZD_PIPELINES].pop(dev.id, None)  # Processor pipeline is compiled on receipt of the first message after the device starts
+            self.globals[INDIGO_DEVICE_CACHE].invalidate(dev.id)
+            self.globals[INDIGO_STATE_SHADOW].invalidate(dev.id)  # Shadow states are re-seeded from the device on first use
+            self.globals[REPORTING_FILTER].reset(dev.id)
+
             if dev.deviceTypeId == "zigbeeCoordinator":  # Only process if Zigbee Coordinator device
                 self.device_start_comm_zigbee_coordinator(dev)
                 return
@@ -943,7 +1097,7 @@ class Plugin(indigo.PluginBase):
                 zigbee_coordinator_ieee = dev_plugin_props.get("zigbee_coordinator_ieee", "")
                 zigbee_group_friendly_name = dev_plugin_props.get("zigbee_group_friendly_name", "")
                 if zigbee_group_friendly_name not in self.globals[ZG][zigbee_coordinator_ieee]:
-                    self.globals[ZG][zigbee_coordinator_ieee][zigbee_group_friendly_name] = dict()
+                    self.globals[ZG][zigbee_coordinator_ieee][zigbee_group_friendly_name] = ZigbeeGroupRecord()
                 self.globals[ZG][zigbee_coordinator_ieee][zigbee_group_friendly_name][ZG_INDIGO_DEVICE_ID] = dev.id
                 return
 
@@ -962,19 +1116,39 @@ class Plugin(indigo.PluginBase):
             zc_dev_id = zc_dev.id
             with self.globals[LOCK_ZC]:
                 if zc_dev_id not in self.globals[ZC]:
-                    self.globals[ZC][zc_dev_id] = dict()
+                    self.globals[ZC][zc_dev_id] = ZigbeeCoordinatorRecord()
                 if zc_dev.address != "" and zc_dev.address not in self.globals[ZD]:
                     self.globals[ZD][zc_dev.address] = dict()  # Zigbee Devices
                 if zc_dev.address != "" and zc_dev.address not in self.globals[ZG]:
                     self.globals[ZG][zc_dev.address] = dict()  # Zigbee Groups
+                self.globals[ZC][zc_dev_id][ZC_IEEE] = zc_dev.address
+                self.globals[ZC][zc_dev_id][ZC_INDIGO_DEVICE_ID] = zc_dev_id
+                if zc_dev.address != "":
+                    self.globals[ZC_TO_INDIGO_ID][zc_dev.address] = zc_dev_id
+                    self.globals[ZC_IEEE_TO_COORDINATOR][zc_dev.address] = self.globals[ZC][zc_dev_id]
+                self.globals[ZC][zc_dev_id][MQTT_MESSAGES_RECEIVED] = 0
+                self.globals[ZC][zc_dev_id][MQTT_MESSAGES_DROPPED] = dict()  # Keyed on drop reason
+                self.globals[ZC][zc_dev_id][ZC_DEVICES_HASH] = ""  # Force the first bridge devices message to be fully processed
 
             for zigbee_coordinator_ieee in self.globals[ZD]:
                 for zigbee_device_ieee in self.globals[ZD][zigbee_coordinator_ieee]:
                     self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MESSAGE_COUNT] = 0
 
-            # Create Queue
-
-            self.globals[QUEUES][MQTT_ZIGBEE2MQTT_QUEUE][zc_dev_id] = queue.Queue()  # Used to queue MQTT topics for this Zigbee Coordinator
+            # Create Queues - one per Zigbee handler worker
+
+            self.globals[ZC][zc_dev_id][ZH_WORKERS] = max(1, int(zc_dev.pluginProps.get("zigbeeHandlerWorkers", 1)))
+            self.globals[ZC][zc_dev_id][MQTT_COALESCE_MESSAGES] = bool(zc_dev.pluginProps.get("coalesceMqttMessages", False))
+            self.globals[ZC][zc_dev_id][MQTT_PUBLISH_RATE] = float(zc_dev.pluginProps.get("publishRate", 20))
+            self.globals[ZC][zc_dev_id][MQTT_PUBLISH_BURST] = int(zc_dev.pluginProps.get("publishBurst", 10))
+            self.globals[ZC][zc_dev_id][MQTT_GROUP_PUBLISH_RATE] = float(zc_dev.pluginProps.get("groupPublishRate", 1))
+            self.globals[ZC][zc_dev_id][MQTT_GROUP_PUBLISH_BURST] = int(zc_dev.pluginProps.get("groupPublishBurst", 3))
+            self.globals[QUEUES][MQTT_ZIGBEE2MQTT_QUEUE][zc_dev_id] = list()
+            for worker_number in range(self.globals[ZC][zc_dev_id][ZH_WORKERS]):
+                if self.globals[ZC][zc_dev_id][MQTT_COALESCE_MESSAGES]:
+                    self.globals[QUEUES][MQTT_ZIGBEE2MQTT_QUEUE][zc_dev_id].append(ZigbeeCoalescingQueue())  # Used to queue MQTT topics for this Zigbee Coordinator - latest wins per Zigbee device
+                else:
+                    self.globals[QUEUES][MQTT_ZIGBEE2MQTT_QUEUE][zc_dev_id].append(ZigbeePriorityQueue())  # Used to queue MQTT topics for this Zigbee Coordinator
+            self.globals[QUEUES][MQTT_ZIGBEE2MQTT_EXPRESS_QUEUE][zc_dev_id] = ZigbeePriorityQueue()  # Used to queue button / remote action events for the express worker
 
             self.globals[ZC][zc_dev_id][MQTT_CLIENT_PREFIX] = zc_dev.pluginProps.get("mqttClientPrefix", "indigo_mac")
             self.globals[ZC][zc_dev_id][MQTT_CLIENT_ID] = f"{self.globals[ZC][zc_dev_id][MQTT_CLIENT_PREFIX]}-D{zc_dev.id}"
@@ -1023,13 +1197,23 @@ class Plugin(indigo.PluginBase):
             if filtering_required:
                 self.logger.warning(f"{log_message}\n")
 
+            # The MQTT publisher is started first, as commands can be published as soon as the MQTT client connects
+            self.globals[ZC][zc_dev_id][ZP_EVENT] = threading.Event()
+            self.globals[ZC][zc_dev_id][ZP_THREAD] = ThreadZigbeePublisher(self.globals, self.globals[ZC][zc_dev_id][ZP_EVENT], zc_dev_id)
+            self.globals[ZC][zc_dev_id][ZP_THREAD].start()
+
             self.globals[ZC][zc_dev_id][CH_EVENT] = threading.Event()
             self.globals[ZC][zc_dev_id][CH_THREAD] = ThreadCoordinatorHandler(self.globals, self.globals[ZC][zc_dev_id][CH_EVENT], zc_dev_id)
             self.globals[ZC][zc_dev_id][CH_THREAD].start()
 
             self.globals[ZC][zc_dev_id][ZH_EVENT] = threading.Event()
-            self.globals[ZC][zc_dev_id][ZH_THREAD] = ThreadZigbeeHandler(self.globals, self.globals[ZC][zc_dev_id][ZH_EVENT], zc_dev_id)
-            self.globals[ZC][zc_dev_id][ZH_THREAD].start()
+            self.globals[ZC][zc_dev_id][ZH_THREAD] = list()
+            for worker_number in range(self.globals[ZC][zc_dev_id][ZH_WORKERS]):
+                zigbee_handler_thread = ThreadZigbeeHandler(self.globals, self.globals[ZC][zc_dev_id][ZH_EVENT], zc_dev_id, worker_number)
+                zigbee_handler_thread.start()
+                self.globals[ZC][zc_dev_id][ZH_THREAD].append(zigbee_handler_thread)
+            self.globals[ZC][zc_dev_id][ZH_EXPRESS_THREAD] = ThreadZigbeeHandler(self.globals, self.globals[ZC][zc_dev_id][ZH_EVENT], zc_dev_id, ZIGBEE_HANDLER_EXPRESS_WORKER)
+            self.globals[ZC][zc_dev_id][ZH_EXPRESS_THREAD].start()
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
@@ -1161,7 +1345,7 @@ class Plugin(indigo.PluginBase):
             if zigbee_coordinator_ieee not in self.globals[ZD]:
                 self.globals[ZD][zigbee_coordinator_ieee] = dict()  # Zigbee Coordinator
             if zigbee_device_ieee not in self.globals[ZD][zigbee_coordinator_ieee]:
-                self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee] = dict()  # Zigbee device
+                self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee] = ZigbeeDeviceRecord()  # Zigbee device
 
             # TODO: Consider setting image for UI depending on deviceTypeId?
 
@@ -1170,15 +1354,29 @@ class Plugin(indigo.PluginBase):
 
     def deviceDeleted(self, dev):
         try:
+            self.globals[ZD_PIPELINES].pop(dev.id, None)
+            self.globals[INDIGO_DEVICE_CACHE].invalidate(dev.id)
+            self.globals[INDIGO_STATE_SHADOW].invalidate(dev.id)
+            self.globals[REPORTING_FILTER].remove(dev.id)
+            if self.globals[SCHEDULER_THREAD] is not None:
+                self.globals[SCHEDULER_THREAD].cancel_device(dev.id)
+
             match dev.deviceTypeId:
                 case "zigbeeCoordinator":
-                    pass
+                    for zigbee_coordinator_ieee, zc_internal in list(self.globals[ZC_IEEE_TO_COORDINATOR].items()):
+                        if zc_internal.get(ZC_INDIGO_DEVICE_ID, 0) == dev.id:
+                            del self.globals[ZC_IEEE_TO_COORDINATOR][zigbee_coordinator_ieee]
                 case "zigbeeGroupDimmer" | "zigbeeGroupRelay":
                     pass
                 case _:
                     # If a primary device being deleted, zero out the link to the device in the internal store
                     primary_device = dev.pluginProps.get("primaryIndigoDevice", False)
+                    if not primary_device:
+                        linked_primary_dev_id = dev.pluginProps.get("linkedPrimaryIndigoDeviceId", 0)
+                        if self.globals[ZD_SECONDARY_DEVICES].get(linked_primary_dev_id, dict()).get(dev.deviceTypeId, 0) == dev.id:
+                            self.update_secondary_devices_index(linked_primary_dev_id, dev.deviceTypeId, 0)
                     if primary_device:
+                        self.globals[ZD_SECONDARY_DEVICES].pop(dev.id, None)
                         zigbee_coordinator_ieee = dev.pluginProps.get("zigbee_coordinator_ieee", "")
                         zigbee_device_ieee = dev.pluginProps.get("zigbee_device_ieee", "")
                         if ZD in self.globals:
@@ -1186,6 +1384,8 @@ class Plugin(indigo.PluginBase):
                                 if zigbee_device_ieee in self.globals[ZD][zigbee_coordinator_ieee]:
                                     self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_INDIGO_DEVICE_ID] = 0
                                     self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MESSAGE_COUNT] = 0
+                        with self.globals[LOCK_ZD_LINKED_INDIGO_DEVICES]:
+                            self.globals[ZD_LINKED_INDIGO_DEVICES].get(zigbee_coordinator_ieee, set()).discard(zigbee_device_ieee)
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
@@ -1202,6 +1402,14 @@ class Plugin(indigo.PluginBase):
                         # DEBUG self.logger.error("COORDINATOR STOPPED [2]")
                         self.globals[ZC][dev.id][CH_EVENT].set()  # Stop the MQTT Client
                         self.globals[ZC][dev.id][CH_THREAD].join(10.0)  # Allow up to n seconds for MQTT Client thread to stop
+                    if ZP_THREAD in self.globals[ZC][dev.id]:
+                        self.globals[ZC][dev.id][ZP_THREAD].stop()  # Stop the MQTT publisher - commands not yet published are discarded
+                    if ZH_EVENT in self.globals[ZC][dev.id]:
+                        self.globals[ZC][dev.id][ZH_EVENT].set()  # Stop the Zigbee handler workers
+                        for zigbee_queue in self.globals[QUEUES][MQTT_ZIGBEE2MQTT_QUEUE].get(dev.id, list()):
+                            zigbee_queue.put_stop()  # Wake each worker blocked waiting on its queue so that it stops immediately
+                        if dev.id in self.globals[QUEUES][MQTT_ZIGBEE2MQTT_EXPRESS_QUEUE]:
+                            self.globals[QUEUES][MQTT_ZIGBEE2MQTT_EXPRESS_QUEUE][dev.id].put_stop()
                     return
                 case "zigbeeGroupDimmer" | "zigbeeGroupRelay":
                     return
@@ -1216,11 +1424,17 @@ class Plugin(indigo.PluginBase):
     def device_updated(self, origDev, newDev):
         try:
             if origDev.pluginId == "com.autologplugin.indigoplugin.zigbee2mqtt":
+                props_changed = origDev.pluginProps != newDev.pluginProps
+                self.globals[INDIGO_DEVICE_CACHE].refresh(newDev, props_changed)
+                if origDev.id in self.globals[ZD_PIPELINES]:
+                    if origDev.enabled != newDev.enabled or origDev.deviceTypeId != newDev.deviceTypeId or props_changed:
+                        self.globals[ZD_PIPELINES].pop(origDev.id, None)  # Force the processor pipeline to be recompiled
                 if origDev.deviceTypeId == "dimmer":
                     if "whiteLevel" in newDev.states:
                         if newDev.states["whiteLevel"] != newDev.states["brightnessLevel"]:
                             white_level = newDev.states["brightnessLevel"]
                             newDev.updateStateOnServer(key='whiteLevel', value=white_level)
+                            self.globals[INDIGO_STATE_SHADOW].update_state(newDev, "whiteLevel", white_level)
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
@@ -2004,9 +2218,19 @@ class Plugin(indigo.PluginBase):
 
             indigo.devices.subscribeToChanges()
 
+            # Start the Indigo writer before any Zigbee Coordinator (and its Zigbee handlers) is started
+            self.globals[INDIGO_WRITER_EVENT] = threading.Event()
+            self.globals[INDIGO_WRITER_THREAD] = ThreadIndigoWriter(self.globals, self.globals[INDIGO_WRITER_EVENT])
+            self.globals[INDIGO_WRITER_THREAD].start()
+
+            # Start the scheduler (used by the Zigbee handlers for timers) after the Indigo writer that its timers update
+            self.globals[SCHEDULER_EVENT] = threading.Event()
+            self.globals[SCHEDULER_THREAD] = ThreadScheduler(self.globals, self.globals[SCHEDULER_EVENT])
+            self.globals[SCHEDULER_THREAD].start()
+
             for dev in indigo.devices.iter("self"):
                 if dev.deviceTypeId == "zigbeeCoordinator":  # Only process if a Zigbee Coordinator Indigo device
-                    self.globals[ZC][dev.id] = dict()
+                    self.globals[ZC][dev.id] = ZigbeeCoordinatorRecord()
                     self.globals[ZC][dev.id][MQTT_CONNECTED] = False
                     if dev.address != "":
                         self.globals[ZD][dev.address] = dict()
@@ -2025,10 +2249,15 @@ class Plugin(indigo.PluginBase):
                                 self.globals[ZD][zigbee_coordinator_ieee] = dict()
                             if dev.address != "":
                                 if dev.address not in self.globals[ZD][zigbee_coordinator_ieee]:
-                                    self.globals[ZD][zigbee_coordinator_ieee][dev.address] = dict()
+                                    self.globals[ZD][zigbee_coordinator_ieee][dev.address] = ZigbeeDeviceRecord()
                                 self.globals[ZD][zigbee_coordinator_ieee][dev.address][ZD_INDIGO_DEVICE_ID] = dev.id
                                 self.globals[ZD][zigbee_coordinator_ieee][dev.address][ZD_MESSAGE_COUNT] = 0
                                 self.globals[ZD_TO_INDIGO_ID][dev.address] = dev.id  # Zigbee device to primary Indigo device
+                                with self.globals[LOCK_ZD_LINKED_INDIGO_DEVICES]:
+                                    self.globals[ZD_LINKED_INDIGO_DEVICES].setdefault(zigbee_coordinator_ieee, set()).add(dev.address)
+                        self.refresh_secondary_devices_index(dev.id)
+
+            self.globals[STARTUP_TIMINGS][STARTUP_COMPLETE] = time.perf_counter()
 
         except Exception as exception_error:
                 self.exception_handler(exception_error, True)  # Log error and display failing statement
@@ -2036,10 +2265,38 @@ class Plugin(indigo.PluginBase):
     def stop_concurrent_thread(self):
         self.logger.info("Zigbee2mqtt Bridge plugin closing down")
 
+        if self.globals[SCHEDULER_THREAD] is not None:
+            self.globals[SCHEDULER_THREAD].stop()  # Stop the scheduler - pending timers are discarded
+            self.globals[SCHEDULER_THREAD].join(5.0)
+
+        if self.globals[INDIGO_WRITER_EVENT] is not None:
+            self.globals[INDIGO_WRITER_EVENT].set()  # Stop the Indigo writer - it flushes any pending state updates first
+            self.globals[INDIGO_WRITER_THREAD].request_flush()  # Wake it from waiting for the flush interval
+            self.globals[INDIGO_WRITER_THREAD].join(5.0)
+
     def validate_action_config_ui(self, values_dict, type_id, action_id):  # noqa [parameter value is not used]
         try:
             error_dict = indigo.Dict()
 
+            if type_id == "bulkSetDevices":
+                if len(values_dict.get("bulk_device_ids", list())) == 0:
+                    error_dict["bulk_device_ids"] = "Select at least one device"
+                    error_dict["showAlertText"] = "You must select at least one device to set"
+                    return False, values_dict, error_dict
+                if values_dict.get("bulk_target_state", "on") == "brightness":
+                    valid = True
+                    try:
+                        bulk_brightness = int(values_dict["bulk_brightness"])
+                        if bulk_brightness < 0 or bulk_brightness > 100:
+                            valid = False
+                    except ValueError:
+                        valid = False
+                    if not valid:
+                        error_dict["bulk_brightness"] = "Brightness must be an integer between 0 and 100"
+                        error_dict["showAlertText"] = "You must enter an integer between 0 and 100 for Brightness"
+                        return False, values_dict, error_dict
+                return True, values_dict
+
             white_level = -1  # Only needed to suppress a PyCharm warning!
             white_temperature = -1  # Only needed to suppress a PyCharm warning!
 
@@ -2118,6 +2375,34 @@ class Plugin(indigo.PluginBase):
                 error_dict["showAlertText"] = error_message
                 return values_dict, error_dict
 
+            for field_id, field_ui in (("publishRate", "Command Rate"), ("groupPublishRate", "Group Command Rate")):
+                valid = True
+                try:
+                    publish_rate = float(values_dict.get(field_id, 0))
+                    if publish_rate < 0.0 or publish_rate > 1000.0:
+                        valid = False
+                except ValueError:
+                    valid = False
+                if not valid:
+                    error_message = f"{field_ui} must be a number of commands per second between 0 (unlimited) and 1000."
+                    error_dict[field_id] = error_message
+                    error_dict["showAlertText"] = error_message
+                    return values_dict, error_dict
+
+            for field_id, field_ui in (("publishBurst", "Command Burst"), ("groupPublishBurst", "Group Command Burst")):
+                valid = True
+                try:
+                    publish_burst = int(values_dict.get(field_id, 1))
+                    if publish_burst < 1 or publish_burst > 1000:
+                        valid = False
+                except ValueError:
+                    valid = False
+                if not valid:
+                    error_message = f"{field_ui} must be a number of commands between 1 and 1000."
+                    error_dict[field_id] = error_message
+                    error_dict["showAlertText"] = error_message
+                    return values_dict, error_dict
+
             unencrypted_password = values_dict.get("mqtt_password", "")
             if unencrypted_password != "":
                 values_dict["mqtt_password_is_encoded"] = True
@@ -2189,6 +2474,16 @@ class Plugin(indigo.PluginBase):
                 error_dict['zigbee_device_ieee'] = "Unable to save as no Zigbee Coordinator selected"
                 return False, values_dict, error_dict
 
+            if bool(values_dict.get("reportingFilter", False)):
+                for reporting_filter_field in ("reportingFilterDeadbandAbsolute", "reportingFilterDeadbandPercent", "reportingFilterMinimumInterval", "reportingFilterMaximumSilence"):
+                    try:
+                        if float(values_dict.get(reporting_filter_field, "0")) < 0.0:
+                            raise ValueError
+                    except ValueError:
+                        error_dict[reporting_filter_field] = "Must be a number, zero or greater"
+                if len(error_dict) > 0:
+                    return False, values_dict, error_dict
+
             values_dict["address"] = values_dict["zigbee_device_ieee"]
 
             values_dict["SupportsBatteryLevel"] = False
@@ -2491,6 +2786,44 @@ class Plugin(indigo.PluginBase):
 
     def validate_prefs_config_ui(self, values_dict): # noqa [Method is not declared static] 
         try:
+            error_dict = indigo.Dict()
+
+            valid = True
+            try:
+                flush_interval = int(values_dict.get("indigoWriterFlushInterval", 50))
+                if flush_interval < 10 or flush_interval > 1000:
+                    valid = False
+            except ValueError:
+                valid = False
+            if not valid:
+                error_dict["indigoWriterFlushInterval"] = "Flush Interval must be an integer between 10 and 1000"
+                error_dict["showAlertText"] = "You must enter an integer between 10 and 1000 milliseconds for the Indigo Writer Flush Interval"
+                return False, values_dict, error_dict
+
+            valid = True
+            try:
+                last_seen_update_interval = int(values_dict.get("lastSeenUpdateInterval", 60))
+                if last_seen_update_interval < 0 or last_seen_update_interval > 3600:
+                    valid = False
+            except ValueError:
+                valid = False
+            if not valid:
+                error_dict["lastSeenUpdateInterval"] = "Last Seen Update Interval must be an integer between 0 and 3600"
+                error_dict["showAlertText"] = "You must enter an integer between 0 and 3600 seconds for the Last Seen Update Interval"
+                return False, values_dict, error_dict
+
+            valid = True
+            try:
+                set_transition = float(values_dict.get("setTransition", 0))
+                if set_transition < 0.0 or set_transition > 60.0:
+                    valid = False
+            except ValueError:
+                valid = False
+            if not valid:
+                error_dict["setTransition"] = "Transition must be a number between 0 and 60"
+                error_dict["showAlertText"] = "You must enter a number between 0 and 60 seconds for the Transition"
+                return False, values_dict, error_dict
+
             return True, values_dict
 
         except Exception as exception_error:
@@ -2668,6 +3001,20 @@ class Plugin(indigo.PluginBase):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
+    def list_bulk_action_devices(self, filter="", values_dict=None, type_id="", target_id=0):  # noqa [parameter value is not used]
+        try:
+            # This method lists the relay and dimmer devices (of any plugin) that can be set by the Bulk Set Devices action
+
+            action_devices_list = list()
+            for dev in indigo.devices:
+                if isinstance(dev, (indigo.DimmerDevice, indigo.RelayDevice)):
+                    action_devices_list.append((dev.id, dev.name))
+
+            return sorted(action_devices_list, key=lambda name: name[1].lower())
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
     def list_zigbee_coordinator_devices(self, filter="", values_dict=None, type_id="", target_id=0):  # noqa [parameter value is not used]
         try:
             # This method lists the zigbee devices joined to a Coordinator
@@ -2748,17 +3095,17 @@ class Plugin(indigo.PluginBase):
     
 '''
                 xml_insert = f"{xml_insert}{xml_zigebee_properties}"
-                if ZD_EXPOSES not in self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee]:
+                if ZD_MODEL_DEFINITION not in self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee]:
                     continue
-                special_properties = ["device_temperature", "illuminance_lux"]  # List of handled properties with special processing
-                for zigbee_device_property in self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_EXPOSES]:
+                model_definition = self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MODEL_DEFINITION]
+                for zigbee_device_property in model_definition[ZM_EXPOSES]:
                     if "features" in zigbee_device_property:
                         # endpoint = zigbee_device_property.get("endpoint", "")
                         # endpoint = f" [{endpoint}]" if endpoint != "" else "xyz"
                         for zigbee_device_features_property in zigbee_device_property["features"]:
                             if "property" in zigbee_device_features_property:
                                 property_to_display = f"{zigbee_device_features_property['property']}"
-                                if property_to_display not in ZD_PROPERTIES_SUPPORTED_BY_DEVICE_TYPES and property_to_display not in special_properties:
+                                if property_to_display in model_definition[ZM_UNSUPPORTED_PROPERTIES]:
                                     property_to_display = f"{property_to_display} [Not supported by Plugin]"
                                     font_color = "red"
                                 else:
@@ -2781,7 +3128,7 @@ class Plugin(indigo.PluginBase):
 
                     elif "property" in zigbee_device_property:
                         property_to_display = f"{zigbee_device_property['property']}"
-                        if (property_to_display not in ZD_PROPERTIES_SUPPORTED_BY_DEVICE_TYPES) and (property_to_display not in special_properties):
+                        if property_to_display in model_definition[ZM_UNSUPPORTED_PROPERTIES]:
                             property_to_display = f"{property_to_display} [Not supported by Plugin]"
                             font_color = "red"
                         else:
@@ -3094,7 +3441,7 @@ class Plugin(indigo.PluginBase):
             dev = indigo.devices[dev_id]
 
             # loop down the list of properties for this device stored from interogating the Coordinator
-            for zigbee_device_property in self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_PROPERTIES]:
+            for zigbee_device_property in self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MODEL_DEFINITION][ZM_PROPERTIES]:
 
                 match zigbee_device_property:
                     case "acceleration":
@@ -3473,7 +3820,7 @@ class Plugin(indigo.PluginBase):
             if zigbee_device_ieee == "-SELECT-" or zigbee_device_ieee == "-NONE-":
                 return zigbee_device_properties_list
 
-            for zigbee_device_property in self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_EXPOSES]:
+            for zigbee_device_property in self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MODEL_DEFINITION][ZM_EXPOSES]:
                 if "property" in zigbee_device_property:
                     zigbee_device_properties_list.append((zigbee_device_property['property'], zigbee_device_property['property']))
 
@@ -3643,14 +3990,119 @@ class Plugin(indigo.PluginBase):
             # Set default topic
             topic = f"{self.globals[ZC][zc_dev_id][MQTT_ROOT_TOPIC]}/{friendly_name}/set"
 
-            new_action = dict()
-            new_action["actionValue"] = dict()
+            set_payload = ZigbeeSetPayload(self.globals[ZIGBEE_SET_TRANSITION])
             if action.props["setWhiteLevel"]:
                 white_level = int(action.props["whiteLevel"])
-                self.action_control_device_set_color_levels_white_level(white_level, dev, zigbee_coordinator_ieee, friendly_name, topic)
+                self.action_control_device_set_color_levels_white_level(white_level, dev, set_payload)
             if action.props["setWhiteTemperature"]:
                 white_temperature = int(action.props["whiteTemperature"])
-                self.action_control_device_set_color_levels_white_temperature(white_temperature, dev, zigbee_coordinator_ieee, friendly_name, topic)
+                self.action_control_device_set_color_levels_white_temperature(white_temperature, dev, set_payload)
+            if set_payload:
+                self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, topic, set_payload.payload())
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def bulk_set_devices(self, action, dev=None):  # noqa [parameter value is not used]
+        # Sets a list of devices on, off or to a brightness with as few MQTT commands as possible: the plugin's Zigbee
+        # dimmers and outlets are covered by Zigbee group commands where the Zigbee groups allow (see greedy_group_cover)
+        # and sent individual commands otherwise, so that they switch together. Other relay and dimmer devices are set
+        # via Indigo. Other plugins can call it with e.g.:
+        #   indigo.server.getPlugin("com.autologplugin.indigoplugin.zigbee2mqtt").executeAction("bulkSetDevices",
+        #       props={"bulk_device_ids": [123, 456], "bulk_target_state": "brightness", "bulk_brightness": 50})
+        try:
+            target_state = action.props.get("bulk_target_state", "on")
+            brightness = 0
+            if target_state == "brightness":
+                try:
+                    brightness = int(action.props.get("bulk_brightness", 100))
+                except (TypeError, ValueError):
+                    brightness = -1
+                if brightness < 0 or brightness > 100:
+                    self.logger.warning(f"Unable to perform '{action.description}' action as brightness '{action.props.get('bulk_brightness', '')}' is not an integer between 0 and 100.")
+                    return
+                action_ui = f"set brightness to {brightness}%"
+            elif target_state in ("on", "off"):
+                action_ui = f"turn {target_state}"
+            else:
+                self.logger.warning(f"Unable to perform '{action.description}' action as target state '{target_state}' is not one of 'on', 'off' or 'brightness'.")
+                return
+            turn_on = target_state == "on" or brightness > 0  # For devices that can't be set to a brightness
+
+            zigbee_targets = dict()  # (Zigbee Coordinator ieee, payload, coalesce attribute) -> set of Zigbee device ieees
+            multiple_endpoint_ieees = set()  # Zigbee devices that are never covered by a group command
+            indigo_dev_ids = list()  # Devices set via Indigo
+            for dev_id in action.props.get("bulk_device_ids", list()):
+                try:
+                    dev_id = int(dev_id)
+                except (TypeError, ValueError):
+                    dev_id = 0
+                if dev_id not in indigo.devices:
+                    self.logger.warning(f"Ignoring device id '{dev_id}' in '{action.description}' action as it is not an Indigo device.")
+                    continue
+                bulk_dev = indigo.devices[dev_id]
+                if not bulk_dev.enabled or not isinstance(bulk_dev, (indigo.DimmerDevice, indigo.RelayDevice)):
+                    continue
+                bulk_dev_props = bulk_dev.pluginProps
+                zigbee_coordinator_ieee = bulk_dev_props.get("zigbee_coordinator_ieee", "")
+                zigbee_device_ieee = bulk_dev_props.get("zigbee_device_ieee", "")
+                if (bulk_dev.pluginId != self.pluginId or bulk_dev.deviceTypeId not in ("dimmer", "outlet")
+                        or zigbee_device_ieee not in self.globals[ZD].get(zigbee_coordinator_ieee, dict())):
+                    indigo_dev_ids.append(dev_id)
+                    continue
+                zd_internal = self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee]
+                if zd_internal.get(ZD_FRIENDLY_NAME, None) is None:
+                    self.logger.warning(f"Ignoring '{bulk_dev.name}' in '{action.description}' action as its Zigbee device hasn't been reported by the Zigbee Coordinator yet.")
+                    continue
+                model_definition = zd_internal.get(ZD_MODEL_DEFINITION, None)
+                if model_definition is not None and has_multiple_endpoints(model_definition.get(ZM_EXPOSES, list())):
+                    multiple_endpoint_ieees.add(zigbee_device_ieee)
+                if target_state == "brightness" and bulk_dev.deviceTypeId == "dimmer":
+                    zigbee_target = (zigbee_coordinator_ieee, ZigbeeSetPayload(self.globals[ZIGBEE_SET_TRANSITION]).set_brightness(brightness).payload(), "brightness")
+                else:
+                    zigbee_target = (zigbee_coordinator_ieee, ZigbeeSetPayload().set("state", "ON" if turn_on else "OFF").payload(), None)
+                zigbee_targets.setdefault(zigbee_target, set()).add(zigbee_device_ieee)
+
+            group_commands = 0
+            device_commands = 0
+            group_members = dict()  # Zigbee Coordinator ieee -> Zigbee group friendly name -> set of members (ieee, endpoint)
+            for (zigbee_coordinator_ieee, topic_payload, coalesce_attribute), zigbee_device_ieees in zigbee_targets.items():
+                zc_dev_id = self.globals[ZC_TO_INDIGO_ID].get(zigbee_coordinator_ieee, 0)
+                if zc_dev_id not in self.globals[ZC]:
+                    self.logger.warning(f"Unable to perform '{action.description}' action for {len(zigbee_device_ieees)} devices as Zigbee Coordinator '{zigbee_coordinator_ieee}' is not known.")
+                    continue
+                mqtt_root_topic = self.globals[ZC][zc_dev_id][MQTT_ROOT_TOPIC]
+                if zigbee_coordinator_ieee not in group_members:
+                    group_members[zigbee_coordinator_ieee] = zigbee_group_members(self.globals[ZG].get(zigbee_coordinator_ieee, dict()))
+                device_members = zigbee_device_members(zigbee_device_ieees, group_members[zigbee_coordinator_ieee], multiple_endpoint_ieees)
+                zigbee_groups, uncovered_members = greedy_group_cover(device_members, group_members[zigbee_coordinator_ieee])
+                zigbee_device_ieees = {zigbee_device_ieee for zigbee_device_ieee, _ in uncovered_members}
+                for friendly_name in zigbee_groups:
+                    self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, f"{mqtt_root_topic}/{friendly_name}/set", topic_payload, coalesce_attribute)
+                for zigbee_device_ieee in sorted(zigbee_device_ieees):
+                    friendly_name = self.globals[ZD].get(zigbee_coordinator_ieee, dict()).get(zigbee_device_ieee, dict()).get(ZD_FRIENDLY_NAME, None)
+                    if friendly_name is None:
+                        self.logger.warning(f"Unable to send '{action.description}' action to Zigbee device '{zigbee_device_ieee}' as it is no longer known to the Zigbee Coordinator.")
+                        continue
+                    self.publish_zigbee_topic(zigbee_coordinator_ieee, friendly_name, f"{mqtt_root_topic}/{friendly_name}/set", topic_payload, coalesce_attribute)
+                    device_commands += 1
+                group_commands += len(zigbee_groups)
+
+            for dev_id in indigo_dev_ids:
+                if target_state == "brightness" and isinstance(indigo.devices[dev_id], indigo.DimmerDevice):
+                    indigo.dimmer.setBrightness(dev_id, value=brightness)
+                elif turn_on:
+                    indigo.device.turnOn(dev_id)
+                else:
+                    indigo.device.turnOff(dev_id)
+
+            zigbee_devices = sum(len(zigbee_device_ieees) for zigbee_device_ieees in zigbee_targets.values())
+            self.logger.info(f"sending \"{action_ui}\" to {zigbee_devices + len(indigo_dev_ids)} devices [{group_commands} Zigbee group and {device_commands} Zigbee device commands, {len(indigo_dev_ids)} other devices]")
+            bulk_action_statistics = self.globals[BULK_ACTION_STATISTICS]
+            bulk_action_statistics[0] += 1
+            bulk_action_statistics[1] += zigbee_devices + len(indigo_dev_ids)
+            bulk_action_statistics[2] += group_commands
+            bulk_action_statistics[3] += device_commands
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
@@ -3665,14 +4117,7 @@ class Plugin(indigo.PluginBase):
                 # TODO: Unsupported Indigo device type
                 return
 
-            existing_secondary_dev_id_list = indigo.device.getGroupList(primary_dev_id)
-            existing_secondary_dev_id_list.remove(primary_dev_id)  # Remove Primary device from list
-
-            # At this point we have a list of secondary devices
-
-            existing_secondary_devices = dict()
-            for existing_secondary_dev_id in existing_secondary_dev_id_list:
-                existing_secondary_devices[indigo.devices[existing_secondary_dev_id].deviceTypeId] = existing_secondary_dev_id
+            existing_secondary_devices = dict(self.refresh_secondary_devices_index(primary_dev_id))
 
                 # existing_secondary_devices["uspStateL1Indigo"] = 123
                 # existing_secondary_devices["uspStateL2Indigo"] = 456
@@ -3713,6 +4158,35 @@ class Plugin(indigo.PluginBase):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
+    def refresh_secondary_devices_index(self, primary_dev_id):
+        # Rebuild the primary device's entry in the secondary devices index from its Indigo device group.
+        # This (and the config UI) is the only place that should call indigo.device.getGroupList - message processing uses the index.
+        try:
+            secondary_devices = dict()
+            for grouped_dev_id in indigo.device.getGroupList(primary_dev_id):
+                if grouped_dev_id != primary_dev_id:
+                    secondary_devices[indigo.devices[grouped_dev_id].deviceTypeId] = grouped_dev_id
+            self.globals[ZD_SECONDARY_DEVICES][primary_dev_id] = secondary_devices
+            return secondary_devices
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+            return dict()
+
+    def update_secondary_devices_index(self, primary_dev_id, secondary_device_type_id, secondary_dev_id):
+        # Add (or remove if secondary_dev_id is zero) a secondary device in the index.
+        # The primary device's entry is replaced rather than updated so that Zigbee handler threads never see a partially updated dict.
+        try:
+            secondary_devices = dict(self.globals[ZD_SECONDARY_DEVICES].get(primary_dev_id, dict()))
+            if secondary_dev_id == 0:
+                secondary_devices.pop(secondary_device_type_id, None)
+            else:
+                secondary_devices[secondary_device_type_id] = secondary_dev_id
+            self.globals[ZD_SECONDARY_DEVICES][primary_dev_id] = secondary_devices
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
     def process_secondary_devices_remove_existing(self, primary_dev, zigbee_coordinator_ieee, existing_secondary_devices, secondary_device_type_id):
         try:
             # At this point the property is not required or
@@ -3725,6 +4199,7 @@ class Plugin(indigo.PluginBase):
                 indigo.device.ungroupDevice(secondary_dev)
                 secondary_dev.refreshFromServer()
                 primary_dev.refreshFromServer()
+                self.update_secondary_devices_index(primary_dev.id, secondary_device_type_id, 0)
 
                 secondary_dev_props = secondary_dev.ownerProps
                 secondary_dev_props["member_of_device_group"] = False  # Reset to False as no longer a member of a device group
@@ -3838,6 +4313,7 @@ class Plugin(indigo.PluginBase):
                 # Manually need to set the model and subModel names (for UI only)
                 secondary_dev_id = secondary_dev.id
                 secondary_dev = indigo.devices[secondary_dev_id]  # Refresh Indigo Device to ensure groupWith Device isn't removed
+                self.update_secondary_devices_index(primary_dev.id, secondary_device_type_id, secondary_dev_id)
 
                 match secondary_device_type_id:
                     case "accelerationSensorSecondary":
@@ -3935,24 +4411,30 @@ class Plugin(indigo.PluginBase):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def publish_zigbee_topic(self, zigbee_coordinator_ieee, friendly_name, topic, payload):
+    def publish_zigbee_topic(self, zigbee_coordinator_ieee, friendly_name, topic, payload, coalesce_attribute=None):
+        # coalesce_attribute is the level (or levels) set by the command (e.g. "brightness") if a later command setting the
+        # same levels can replace it before it is published - None for discrete commands (e.g. on / off / toggle)
         try:
-            # TODO: Check if self.globals[ZC][MQTT_CONNECTED]
+            zc_internal = self.globals[ZC_IEEE_TO_COORDINATOR].get(zigbee_coordinator_ieee, None)
+            if zc_internal is None:
+                self.logger.warning(f"Unable to publish MQTT topic '{topic}' as Zigbee Coordinator '{zigbee_coordinator_ieee}' is not known")
+                return
 
-            published = False
-            for zc_dev_id, zc_dev_details in self.globals[ZC].items():
-                # self.globals[ZC][coordinator_dev.id][ZC_IEEE]
-                zc_dev = indigo.devices[zc_dev_id]
-                if zc_dev.address == zigbee_coordinator_ieee:
-                    # if self.globals[ZC][mqtt_broker_device_id][MQTT_PUBLISH_TO_HOMIE]:
-                    # topic = "zigbee2mqtt/Outlet 1/set"
-                    self.globals[ZC][zc_dev_id][MQTT_CLIENT].publish(topic, payload)
-                    published = True
-                    # if self.globals[DEBUG]:
+            zc_dev = self.globals[INDIGO_DEVICE_CACHE].device(zc_internal.indigo_device_id)
+            if not zc_internal.get(MQTT_CONNECTED, False):
+                self.logger.warning(f"Unable to publish MQTT topic '{topic}' as Zigbee Coordinator '{zc_dev.name}' is not connected to its MQTT Broker")
+                return
+
+            zp_thread = zc_internal.get(ZP_THREAD, None)
+            if zp_thread is None or zp_thread.threadStop.is_set() or not zp_thread.is_alive():
+                self.logger.warning(f"Unable to publish MQTT topic '{topic}' as the MQTT publisher of Zigbee Coordinator '{zc_dev.name}' is not running")
+                return
+
+            group = friendly_name in self.globals[ZG].get(zigbee_coordinator_ieee, dict())  # Commands to Zigbee groups have their own pacing budget
+            zp_thread.publish(topic, payload, None if coalesce_attribute is None else (topic, coalesce_attribute), group)
+
+            self.mqtt_filter_log_processing(zc_dev.name, zigbee_coordinator_ieee, friendly_name, topic, payload)
 
-            if published:
-                self.mqtt_filter_log_processing(zc_dev.name, zigbee_coordinator_ieee, friendly_name, topic, payload)  # noqa
-                
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
@@ -0,0 +1,135 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Zigbee2mqtt - Plugin © Autolog 2023
+#
+
+import heapq
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from constants import *
+
+
+# noinspection PyPep8Naming
+class ThreadScheduler(threading.Thread):
+
+    # This class is the plugin's single timer thread, used instead of a threading.Timer (and so a thread) per timer.
+    #
+    # Timers are held in a heap ordered on when they are due and are identified by a key (e.g. ("idle", Indigo device
+    # id)) so that they can be cancelled or rescheduled. Scheduling a key that already has a timer pending replaces it,
+    # so e.g. repeated button presses just push back the reset to idle. Cancelled and replaced timers are left in the
+    # heap and skipped when they become due.
+    #
+    # Callbacks are invoked on the scheduler thread, so must be short (e.g. queue updates for the Indigo writer).
+
+    def __init__(self, pluginGlobals, event):
+        try:
+            threading.Thread.__init__(self)
+
+            self.globals = pluginGlobals
+
+            self.condition = threading.Condition()
+            self.heap = list()  # [due time, sequence, key, callback, parameters]
+            self.pending = dict()  # Key -> heap entry that is live for the key
+            self.sequence = 0
+
+            self.scheduled = 0
+            self.fired = 0
+            self.cancelled = 0
+
+            self.schedulerLogger = logging.getLogger("Plugin.Zigbee")
+
+            self.threadStop = event
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def exception_handler(self, exception_error_message, log_failing_statement):
+        filename, line_number, method, statement = traceback.extract_tb(sys.exc_info()[2])[-1]  # noqa [Ignore duplicate code warning]
+        module = filename.split('/')
+        log_message = f"'{exception_error_message}' in module '{module[-1]}', method '{method} [{self.globals[PLUGIN_INFO][PLUGIN_VERSION]}]'"
+        if log_failing_statement:
+            log_message = log_message + f"\n   Failing statement [line {line_number}]: '{statement}'"
+        else:
+            log_message = log_message + f" at line {line_number}"
+        self.schedulerLogger.error(log_message)
+
+    def run(self):
+        try:
+            while not self.threadStop.is_set():
+                with self.condition:
+                    entry = None
+                    while entry is None and not self.threadStop.is_set():
+                        if not self.heap:
+                            self.condition.wait()
+                            continue
+                        due_time, _, key, _, _ = self.heap[0]
+                        if self.pending.get(key, None) is not self.heap[0]:
+                            heapq.heappop(self.heap)  # Cancelled or replaced
+                            continue
+                        delay = due_time - time.monotonic()
+                        if delay > 0.0:
+                            self.condition.wait(delay)
+                            continue
+                        entry = heapq.heappop(self.heap)
+                        del self.pending[key]
+                        self.fired += 1
+                if entry is not None:
+                    _, _, _, callback, parameters = entry
+                    try:
+                        callback(parameters)
+                    except Exception as exception_error:
+                        self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def stop(self):
+        self.threadStop.set()
+        with self.condition:
+            self.condition.notify()
+
+    def schedule(self, key, delay, callback, parameters=None):
+        # Invoke callback(parameters) in delay seconds, replacing any timer already pending for the key
+        with self.condition:
+            self.sequence += 1
+            entry = [time.monotonic() + delay, self.sequence, key, callback, parameters]
+            if key in self.pending:
+                self.cancelled += 1
+            self.pending[key] = entry
+            heapq.heappush(self.heap, entry)
+            self.scheduled += 1
+            if self.heap[0] is entry:
+                self.condition.notify()  # New earliest timer
+
+    def reschedule(self, key, delay):
+        # Move the timer pending for the key to delay seconds from now - returns False if there is no timer pending
+        with self.condition:  # Held throughout (the condition's lock is re-entrant) so that the timer can't fire or be cancelled in between
+            entry = self.pending.get(key, None)
+            if entry is None:
+                return False
+            self.schedule(key, delay, entry[3], entry[4])
+            return True
+
+    def cancel(self, key):
+        # Returns True if a timer was pending for the key
+        with self.condition:
+            if self.pending.pop(key, None) is None:
+                return False
+            self.cancelled += 1
+            return True
+
+    def cancel_device(self, dev_id):
+        # Cancel all timers for the Indigo device (keys of the form (timer type, Indigo device id))
+        with self.condition:
+            for key in [key for key in self.pending if isinstance(key, tuple) and key[-1] == dev_id]:
+                del self.pending[key]
+                self.cancelled += 1
+
+    def statistics(self):
+        with self.condition:
+            return self.scheduled, self.fired, self.cancelled, len(self.pending)
@@ -0,0 +1,152 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Zigbee2mqtt - Plugin © Autolog 2023
+#
+
+import threading
+import time
+
+from constants import *
+
+
+# noinspection PyPep8Naming
+class ReportingFilter:
+
+    # This class is the deadband / hysteresis filter for numeric sensor states (temperature, humidity, pressure,
+    # illuminance, voltage, link quality, battery, power and energy), shared by the Zigbee handler threads.
+    #
+    # A changed value is only written to the Indigo state if it differs from the last value written by at least the
+    # deadband (the larger of the absolute deadband and the percentage of the last value written) and at least the
+    # minimum interval has passed since the last write. A changed value within the deadband is still written once the
+    # maximum silence has passed since the last write, so that the state doesn't drift away from the sensor for ever.
+    #
+    # A suppressed value isn't lost if the sensor then goes quiet: the latest suppressed value of a state is written by
+    # the plugin scheduler once the minimum interval (or, for a value within the deadband, the maximum silence) has
+    # passed since the last write, unless a later value is received first.
+    #
+    # The Zigbee handler calls report() for each value received (so that a later value always replaces or cancels a
+    # suppressed one) and written() for each value it then queues to be written, from which the filter is measured.
+    #
+    # The filter settings are configured per Indigo device (see the "Reporting Filter" device config) and apply to all
+    # of the device's numeric states, including those on its secondary devices. A setting of zero disables that check.
+
+    def __init__(self, pluginGlobals):
+        self.globals = pluginGlobals
+        self.lock = threading.Lock()
+        self.settings = dict()  # Indigo device id -> (absolute deadband, percent deadband, minimum interval, maximum silence)
+        self.last_reported = dict()  # (Indigo device id, Indigo device id to update, state) -> (value, time written)
+        self.trailing = dict()  # (Indigo device id, Indigo device id to update, state) -> key value entry of the latest suppressed value
+        self.passed = 0
+        self.suppressed = 0
+
+    def configure(self, dev_id, props):
+        # Set (or clear) the filter settings for the Indigo device from its pluginProps
+        settings = None
+        if bool(props.get("reportingFilter", False)):
+            try:
+                settings = (abs(float(props.get("reportingFilterDeadbandAbsolute", 0.0))),
+                            abs(float(props.get("reportingFilterDeadbandPercent", 0.0))),
+                            abs(float(props.get("reportingFilterMinimumInterval", 0.0))),
+                            abs(float(props.get("reportingFilterMaximumSilence", 0.0))))
+            except ValueError:
+                settings = None
+        with self.lock:
+            if settings is None or settings == (0.0, 0.0, 0.0, 0.0):
+                self.settings.pop(dev_id, None)
+            else:
+                self.settings[dev_id] = settings
+
+    def report(self, dev_id, dev_id_to_update, state_key, value, key_value=None):
+        # Returns True if the value of the state may be written to Indigo - written() must then be called if it is
+        # queued to be written. key_value is the Indigo state update (e.g. with its uiValue) to write later if the value
+        # is suppressed.
+        with self.lock:
+            settings = self.settings.get(dev_id, None)
+            if settings is None:
+                return True
+            absolute_deadband, percent_deadband, minimum_interval, maximum_silence = settings
+            now = time.monotonic()
+            key = (dev_id, dev_id_to_update, state_key)
+            last_value, last_time = self.last_reported.get(key, (None, 0.0))
+            if last_value is not None:
+                if value == last_value:
+                    self.cancel_trailing(key)  # Back to the value written - a suppressed value mustn't be written over it
+                    return True
+                elapsed = now - last_time
+                if minimum_interval > 0.0 and elapsed < minimum_interval:
+                    self.suppress(key, value, key_value, last_time + minimum_interval - now)
+                    return False
+                if maximum_silence <= 0.0 or elapsed < maximum_silence:
+                    try:
+                        deadband = max(absolute_deadband, abs(float(last_value)) * percent_deadband / 100.0)
+                        if abs(float(value) - float(last_value)) < deadband:
+                            self.suppress(key, value, key_value, None if maximum_silence <= 0.0 else last_time + maximum_silence - now)
+                            return False
+                    except (TypeError, ValueError):
+                        pass  # Not numeric - always report a change
+            self.cancel_trailing(key)  # Superseded by this value
+            return True
+
+    def written(self, dev_id, dev_id_to_update, state_key, value):
+        # Records a value queued to be written to Indigo (including one forced by the power reporting hysteresis) so
+        # that the deadband and minimum interval are measured from it
+        with self.lock:
+            if dev_id not in self.settings:
+                return
+            key = (dev_id, dev_id_to_update, state_key)
+            self.last_reported[key] = (value, time.monotonic())
+            self.cancel_trailing(key)
+            self.passed += 1
+
+    def suppress(self, key, value, key_value, delay):
+        # Must be called with the lock held - holds the suppressed value to be written in delay seconds (None if it is
+        # only to be written by a later report)
+        self.suppressed += 1
+        if delay is None:
+            self.cancel_trailing(key)
+            return
+        self.trailing[key] = key_value if key_value is not None else {'key': key[2], 'value': value}
+        scheduler = self.globals[SCHEDULER_THREAD]
+        if scheduler is not None:
+            scheduler.schedule(("reporting_filter", key[1], key[2], key[0]), max(0.0, delay), self.write_trailing, key)
+
+    def cancel_trailing(self, key):
+        # Must be called with the lock held
+        if self.trailing.pop(key, None) is not None and self.globals[SCHEDULER_THREAD] is not None:
+            self.globals[SCHEDULER_THREAD].cancel(("reporting_filter", key[1], key[2], key[0]))
+
+    def write_trailing(self, key):
+        # Scheduler callback - writes the latest suppressed value of the state (via the Indigo writer) as no later value
+        # has been received since it was suppressed
+        with self.lock:
+            key_value = self.trailing.pop(key, None)
+            if key_value is None or key[0] not in self.settings:
+                return
+            self.last_reported[key] = (key_value["value"], time.monotonic())
+            self.passed += 1
+        device_cache = self.globals[INDIGO_DEVICE_CACHE]
+        if not device_cache.exists(key[1]):
+            return
+        dev = device_cache.device(key[1])
+        if dev.enabled:
+            key_value_list = self.globals[INDIGO_STATE_SHADOW].changed_states(dev, [key_value])
+            if len(key_value_list) > 0:
+                self.globals[INDIGO_WRITER_THREAD].update_states(dev.id, key_value_list)
+
+    def reset(self, dev_id):
+        # Forget the values written for the Indigo device (e.g. on device start or a config change)
+        with self.lock:
+            for key in [key for key in self.last_reported if key[0] == dev_id or key[1] == dev_id]:
+                del self.last_reported[key]
+            for key in [key for key in self.trailing if key[0] == dev_id or key[1] == dev_id]:
+                self.cancel_trailing(key)
+
+    def remove(self, dev_id):
+        with self.lock:
+            self.settings.pop(dev_id, None)
+        self.reset(dev_id)
+
+    def statistics(self):
+        with self.lock:
+            return self.passed, self.suppressed, len(self.settings)
@@ -0,0 +1,73 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Zigbee2mqtt - Plugin © Autolog 2023
+#
+
+from constants import *
+
+
+def zigbee_group_members(zigbee_groups):
+    # Returns the members (set of (Zigbee device ieee, endpoint)) of each Zigbee group of a Zigbee Coordinator, from
+    # self.globals[ZG][Zigbee Coordinator Address] - groups with no members reported yet are omitted
+
+    group_members = dict()
+    for group_friendly_name, zigbee_group in zigbee_groups.items():
+        members = zigbee_group.get(ZG_MEMBERS, None)
+        if members:
+            group_members[group_friendly_name] = {(member["ieee_address"], member.get("endpoint", None)) for member in members if "ieee_address" in member}
+    return group_members
+
+
+def has_multiple_endpoints(exposes):
+    # Returns True if the Zigbee device's exposes (from its model definition) have features on more than one endpoint
+    # (e.g. a multi-gang outlet), in which case a group containing some of its endpoints doesn't reach the whole device
+
+    for expose in exposes:
+        if "endpoint" in expose or any("endpoint" in feature for feature in expose.get("features", list())):
+            return True
+    return False
+
+
+def zigbee_device_members(zigbee_device_ieees, group_members, multiple_endpoint_ieees):
+    # Returns the group members (set of (ieee, endpoint)) that must all receive a command for it to reach the Zigbee
+    # devices: every endpoint of a device found in the groups. A device that is in no group, or has multiple endpoints,
+    # is given a member (ieee, None) that no group has, so that it is always sent the command individually.
+
+    endpoints = dict()  # Zigbee device ieee -> set of endpoints in the groups
+    for members in group_members.values():
+        for zigbee_device_ieee, endpoint in members:
+            if zigbee_device_ieee in zigbee_device_ieees:
+                endpoints.setdefault(zigbee_device_ieee, set()).add(endpoint)
+    device_members = set()
+    for zigbee_device_ieee in zigbee_device_ieees:
+        if zigbee_device_ieee in multiple_endpoint_ieees or zigbee_device_ieee not in endpoints:
+            device_members.add((zigbee_device_ieee, None))
+        else:
+            device_members.update((zigbee_device_ieee, endpoint) for endpoint in endpoints[zigbee_device_ieee])
+    return device_members
+
+
+def greedy_group_cover(targets, group_members):
+    # Works out the Zigbee groups to send a command to, so that all the target group members (set of (ieee, endpoint),
+    # see zigbee_device_members) receive it in as few MQTT commands as possible. Returns (list of Zigbee group friendly
+    # names, set of members not covered by a group whose devices must be sent the command individually).
+    #
+    # Only groups whose members are all targets can be used, as every member of a group receives its commands. Of
+    # these, the group covering the most targets not yet covered is taken until no group covers at least two of them
+    # (a group command to a single device saves nothing and is paced more slowly than a device command). Members
+    # covered by more than one chosen group receive the same command more than once, which is harmless. Greedy
+    # selection isn't guaranteed to find the smallest cover but is within a small factor of it and is fast.
+
+    candidates = {group_friendly_name: members for group_friendly_name, members in group_members.items() if len(members) > 1 and members <= targets}
+    uncovered = set(targets)
+    groups = list()
+    while candidates and len(uncovered) > 1:
+        # Most targets covered, then fewest members already covered, then name (so that the cover is repeatable)
+        group_friendly_name = min(candidates, key=lambda name: (-len(candidates[name] & uncovered), len(candidates[name]), name))
+        members = candidates.pop(group_friendly_name)
+        if len(members & uncovered) < 2:
+            break
+        groups.append(group_friendly_name)
+        uncovered -= members
+    return groups, uncovered
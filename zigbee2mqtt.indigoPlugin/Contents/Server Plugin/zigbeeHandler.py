@@ -4,26 +4,32 @@
 # Zigbee2mqtt - Plugin © Autolog 2023
 #
 
-try:
-    from colormath.color_objects import XYZColor, sRGBColor, xyYColor
-    from colormath.color_conversions import convert_color
-except ImportError:
-    pass
-
-import colorsys
+import collections
 import datetime
+import functools
+import hashlib
 try:
     # noinspection PyUnresolvedReferences
     import indigo
 except ImportError:
     pass
 import json
-import queue
+import re
+import resource
 import sys
 import threading
+import time
 import traceback
 
+from colorConversion import hsv_to_indigo_rgb, xy_to_indigo_rgb
 from constants import *
+from zigbeeRecords import ZigbeeDefinitionRecord, ZigbeeDeviceRecord, ZigbeeGroupRecord, ZigbeeModelRecord
+
+
+@functools.lru_cache(maxsize=256)
+def _format_last_seen(seconds):
+    # Messages from many devices arrive within the same second, so the formatted time for each second is cached
+    return datetime.datetime.utcfromtimestamp(seconds).strftime('%Y-%m-%d %H:%M:%S')
 
 
 def _no_image():
@@ -33,12 +39,49 @@ def _no_image():
         return getattr(indigo.kStateImageSel, "None")  # Python 2
 
 
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _iterate_json_array(payload):
+    # Decodes a JSON array one element at a time, so that only the element being processed is held in decoded form
+    decoder = json.JSONDecoder()
+    index = JSON_WHITESPACE.match(payload, 0).end()
+    if payload[index:index + 1] != "[":
+        raise ValueError(f"JSON array expected at position {index}")
+    index = JSON_WHITESPACE.match(payload, index + 1).end()
+    if payload[index:index + 1] == "]":
+        return
+    while True:
+        element, index = decoder.raw_decode(payload, index)
+        yield element
+        index = JSON_WHITESPACE.match(payload, index).end()
+        separator = payload[index:index + 1]
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"',' or ']' expected at position {index}")
+        index = JSON_WHITESPACE.match(payload, index + 1).end()
+
+
+def _peak_rss():
+    # Returns the peak resident set size of the plugin host process in bytes (ru_maxrss is in bytes on macOS, KB on Linux)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
 # noinspection PyPep8Naming
 class ThreadZigbeeHandler(threading.Thread):
 
     # This class handles Zigbee Coordinator processing
+    #
+    # Each Zigbee Coordinator has one or more workers, plus an express worker (worker number
+    # ZIGBEE_HANDLER_EXPRESS_WORKER) that only runs the processors for button / remote 'action' events.
+
+    EXPRESS_PROCESSORS = frozenset(("process_property_action", "process_property_action_multi_switch", "process_property_action_remote_audio",
+                                    "process_property_action_remote_dimmer", "process_property_action_scene_rotary", "process_property_action_switch",
+                                    "process_property_action_vibration", "process_property_rotations"))
 
-    def __init__(self, pluginGlobals, event, zc_dev_id):
+    def __init__(self, pluginGlobals, event, zc_dev_id, worker_number):
         try:
             threading.Thread.__init__(self)
 
@@ -46,9 +89,22 @@ class ThreadZigbeeHandler(threading.Thread):
             self.zc_dev_id = zc_dev_id
             self.zc_address = indigo.devices[self.zc_dev_id].address
 
-            self.key_value_lists = dict()
+            # Each worker drains its own queue (messages are sharded by Zigbee device) so the following are per worker
+            self.worker_number = worker_number
+            if self.worker_number == ZIGBEE_HANDLER_EXPRESS_WORKER:
+                self.zigbee_queue = self.globals[QUEUES][MQTT_ZIGBEE2MQTT_EXPRESS_QUEUE][self.zc_dev_id]
+            else:
+                self.zigbee_queue = self.globals[QUEUES][MQTT_ZIGBEE2MQTT_QUEUE][self.zc_dev_id][self.worker_number]
 
-            self.timers = dict()
+            self.action_latencies = collections.deque(maxlen=ACTION_LATENCY_SAMPLES)  # Express worker: seconds from MQTT message received to action states written
+
+            self.device_cache = self.globals[INDIGO_DEVICE_CACHE]  # Read-through cache of Indigo devices and their pluginProps
+            self.state_shadow = self.globals[INDIGO_STATE_SHADOW]  # In-plugin copy of Indigo device states
+            self.indigo_writer = self.globals[INDIGO_WRITER_THREAD]  # Batches state and state image writes to the Indigo server
+            self.reporting_filter = self.globals[REPORTING_FILTER]  # Deadband / hysteresis filter for numeric sensor states
+            self.scheduler = self.globals[SCHEDULER_THREAD]  # Single plugin timer thread (e.g. reset of actions to idle)
+
+            self.key_value_lists = dict()
 
             self.zigbee_devices_offline = dict()
 
@@ -75,17 +131,21 @@ class ThreadZigbeeHandler(threading.Thread):
         try:
             while not self.threadStop.is_set():
                 try:
-                    mqtt_message_sequence, zigbee_process_command, zc_dev_id, mqtt_topics, mqtt_topics_list, mqtt_payload = self.globals[QUEUES][MQTT_ZIGBEE2MQTT_QUEUE][self.zc_dev_id].get(True, 5)
+                    mqtt_message_sequence, zigbee_process_command, zc_dev_id, mqtt_topics, mqtt_topics_list, mqtt_payload, mqtt_received = self.zigbee_queue.get()  # Blocks until a message or the stop sentinel is queued
 
-                    if zigbee_process_command == HANDLE_ZIGBEE_DEVICE_MQTT_TOPIC:
+                    if zigbee_process_command == MQTT_PROCESS_COMMAND_HANDLE_STOP_THREAD:
+                        break
+                    elif zigbee_process_command == HANDLE_ZIGBEE_DEVICE_ACTION_MQTT_TOPIC:
+                        self.handle_zigbee_device_action(zc_dev_id, mqtt_topics, mqtt_payload, mqtt_received)
+                    elif zigbee_process_command == HANDLE_ZIGBEE_DEVICE_MQTT_TOPIC:
                         self.handle_zigbee_device_topics(zc_dev_id, mqtt_topics, mqtt_topics_list, mqtt_payload)
+                    elif zigbee_process_command == HANDLE_ZIGBEE_DEVICE_EXPRESSED_MQTT_TOPIC:
+                        self.handle_zigbee_device_topics(zc_dev_id, mqtt_topics, mqtt_topics_list, mqtt_payload, expressed=True)
                     elif zigbee_process_command == HANDLE_ZIGBEE_COORDINATOR_MQTT_TOPIC:
                         # if self.globals[DEBUG]: self.zigbeeLogger.error(f"=========== > ZIGBEE COORDINATOR TOPIC: {mqtt_topics}")
                         self.handle_zigebee_coordinator_topics(zc_dev_id, mqtt_topics, mqtt_topics_list, mqtt_payload)
                     elif zigbee_process_command == HANDLE_ZIGBEE_GROUP_MQTT_TOPIC:
                         self.handle_zigebee_group_topics(zc_dev_id, mqtt_topics, mqtt_topics_list, mqtt_payload)
-                except queue.Empty:
-                    pass
                 except Exception as exception_error:
                     self.exception_handler(exception_error, True)  # Log error and display failing statement
             else:
@@ -107,6 +167,8 @@ class ThreadZigbeeHandler(threading.Thread):
                 self.handle_zigebee_coordinator_topic_config(zc_dev_id, topics, topics_list, payload)
             elif coordinator_topic == "devices":
                 self.handle_zigebee_coordinator_topic_devices(zc_dev_id, topics, topics_list, payload)
+            elif coordinator_topic == "event":
+                self.handle_zigebee_coordinator_topic_event(zc_dev_id, topics, topics_list, payload)
             elif coordinator_topic == "extensions":
                 pass
             elif coordinator_topic == "groups":
@@ -115,6 +177,9 @@ class ThreadZigbeeHandler(threading.Thread):
                 pass
             elif coordinator_topic == "logging":
                 pass
+            elif coordinator_topic == "response":
+                if topics_list[3:5] == ["device", "rename"]:
+                    self.handle_zigebee_coordinator_topic_response_device_rename(zc_dev_id, topics, topics_list, payload)
             elif coordinator_topic == "state":
                 pass
 
@@ -134,10 +199,27 @@ class ThreadZigbeeHandler(threading.Thread):
             if not zc_dev.enabled:
                 return
 
-            json_payload = json.loads(payload)
+            # The retained bridge devices message is re-sent on every reconnect and on any change anywhere in the
+            # Zigbee network, so skip it entirely if it is unchanged since it was last processed
+            payload_sha1 = hashlib.sha1()
+            for index in range(0, len(payload), 65536):  # Hashed a chunk at a time so that the (multi-MB) payload isn't copied whole to bytes
+                payload_sha1.update(payload[index:index + 65536].encode("utf-8"))
+            payload_hash = payload_sha1.hexdigest()
+            if payload_hash == self.globals[ZC][zc_dev_id].get(ZC_DEVICES_HASH, ""):
+                if self.globals[DEBUG]: self.zigbeeLogger.info(f"Zigbee Coordinator '{zc_dev.name}' bridge devices message unchanged - skipped")
+                self.update_linked_topic_friendly_names(zc_dev.address)  # Indigo devices may have been linked since it was processed
+                return
+
+            peak_rss_before = _peak_rss()
+
+            known_devices = self.globals[ZC][zc_dev_id].get(ZC_DEVICES_KNOWN, None)  # Zigbee device ieee -> friendly name, from the last processed message
+            devices = dict()
+            devices_rebuilt = 0
 
             zigbee_coordinator_ieee = ""
-            for zigbee_device in json_payload:
+            friendly_name_to_ieee = dict()  # Rebuilt on every bridge devices message so that renamed and removed devices drop out
+
+            for zigbee_device in _iterate_json_array(payload):  # Decoded one device at a time rather than as a whole (the payload can be several MB)
                 if zigbee_device['type'] == "Coordinator":
                     zigbee_coordinator_ieee = zigbee_device['ieee_address']
                     if zigbee_coordinator_ieee not in self.globals[ZD]:
@@ -152,19 +234,22 @@ class ThreadZigbeeHandler(threading.Thread):
                         for zc_ieee, indigo_id in self.globals[ZC_TO_INDIGO_ID].items():
                             if indigo_id == coordinator_dev.id:
                                 del self.globals[ZC_TO_INDIGO_ID][zc_ieee]
+                                self.globals[ZC_IEEE_TO_COORDINATOR].pop(zc_ieee, None)
                                 break
                         if zigbee_coordinator_ieee != "":
                             self.globals[ZC][coordinator_dev.id][ZC_IEEE] = zigbee_coordinator_ieee
                             self.globals[ZC_TO_INDIGO_ID][zigbee_coordinator_ieee] = coordinator_dev.id
+                            self.globals[ZC_IEEE_TO_COORDINATOR][zigbee_coordinator_ieee] = self.globals[ZC][coordinator_dev.id]
 
                         if self.globals[DEBUG]: self.zigbeeLogger.error(f"ZIGBEE COORDINATORS: {self.globals[ZC_TO_INDIGO_ID]}")
                     coordinator_dev.updateStateOnServer("topicFriendlyName", "bridge")
+                    self.state_shadow.update_state(coordinator_dev, "topicFriendlyName", "bridge")
 
                 elif (zigbee_device['type'] == "EndDevice" or zigbee_device['type'] == "Router") and zigbee_coordinator_ieee != "":
 
                     zigbee_device_ieee = zigbee_device['ieee_address']
                     if zigbee_device_ieee not in self.globals[ZD][zigbee_coordinator_ieee]:
-                        self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee] = dict()
+                        self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee] = ZigbeeDeviceRecord()
 
                     # Default to the Indigo Device Id associated with this Zigbee device to zero if not setup
                     if ZD_INDIGO_DEVICE_ID not in self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee]:
@@ -172,13 +257,10 @@ class ThreadZigbeeHandler(threading.Thread):
 
                     # Now store rest of the device details from the coordinator Bridge mqtt message in the global store
                     self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_FRIENDLY_NAME] = zigbee_device['friendly_name']
+                    friendly_name_to_ieee[zigbee_device['friendly_name']] = zigbee_device_ieee
+                    devices[zigbee_device_ieee] = zigbee_device['friendly_name']
 
-                    if self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_INDIGO_DEVICE_ID] != 0:
-                        zd_dev_id = self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_INDIGO_DEVICE_ID]
-                        if zd_dev_id in indigo.devices:
-                            zd_dev = indigo.devices[zd_dev_id]
-                            if self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_FRIENDLY_NAME] != zd_dev.states["topicFriendlyName"]:
-                                zd_dev.updateStateOnServer("topicFriendlyName", self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_FRIENDLY_NAME])
+                    self.update_topic_friendly_name(zigbee_coordinator_ieee, zigbee_device_ieee)
 
                     self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MANUFACTURER] = zigbee_device.get('manufacturer', "")
                     self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MODEL_ID] = zigbee_device.get("model_id", "")
@@ -187,51 +269,16 @@ class ThreadZigbeeHandler(threading.Thread):
                     self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_DISABLED] = zigbee_device.get("disabled", "")
                     self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_SOFTWARE_BUILD_ID] = zigbee_device.get("software_build_id", "")
 
-                    self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_DEFINITION] = dict()
-                    zigbee_device_definition = zigbee_device['definition']
-                    self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_DEFINITION][ZD_DESCRIPTION_HW] = zigbee_device_definition["description"]
-                    self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_DEFINITION][ZD_VENDOR] = zigbee_device_definition["vendor"]
-                    self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_DEFINITION][ZD_MODEL] = zigbee_device_definition["model"]
-
-                    # self.zigbeeLogger.warning(f"ZD_DEFINITION: Description='{zigbee_device_definition['description']}', Vendor='{zigbee_device_definition['vendor']}', Model='{zigbee_device_definition['model']}'")
-
-                    # Store the exposes array of properties from the coordinator Bridge mqtt message in the global store
-                    # So there is a full record of the individual properties capabilities. TODO: Reserved for future use
-                    self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_EXPOSES] = zigbee_device_definition["exposes"]  # List of dicts
-
-                    properties = list()
-                    properties_message = ""  # To log to the Indigo Event Log (during testing)
-                    for zigbee_device_property_dict in self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_EXPOSES]:
-                        if "features" in zigbee_device_property_dict:
-                            # endpoint = zigbee_device_property_dict.get("endpoint", "")
-                            # endpoint = f" [{endpoint}]" if endpoint != "" else "xyz"
-                            for zigbee_device_features_property_dict in zigbee_device_property_dict["features"]:
-                                if "property" in zigbee_device_features_property_dict:
-                                    # property_endpoint = f"{zigbee_device_features_property_dict['property']}{endpoint}"
-                                    property_endpoint = f"{zigbee_device_features_property_dict['property']}"
-                                    properties.append(property_endpoint)
-                                    self.properties_set.add(zigbee_device_features_property_dict['property'])  # This Python set is used to record all properties
-                                    properties_message += f", {zigbee_device_features_property_dict['property']}"
-                                    if zigbee_device_features_property_dict['property'] == "state":
-                                        additional_property = "onoff"
-                                        properties.append(additional_property)
-                                        self.properties_set.add(additional_property)  # This Python set is used to record all properties
-                                        properties_message += f", {additional_property}"
-
-                        elif "property" in zigbee_device_property_dict:
-                            properties.append(zigbee_device_property_dict['property'])
-                            self.properties_set.add(zigbee_device_property_dict['property'])  # This Python set is used to record all properties
-                            properties_message += f", {zigbee_device_property_dict['property']}"
-                            if zigbee_device_property_dict['property'] == "state":
-                                additional_property = "onoff"
-                                properties.append(additional_property)
-                                self.properties_set.add(additional_property)  # This Python set is used to record all properties
-                                properties_message += f", {additional_property}"
-                    self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_PROPERTIES] = properties  # Store properties list in Globals for this zigbee device
-                    properties_message = properties_message[2:]  # Removes ", " at start (if present)
-                    if self.globals[DEBUG]:
-                        self.zigbeeLogger.info(
-                        f"Zigbee Device [{zigbee_device['ieee_address']} | {zigbee_device_definition['description']}]: {zigbee_device['friendly_name']} [{zigbee_device_definition['vendor']} - {zigbee_device_definition['model']}]\nProperties: {properties_message}")
+                    # Only re-resolve the shared model definition (definition, exposes and properties) if the device's definition has changed
+                    zigbee_device_definition = zigbee_device.get('definition', None) or dict()  # Definition is null for devices unsupported by Zigbee2mqtt
+                    definition_hash = hashlib.sha1(json.dumps(zigbee_device_definition, sort_keys=True).encode("utf-8")).hexdigest()
+                    if definition_hash != self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee].get(ZD_DEFINITION_HASH, ""):
+                        model_key = (zigbee_device_definition.get("vendor", ""), zigbee_device_definition.get("model", ""), zigbee_device.get("software_build_id", ""))
+                        model_definition = self.zigbee_model_definition(zigbee_coordinator_ieee, model_key, definition_hash, zigbee_device_definition)
+                        self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MODEL_DEFINITION] = model_definition
+                        self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_DEFINITION] = model_definition[ZM_DEFINITION]
+                        self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_DEFINITION_HASH] = definition_hash
+                        devices_rebuilt += 1
 
                     # if zigbee_device_ieee not in indigo.devices:
                     #     self.globals[ZC][AVAILABLE][zigbee_device_ieee] = True
@@ -242,6 +289,15 @@ class ThreadZigbeeHandler(threading.Thread):
                 else:
                     if self.globals[DEBUG]: self.zigbeeLogger.error(f"UNKNOWN DEVICE TYPE: {zigbee_device['type']}, Details ...\n{payload}")
 
+            if known_devices is not None:
+                self.report_zigbee_network_changes(known_devices, devices)
+            self.globals[ZC][zc_dev_id][ZC_DEVICES_KNOWN] = devices
+            self.globals[ZC][zc_dev_id][ZC_DEVICES_HASH] = payload_hash
+            peak_rss_after = _peak_rss()
+            self.globals[ZC][zc_dev_id][ZC_DEVICES_PEAK_RSS] = peak_rss_after
+            self.globals[ZC][zc_dev_id][ZC_DEVICES_PEAK_RSS_INCREASE] = peak_rss_after - peak_rss_before  # Raise of the (lifetime) peak by the last processed message only
+            if self.globals[DEBUG]: self.zigbeeLogger.info(f"Zigbee Coordinator '{zc_dev.name}' bridge devices message processed: {len(payload)} bytes, {len(devices)} devices, {devices_rebuilt} definitions rebuilt, peak RSS {peak_rss_after // 1024} KB (+{(peak_rss_after - peak_rss_before) // 1024} KB)")
+
             # # TESTING Aqara E1 2 gang switch (with neutral) - START ...
             # test_aqara_e1 = False
             # if test_aqara_e1:
@@ -342,7 +398,7 @@ class ThreadZigbeeHandler(threading.Thread):
                 tuya_dimmer_module_ieee = "0x123456789"
                 zigbee_device_ieee = tuya_dimmer_module_ieee
                 if zigbee_device_ieee not in self.globals[ZD][zigbee_coordinator_ieee]:
-                    self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee] = dict()
+                    self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee] = ZigbeeDeviceRecord()
 
                 # Default to the Indigo Device Id associated with this Zigbee device to zero if not setup
                 if ZD_INDIGO_DEVICE_ID not in self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee]:
@@ -350,6 +406,7 @@ class ThreadZigbeeHandler(threading.Thread):
 
                 # Now store rest of the device details from the coordinator Bridge mqtt message in the global store
                 self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_FRIENDLY_NAME] = "Study/Tuya Dimmer Module"
+                friendly_name_to_ieee["Study/Tuya Dimmer Module"] = zigbee_device_ieee
 
                 if self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_INDIGO_DEVICE_ID] != 0:
                     zd_dev_id = self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_INDIGO_DEVICE_ID]
@@ -357,6 +414,7 @@ class ThreadZigbeeHandler(threading.Thread):
                         zd_dev = indigo.devices[zd_dev_id]
                         if "topicFriendlyName" not in zd_dev.states or self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_FRIENDLY_NAME] != zd_dev.states["topicFriendlyName"]:
                             zd_dev.updateStateOnServer("topicFriendlyName", self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_FRIENDLY_NAME])
+                            self.state_shadow.update_state(zd_dev, "topicFriendlyName", self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_FRIENDLY_NAME])
 
                 self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MANUFACTURER] = "Tuya"  # zigbee_device.get('manufacturer', "")
                 self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MODEL_ID] = ""  # zigbee_device.get("model_id", "")
@@ -365,17 +423,14 @@ class ThreadZigbeeHandler(threading.Thread):
                 self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_DISABLED] = ""  # zigbee_device.get("disabled", "")
                 self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_SOFTWARE_BUILD_ID] = ""  # zigbee_device.get("software_build_id", "")
 
-                self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_DEFINITION] = dict()
                 # zigbee_device_definition = zigbee_device['definition']
-
-                self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_DEFINITION][ZD_DESCRIPTION_HW] = "Tuya Dimmer Module"  # zigbee_device_definition["description"]
-                self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_DEFINITION][ZD_VENDOR] = "Tuya"  # zigbee_device_definition["vendor"]
-                self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_DEFINITION][ZD_MODEL] = "TS0601_dimmer_3"  # zigbee_device_definition["model"]
-
+                tuya_dimmer_definition = {"description": "Tuya Dimmer Module", "vendor": "Tuya", "model": "TS0601_dimmer_3", "exposes": list()}
                 tuya_dimmer_properties = ["linkquality",
                                           "brightness_l1", "brightness_l2", "brightness_l3",
                                           "state_l1", "state_l2", "state_l3"]
-                self.globals[ZD][zigbee_coordinator_ieee][tuya_dimmer_module_ieee][ZD_PROPERTIES] = tuya_dimmer_properties  # Store properties list in Globals for this zigbee device
+                tuya_dimmer_model = self.zigbee_model_definition(zigbee_coordinator_ieee, ("Tuya", "TS0601_dimmer_3", ""), "", tuya_dimmer_definition, tuya_dimmer_properties)
+                self.globals[ZD][zigbee_coordinator_ieee][tuya_dimmer_module_ieee][ZD_MODEL_DEFINITION] = tuya_dimmer_model  # Store model definition (incl. properties list) in Globals for this zigbee device
+                self.globals[ZD][zigbee_coordinator_ieee][tuya_dimmer_module_ieee][ZD_DEFINITION] = tuya_dimmer_model[ZM_DEFINITION]
                 self.properties_set.add("linkquality")
                 self.properties_set.add("brightness_l1")
                 self.properties_set.add("brightness_l2")
@@ -386,11 +441,196 @@ class ThreadZigbeeHandler(threading.Thread):
 
             # TESTING Tuya Dimmer Module - ... END
 
+            if zigbee_coordinator_ieee != "":
+                self.globals[ZD_FRIENDLY_NAME_TO_IEEE][zigbee_coordinator_ieee] = friendly_name_to_ieee  # Replaced as a whole so that the MQTT thread never sees a partially built index
+
             if self.globals[DEBUG]: self.zigbeeLogger.warning(f"All Properties: {sorted(self.properties_set)}")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
+    def zigbee_model_definition(self, zigbee_coordinator_ieee, model_key, definition_hash, zigbee_device_definition, properties=None):
+        # Returns the model definition shared by all Zigbee devices of the same vendor / model / software build,
+        # building it (once) if the model isn't known yet or its definition has changed
+        try:
+            models = self.globals[ZD_MODELS].setdefault(zigbee_coordinator_ieee, dict())
+            model_definition = models.get(model_key, None)
+            if model_definition is None or model_definition[ZM_DEFINITION_HASH] != definition_hash:
+                model_definition = self.build_zigbee_model_definition(definition_hash, zigbee_device_definition, properties)
+                models[model_key] = model_definition  # Devices still pointing at a replaced model definition keep their own (older) definition until re-resolved
+            return model_definition
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def build_zigbee_model_definition(self, definition_hash, zigbee_device_definition, properties=None):
+        # Builds a model definition from a bridge devices definition: the definition, exposes, properties (in exposes order)
+        # plus a properties frozenset, the properties unsupported by the plugin and the model's capabilities (specific expose types)
+        try:
+            model_definition = ZigbeeModelRecord()
+            model_definition.definition_hash = definition_hash
+            model_definition.definition = ZigbeeDefinitionRecord()
+            model_definition.definition.description_hw = zigbee_device_definition.get("description", "")
+            model_definition.definition.vendor = zigbee_device_definition.get("vendor", "")
+            model_definition.definition.model = zigbee_device_definition.get("model", "")
+
+            # Store the exposes array of properties from the coordinator Bridge mqtt message in the global store
+            # So there is a full record of the individual properties capabilities. TODO: Reserved for future use
+            model_definition[ZM_EXPOSES] = zigbee_device_definition.get("exposes", list())  # List of dicts
+
+            capabilities = set()
+            if properties is None:
+                properties = list()
+                for zigbee_device_property_dict in model_definition[ZM_EXPOSES]:
+                    if "features" in zigbee_device_property_dict:
+                        capabilities.add(zigbee_device_property_dict.get("type", ""))
+                        # endpoint = zigbee_device_property_dict.get("endpoint", "")
+                        # endpoint = f" [{endpoint}]" if endpoint != "" else "xyz"
+                        for zigbee_device_features_property_dict in zigbee_device_property_dict["features"]:
+                            if "property" in zigbee_device_features_property_dict:
+                                # property_endpoint = f"{zigbee_device_features_property_dict['property']}{endpoint}"
+                                property_endpoint = f"{zigbee_device_features_property_dict['property']}"
+                                properties.append(property_endpoint)
+                                if zigbee_device_features_property_dict['property'] == "state":
+                                    properties.append("onoff")
+
+                    elif "property" in zigbee_device_property_dict:
+                        properties.append(zigbee_device_property_dict['property'])
+                        if zigbee_device_property_dict['property'] == "state":
+                            properties.append("onoff")
+
+            self.properties_set.update(properties)  # This Python set is used to record all properties
+            model_definition[ZM_PROPERTIES] = tuple(properties)
+            model_definition[ZM_PROPERTIES_SET] = frozenset(properties)
+            model_definition[ZM_UNSUPPORTED_PROPERTIES] = frozenset(zigbee_property for zigbee_property in properties
+                                                                    if zigbee_property not in ZD_PROPERTIES_SUPPORTED_BY_DEVICE_TYPES and zigbee_property not in ZD_PROPERTIES_SPECIAL_PROCESSING)
+            model_definition[ZM_CAPABILITIES] = frozenset(capabilities & ZIGBEE_SPECIFIC_EXPOSE_TYPES)
+
+            if self.globals[DEBUG]:
+                self.zigbeeLogger.info(
+                f"Zigbee Model [{model_definition[ZM_DEFINITION][ZD_DESCRIPTION_HW]}]: [{model_definition[ZM_DEFINITION][ZD_VENDOR]} - {model_definition[ZM_DEFINITION][ZD_MODEL]}]\nProperties: {', '.join(properties)}")
+
+            return model_definition
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def update_topic_friendly_name(self, zigbee_coordinator_ieee, zigbee_device_ieee):
+        # Updates the 'topicFriendlyName' state of the Indigo device linked to the Zigbee device (if any) if it has changed
+        try:
+            zd_dev_id = self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee].get(ZD_INDIGO_DEVICE_ID, 0)
+            if zd_dev_id != 0 and zd_dev_id in indigo.devices:
+                zd_dev = indigo.devices[zd_dev_id]
+                zigbee_friendly_name = self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_FRIENDLY_NAME]
+                if zigbee_friendly_name != self.state_shadow.states(zd_dev).get("topicFriendlyName", None):
+                    zd_dev.updateStateOnServer("topicFriendlyName", zigbee_friendly_name)
+                    self.state_shadow.update_state(zd_dev, "topicFriendlyName", zigbee_friendly_name)
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def update_linked_topic_friendly_names(self, zigbee_coordinator_ieee):
+        try:
+            for zigbee_device_ieee in list(self.globals[ZD_LINKED_INDIGO_DEVICES].get(zigbee_coordinator_ieee, set())):
+                if ZD_FRIENDLY_NAME in self.globals[ZD].get(zigbee_coordinator_ieee, dict()).get(zigbee_device_ieee, dict()):
+                    self.update_topic_friendly_name(zigbee_coordinator_ieee, zigbee_device_ieee)
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def report_zigbee_network_changes(self, known_devices, devices):
+        # Reports Zigbee devices that have joined, left or been renamed since the last processed bridge devices message
+        try:
+            for zigbee_device_ieee, zigbee_friendly_name in devices.items():
+                known_friendly_name = known_devices.get(zigbee_device_ieee, None)
+                if known_friendly_name is None:
+                    self.zigbeeLogger.info(f"Zigbee Device '{zigbee_friendly_name}' [{zigbee_device_ieee}] has joined the Zigbee network")
+                elif known_friendly_name != zigbee_friendly_name:
+                    self.zigbeeLogger.info(f"Zigbee Device '{known_friendly_name}' [{zigbee_device_ieee}] has been renamed to '{zigbee_friendly_name}'")
+            for zigbee_device_ieee, known_friendly_name in known_devices.items():
+                if zigbee_device_ieee not in devices:
+                    self.zigbeeLogger.info(f"Zigbee Device '{known_friendly_name}' [{zigbee_device_ieee}] has left the Zigbee network")
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def handle_zigebee_coordinator_topic_event(self, zc_dev_id, topics, topics_list, payload):
+        try:
+            zc_dev = indigo.devices[zc_dev_id]
+            if not zc_dev.enabled:
+                return
+
+            json_payload = json.loads(payload)
+
+            zigbee_coordinator_ieee = zc_dev.address
+            event_type = json_payload.get("type", "")
+            event_data = json_payload.get("data", dict())
+            zigbee_device_ieee = event_data.get("ieee_address", "")
+            zigbee_friendly_name = event_data.get("friendly_name", "")
+            if zigbee_device_ieee == "" or zigbee_friendly_name == "":
+                return
+
+            match event_type:
+                case "device_joined" | "device_announce" | "device_interview":
+                    self.update_friendly_name_index(zigbee_coordinator_ieee, zigbee_device_ieee, zigbee_friendly_name)
+                case "device_leave":
+                    friendly_name_to_ieee = self.globals[ZD_FRIENDLY_NAME_TO_IEEE].get(zigbee_coordinator_ieee, dict())
+                    if friendly_name_to_ieee.get(zigbee_friendly_name, "") == zigbee_device_ieee:
+                        del friendly_name_to_ieee[zigbee_friendly_name]
+                    if self.globals[DEBUG]: self.zigbeeLogger.warning(f"Zigbee Device '{zigbee_friendly_name}' [{zigbee_device_ieee}] has left the Zigbee network")
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def handle_zigebee_coordinator_topic_response_device_rename(self, zc_dev_id, topics, topics_list, payload):
+        try:
+            zc_dev = indigo.devices[zc_dev_id]
+            if not zc_dev.enabled:
+                return
+
+            json_payload = json.loads(payload)
+            if json_payload.get("status", "") != "ok":
+                return
+
+            zigbee_coordinator_ieee = zc_dev.address
+            old_friendly_name = json_payload["data"]["from"]
+            new_friendly_name = json_payload["data"]["to"]
+            zigbee_device_ieee = self.globals[ZD_FRIENDLY_NAME_TO_IEEE].get(zigbee_coordinator_ieee, dict()).get(old_friendly_name, "")
+            if zigbee_device_ieee == "":
+                return  # Not known yet - the refreshed bridge devices message will pick up the new friendly name
+
+            self.update_friendly_name_index(zigbee_coordinator_ieee, zigbee_device_ieee, new_friendly_name)
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def update_friendly_name_index(self, zigbee_coordinator_ieee, zigbee_device_ieee, zigbee_friendly_name):
+        # This method keeps the friendly name to ieee index (and the Zigbee device friendly name) current between bridge devices messages
+        try:
+            if zigbee_coordinator_ieee not in self.globals[ZD_FRIENDLY_NAME_TO_IEEE]:
+                self.globals[ZD_FRIENDLY_NAME_TO_IEEE][zigbee_coordinator_ieee] = dict()
+            friendly_name_to_ieee = self.globals[ZD_FRIENDLY_NAME_TO_IEEE][zigbee_coordinator_ieee]
+
+            for friendly_name, ieee in list(friendly_name_to_ieee.items()):
+                if ieee == zigbee_device_ieee and friendly_name != zigbee_friendly_name:
+                    del friendly_name_to_ieee[friendly_name]  # Renamed
+            friendly_name_to_ieee[zigbee_friendly_name] = zigbee_device_ieee
+
+            zigbee_device = self.globals[ZD].get(zigbee_coordinator_ieee, dict()).get(zigbee_device_ieee, None)
+            if zigbee_device is None or zigbee_device.get(ZD_FRIENDLY_NAME, "") == zigbee_friendly_name:
+                return
+            if self.globals[DEBUG]: self.zigbeeLogger.warning(f"Zigbee Device [{zigbee_device_ieee}] renamed from '{zigbee_device.get(ZD_FRIENDLY_NAME, '')}' to '{zigbee_friendly_name}'")
+            zigbee_device[ZD_FRIENDLY_NAME] = zigbee_friendly_name
+
+            zd_dev_id = zigbee_device.get(ZD_INDIGO_DEVICE_ID, 0)
+            if zd_dev_id != 0 and zd_dev_id in indigo.devices:
+                zd_dev = indigo.devices[zd_dev_id]
+                zd_dev.updateStateOnServer("topicFriendlyName", zigbee_friendly_name)
+                self.state_shadow.update_state(zd_dev, "topicFriendlyName", zigbee_friendly_name)
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
     def handle_zigebee_coordinator_topic_groups(self, zc_dev_id, topics, topics_list, payload):
         try:
             zc_dev = indigo.devices[zc_dev_id]
@@ -412,7 +652,7 @@ class ThreadZigbeeHandler(threading.Thread):
                 if "friendly_name" in zigbee_group:
                     zigbee_friendly_name = zigbee_group["friendly_name"]
                     if zigbee_friendly_name not in self.globals[ZG][zigbee_coordinator_ieee]:
-                        self.globals[ZG][zigbee_coordinator_ieee][zigbee_friendly_name] = dict()
+                        self.globals[ZG][zigbee_coordinator_ieee][zigbee_friendly_name] = ZigbeeGroupRecord()
                     self.globals[ZG][zigbee_coordinator_ieee][zigbee_friendly_name][ZG_ID] = zigbee_group["id"]
                     self.globals[ZG][zigbee_coordinator_ieee][zigbee_friendly_name][ZG_MEMBERS] = zigbee_group["members"]
                 else:
@@ -433,7 +673,7 @@ class ThreadZigbeeHandler(threading.Thread):
     def handle_zigebee_group_topics(self, zc_dev_id, topics, topics_list, payload):
         try:
             group_friendly_name = topics_list[1]
-            zc_dev = indigo.devices[zc_dev_id]
+            zc_dev = self.device_cache.device(zc_dev_id)
             zigbee_coordinator_ieee = zc_dev.address
 
             number_of_topics = len(topics_list)
@@ -445,10 +685,10 @@ class ThreadZigbeeHandler(threading.Thread):
 
             zg_dev_id = self.globals[ZG][zigbee_coordinator_ieee][group_friendly_name].get(ZG_INDIGO_DEVICE_ID, 0)
 
-            if zg_dev_id == 0 or zg_dev_id not in indigo.devices:
+            if zg_dev_id == 0 or not self.device_cache.exists(zg_dev_id):
                 return
 
-            zg_dev = indigo.devices[zg_dev_id]
+            zg_dev = self.device_cache.device(zg_dev_id)
 
             if not zg_dev.enabled:
                 return
@@ -462,18 +702,16 @@ class ThreadZigbeeHandler(threading.Thread):
             self.key_value_lists = dict()
             self.key_value_lists[zg_dev_id] = list()
 
-            if zg_dev.deviceTypeId == "zigbeeGroupRelay":
-                self.process_property_state(zg_dev, json_payload)
-            elif zg_dev.deviceTypeId == "zigbeeGroupDimmer":
-                self.process_property_brightness(zg_dev, json_payload)
-                self.process_property_color_mode(zg_dev, json_payload)
-                self.process_property_color(zg_dev, json_payload)
-                self.process_property_color_temp(zg_dev, json_payload)
-                self.process_property_state(zg_dev, json_payload)
+            props, processor_pipeline = self.processor_pipeline(zigbee_coordinator_ieee, zg_dev)
+            for processor_name, processor_args, skip_retained_message in processor_pipeline:
+                getattr(self, processor_name)(*processor_args, zg_dev, props, json_payload)
 
             # Now update the Indigo Zigbee device states for all devices in the device group
             for dev_id, key_value_list in self.key_value_lists.items():
-                indigo.devices[dev_id].updateStatesOnServer(key_value_list)
+                dev = self.device_cache.device(dev_id)
+                key_value_list = self.state_shadow.changed_states(dev, key_value_list)  # Only update states whose value has changed
+                if len(key_value_list) > 0:
+                    self.indigo_writer.update_states(dev_id, key_value_list)
 
             # if "state" in json_payload:
             #     on_off = True if json_payload["state"] == "ON" else False
@@ -501,9 +739,10 @@ class ThreadZigbeeHandler(threading.Thread):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def handle_zigbee_device_topics(self, zc_dev_id, topics, topics_list, payload):
+    def handle_zigbee_device_topics(self, zc_dev_id, topics, topics_list, payload, expressed=False):
+        # expressed is True if the message's action properties have been processed by the express worker
         try:
-            zc_dev = indigo.devices[zc_dev_id]
+            zc_dev = self.device_cache.device(zc_dev_id)
             zigbee_coordinator_ieee = zc_dev.address
 
             # Following statement derives topic friendly name e.g. "Contact Sensor 1" or "study/contact sensor 1" etc
@@ -542,35 +781,41 @@ class ThreadZigbeeHandler(threading.Thread):
                     self.zigbeeLogger.error(f"handle_zigbee_device_topics. JSON payload missing: Topic: {topics}")
                 return
 
-            if "device" not in json_payload or "ieeeAddr" not in json_payload["device"]:
-                if len(payload) > 0:
-                    if not self.globals[MQTT_SUPPRESS_IEEE_MISSING]:
-                        self.zigbeeLogger.error(f"MQTT topic '{topics}' is missing 'device' and|or 'ieeAddr' keys in JSON payload:\n")
-                        self.zigbeeLogger.warning(f"    {payload}\n")
-                        self.zigbeeLogger.error(f"    See Wiki Installation documentation at: https://github.com/autolog/Zigbee2mqtt_Bridge/wiki/Installation\n")
-                else:
-                    self.zigbeeLogger.error(f"MQTT topic '{topics}' is missing JSON payload. Payload is empty.")
-                return
-            zigbee_device_ieee = json_payload["device"]["ieeeAddr"]
+            if "device" in json_payload and "ieeeAddr" in json_payload["device"]:
+                # Zigbee2mqtt 'include_device_information' is enabled, so the payload identifies the device
+                zigbee_device_ieee = json_payload["device"]["ieeeAddr"]
+                zigbee_friendly_name = json_payload["device"]["friendlyName"]
+                if topic_friendly_name != zigbee_friendly_name:
+                    self.zigbeeLogger.error(f"Zigbee Device Friendly Name '{zigbee_friendly_name}' differs from topic '{topic_friendly_name}'")
+                    self.zigbeeLogger.error(f"Zigbee JSON: Topic: {topics}, payload: {payload}")
+                    return
+            else:
+                # Route on the topic friendly name using the index built from the coordinator bridge devices message
+                zigbee_device_ieee = self.globals[ZD_FRIENDLY_NAME_TO_IEEE].get(zigbee_coordinator_ieee, dict()).get(topic_friendly_name, "")
+                zigbee_friendly_name = topic_friendly_name
+                if zigbee_device_ieee == "":
+                    if len(payload) > 0:
+                        if not self.globals[MQTT_SUPPRESS_IEEE_MISSING]:
+                            self.zigbeeLogger.error(f"MQTT topic '{topics}' does not match a known Zigbee device friendly name and is missing 'device' and|or 'ieeAddr' keys in JSON payload:\n")
+                            self.zigbeeLogger.warning(f"    {payload}\n")
+                    else:
+                        self.zigbeeLogger.error(f"MQTT topic '{topics}' is missing JSON payload. Payload is empty.")
+                    return
+
             if zigbee_device_ieee not in self.globals[ZD][zigbee_coordinator_ieee]:
                 if zigbee_device_ieee != zigbee_coordinator_ieee:
                     if self.globals[DEBUG]: self.zigbeeLogger.error(f"Zigbee Device with ieee '{zigbee_device_ieee}' is not joined to zigbee network - mqtt message ignored. Payload:\n{payload}")
                 return
 
-            zigbee_friendly_name = json_payload["device"]["friendlyName"]
-            if topic_friendly_name != zigbee_friendly_name:
-                self.zigbeeLogger.error(f"Zigbee Device Friendly Name '{zigbee_friendly_name}' differs from topic '{topic_friendly_name}'")
-                self.zigbeeLogger.error(f"Zigbee JSON: Topic: {topics}, payload: {payload}")
-                return
-
             # Check if linked to an Indigo device
-            zd_dev_id = self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_INDIGO_DEVICE_ID]
+            zd_dev_internal = self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee]
+            zd_dev_id = zd_dev_internal.indigo_device_id
 
             if zd_dev_id == 0:  # Not linked to an Indigo device
                 if self.globals[DEBUG]: self.zigbeeLogger.warning(f"Processing unlinked Zigbee device '{zigbee_friendly_name}' [{zigbee_device_ieee}]")
                 return
 
-            zd_dev = indigo.devices[zd_dev_id]
+            zd_dev = self.device_cache.device(zd_dev_id)
 
             offline = self.zigbee_devices_offline.get(topic_friendly_name, False)
             if offline:
@@ -579,180 +824,247 @@ class ThreadZigbeeHandler(threading.Thread):
 
             if self.globals[DEBUG]: self.zigbeeLogger.error(f"Processing Zigbee device '{zigbee_friendly_name}' [{zigbee_device_ieee}]. Linked to Indigo device '{zd_dev.name}' [{zd_dev.deviceTypeId}]")
 
-            self.iterate_grouped_devices(zd_dev.id)  # Initialise the key value lists for Indigo device updates for each device in the device group
+            if not zd_dev.enabled:
+                return
 
-            self.process_topic_last_seen(zd_dev, json_payload)  # For every Indigo Zigbee device type update 'last seen'
+            props, processor_pipeline = self.processor_pipeline(zigbee_coordinator_ieee, zd_dev)
 
-            self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MESSAGE_COUNT] += 1
-            match zd_dev.deviceTypeId:
-                case "blind":
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_position(zd_dev, json_payload)
-                    self.process_property_state(zd_dev, json_payload)
-                    self.process_property_temperature(zd_dev, json_payload)
+            self.iterate_grouped_devices(zd_dev.id)  # Initialise the key value lists for Indigo device updates for each device in the device group
 
-                case "button":
-                    self.process_property_action(zd_dev, json_payload)
-                    self.process_property_battery(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_voltage(zd_dev, json_payload)
+            self.process_topic_last_seen(zd_dev, zd_dev_internal, json_payload)  # For every Indigo Zigbee device type update 'last seen'
 
-                case "contactSensor":
-                    self.process_property_battery(zd_dev, json_payload)
-                    self.process_property_contact(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_voltage(zd_dev, json_payload)
+            zd_dev_internal.message_count += 1
+            for processor_name, processor_args, skip_retained_message in processor_pipeline:
+                if skip_retained_message and zd_dev_internal.message_count <= 1:
+                    continue  # Ignore the retained message received on connection so that an old action isn't replayed
+                if expressed and processor_name in self.EXPRESS_PROCESSORS:
+                    continue  # Already processed by the express worker
+                getattr(self, processor_name)(*processor_args, zd_dev, props, json_payload)
 
-                case "dimmer":
-                    self.process_property_brightness(zd_dev, json_payload)
-                    self.process_property_color_mode(zd_dev, json_payload)
-                    self.process_property_color(zd_dev, json_payload)
-                    self.process_property_color_temp(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_state(zd_dev, json_payload)
+            # Now update the Indigo Zigbee device states for all devices in the device group
+            for dev_id, key_value_list in self.key_value_lists.items():
+                dev = self.device_cache.device(dev_id)
+                if dev.enabled:
+                    key_value_list = self.state_shadow.changed_states(dev, key_value_list)  # Only update states whose value has changed
+                    if len(key_value_list) > 0:
+                        self.indigo_writer.update_states(dev_id, key_value_list)
 
-                case "humiditySensor":
-                    self.process_property_battery(zd_dev, json_payload)
-                    self.process_property_humidity(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_temperature(zd_dev, json_payload)
-                    self.process_property_voltage(zd_dev, json_payload)
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-                case "illuminanceSensor":
-                    # TODO: Work out how to handle illuminance when it is the primary device and not just an additional state
-                    pass
+    def handle_zigbee_device_action(self, zc_dev_id, topics, payload, received):
+        # Express worker: runs just the device's action processors for the message and has the resulting states written
+        # straight away. The rest of the message's properties are processed by the device's worker.
+        try:
+            zc_dev = self.device_cache.device(zc_dev_id)
+            zigbee_coordinator_ieee = zc_dev.address
 
-                case "motionSensor":
-                    self.process_property_battery(zd_dev, json_payload)
-                    self.process_property_humidity(zd_dev, json_payload)
-                    self.process_property_illuminance(zd_dev, json_payload)
-                    self.process_property_occupancy(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_temperature(zd_dev, json_payload)
-                    self.process_property_voltage(zd_dev, json_payload)
+            topic_friendly_name = topics.replace(f"{self.globals[ZC][zc_dev_id][MQTT_ROOT_TOPIC]}/", "")
 
-                case "multiDimmer":
-                    self.process_property_multi_brightness(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_multi_state(zd_dev, json_payload)
+            self.mqtt_filter_log_processing(zigbee_coordinator_ieee, topic_friendly_name, topics, payload)
 
-                case "multiOutlet":
-                    self.process_property_action(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_multi_state(zd_dev, json_payload)
-                    self.process_property_voltage(zd_dev, json_payload)
+            json_payload = json.loads(payload)
 
-                case "multiSensor":
-                    self.process_property_battery(zd_dev, json_payload)
-                    self.process_property_humidity(zd_dev, json_payload)
-                    self.process_property_illuminance(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_occupancy(zd_dev, json_payload)
-                    self.process_property_temperature(zd_dev, json_payload)
-                    self.process_property_voltage(zd_dev, json_payload)
+            if "device" in json_payload and "ieeeAddr" in json_payload["device"]:
+                zigbee_device_ieee = json_payload["device"]["ieeeAddr"]
+            else:
+                zigbee_device_ieee = self.globals[ZD_FRIENDLY_NAME_TO_IEEE].get(zigbee_coordinator_ieee, dict()).get(topic_friendly_name, "")
 
-                case "multiSocket":
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_power_left_right(zigbee_coordinator_ieee, zd_dev, json_payload)
-                    self.process_property_multi_state(zd_dev, json_payload)
-                    self.process_property_temperature(zd_dev, json_payload)
+            zd_dev_internal = self.globals[ZD].get(zigbee_coordinator_ieee, dict()).get(zigbee_device_ieee, None)
+            if zd_dev_internal is None or zd_dev_internal.indigo_device_id == 0:
+                return  # Unknown or not linked to an Indigo device - reported (if required) when the rest of the message is processed
 
-                case "multiSwitch":
-                    if self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MESSAGE_COUNT] > 1:
-                        self.process_property_action_multi_switch(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_multi_state(zd_dev, json_payload)
-                    self.process_property_temperature(zd_dev, json_payload)
+            zd_dev = self.device_cache.device(zd_dev_internal.indigo_device_id)
+            if not zd_dev.enabled:
+                return
 
-                case "outlet":
-                    self.process_property_energy(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_power(zigbee_coordinator_ieee, zd_dev, json_payload)
-                    self.process_property_state(zd_dev, json_payload)
-                    self.process_property_voltage(zd_dev, json_payload)
+            props, processor_pipeline = self.processor_pipeline(zigbee_coordinator_ieee, zd_dev)
 
-                case "presenceSensor":
-                    pass
+            self.iterate_grouped_devices(zd_dev.id)
 
-                case "radarSensor":
-                    self.process_property_illuminance(zd_dev, json_payload)
-                    self.process_property_radar(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_temperature(zd_dev, json_payload)
+            for processor_name, processor_args, _ in processor_pipeline:
+                if processor_name in self.EXPRESS_PROCESSORS:
+                    getattr(self, processor_name)(*processor_args, zd_dev, props, json_payload)
 
-                case "remoteAudio":
-                    # DEBUG self.zigbeeLogger.error(f"{zd_dev.name}: Message Count = {self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MESSAGE_COUNT]}")
-                    if self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MESSAGE_COUNT] > 1:
-                        self.process_property_action_remote_audio(zd_dev, json_payload)
-                    self.process_property_battery(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
+            for dev_id, key_value_list in self.key_value_lists.items():
+                dev = self.device_cache.device(dev_id)
+                if dev.enabled:
+                    key_value_list = self.state_shadow.changed_states(dev, key_value_list)  # Only update states whose value has changed
+                    if len(key_value_list) > 0:
+                        self.indigo_writer.update_states(dev_id, key_value_list)
+            self.indigo_writer.request_flush()  # Written now by the writer (rather than this thread) so that the updates stay in order
 
-                case "remoteDimmer":
-                    # DEBUG self.zigbeeLogger.error(f"{zd_dev.name}: Message Count = {self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MESSAGE_COUNT]}")
-                    if self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MESSAGE_COUNT] > 1:
-                        self.process_property_action_remote_dimmer(zd_dev, json_payload)
-                    self.process_property_battery(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
+            self.action_latencies.append(time.perf_counter() - received)
 
-                case "temperatureSensor":
-                    self.process_property_battery(zd_dev, json_payload)
-                    self.process_property_humidity(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_pressure(zd_dev, json_payload)
-                    self.process_property_temperature(zd_dev, json_payload)
-                    self.process_property_voltage(zd_dev, json_payload)
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-                case "sceneRotary":
-                    self.process_property_battery(zd_dev, json_payload)
-                    if self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MESSAGE_COUNT] > 1:
-                        self.process_property_action_scene_rotary(zd_dev, json_payload, self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee])
-                    self.process_property_rotations(zd_dev, json_payload, self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee])
+    def action_latency_statistics(self):
+        # Returns the number of latencies recorded and the p50 and p99 press-to-state latencies (seconds) of the most recent actions
+        latencies = sorted(self.action_latencies)
+        if len(latencies) == 0:
+            return 0, 0.0, 0.0
+        return len(latencies), latencies[(len(latencies) - 1) // 2], latencies[min(len(latencies) - 1, (len(latencies) * 99) // 100)]
 
-                case "switch":
-                    if self.globals[ZD][zigbee_coordinator_ieee][zigbee_device_ieee][ZD_MESSAGE_COUNT] > 1:
-                        self.process_property_action_switch(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_multi_state(zd_dev, json_payload)
-                    self.process_property_temperature(zd_dev, json_payload)
+    def processor_pipeline(self, zigbee_coordinator_ieee, dev):
+        # Returns the compiled (props, processors) pipeline for the Indigo device, compiling it if not already cached.
+        # The cached pipeline is invalidated by the plugin when the device is started or its config is changed.
+        try:
+            pipeline = self.globals[ZD_PIPELINES].get(dev.id, None)
+            if pipeline is None:
+                pipeline = self.compile_processor_pipeline(zigbee_coordinator_ieee, dev)
+                self.globals[ZD_PIPELINES][dev.id] = pipeline
+            return pipeline
 
-                case "thermostat":
-                    pass
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+            return dict(), list()
 
+    def compile_processor_pipeline(self, zigbee_coordinator_ieee, dev):
+        # Resolve the device props once and build the list of processors to run for each message received for the device.
+        # Each list entry is a tuple of (processor name, processor args, skip_retained_message) where the processor is invoked
+        # as processor(*processor args, dev, props, json_payload). Processors are held by name and bound to the worker that
+        # runs them, as the compiled pipeline is shared by all the Zigbee handler workers (each with its own key value lists).
+        try:
+            props = self.device_cache.props(dev.id)
+
+            self.reporting_filter.configure(dev.id, props)
+
+            action = ("process_property_action", (), False)
+            action_multi_switch = ("process_property_action_multi_switch", (), True)
+            action_remote_audio = ("process_property_action_remote_audio", (), True)
+            action_remote_dimmer = ("process_property_action_remote_dimmer", (), True)
+            action_scene_rotary = ("process_property_action_scene_rotary", (zigbee_coordinator_ieee,), True)
+            action_switch = ("process_property_action_switch", (), True)
+            action_vibration = ("process_property_action_vibration", (), False)
+            angles = ("process_property_angles", (), False)
+            battery = ("process_property_battery", (), False)
+            brightness = ("process_property_brightness", (), False)
+            color = ("process_property_color", (), False)
+            color_mode = ("process_property_color_mode", (), False)
+            color_temp = ("process_property_color_temp", (), False)
+            contact = ("process_property_contact", (), False)
+            energy = ("process_property_energy", (), False)
+            humidity = ("process_property_humidity", (), False)
+            illuminance = ("process_property_illuminance", (), False)
+            link_quality = ("process_property_link_quality", (), False)
+            multi_state = ("process_property_multi_state", (), False)
+            occupancy = ("process_property_occupancy", (), False)
+            position = ("process_property_position", (), False)
+            power = ("process_property_power", (zigbee_coordinator_ieee,), False)
+            power_left_right = ("process_property_power_left_right", (zigbee_coordinator_ieee,), False)
+            pressure = ("process_property_pressure", (), False)
+            radar = ("process_property_radar", (), False)
+            rotations = ("process_property_rotations", (zigbee_coordinator_ieee,), False)
+            state = ("process_property_state", (), False)
+            strength = ("process_property_strength", (), False)
+            temperature = ("process_property_temperature", (), False)
+            vibration = ("process_property_vibration", (), False)
+            voltage = ("process_property_voltage", (), False)
+
+            match dev.deviceTypeId:
+                case "blind":
+                    processors = [link_quality, position, state, temperature]
+                case "button":
+                    processors = [action, battery, link_quality, voltage]
+                case "contactSensor":
+                    processors = [battery, contact, link_quality, voltage]
+                case "dimmer":
+                    processors = [brightness, color_mode, color, color_temp, link_quality, state]
+                case "humiditySensor":
+                    processors = [battery, humidity, link_quality, temperature, voltage]
+                case "motionSensor":
+                    processors = [battery, humidity, illuminance, occupancy, link_quality, temperature, voltage]
+                case "multiDimmer":
+                    processors = [link_quality, multi_state]
+                case "multiOutlet":
+                    processors = [action, link_quality, multi_state, voltage]
+                case "multiSensor":
+                    processors = [battery, humidity, illuminance, link_quality, occupancy, temperature, voltage]
+                case "multiSocket":
+                    processors = [link_quality, power_left_right, multi_state, temperature]
+                case "multiSwitch":
+                    processors = [action_multi_switch, link_quality, multi_state, temperature]
+                case "outlet":
+                    processors = [energy, link_quality, power, state, voltage]
+                case "radarSensor":
+                    processors = [illuminance, radar, link_quality, temperature]
+                case "remoteAudio":
+                    processors = [action_remote_audio, battery, link_quality]
+                case "remoteDimmer":
+                    processors = [action_remote_dimmer, battery, link_quality]
+                case "temperatureSensor":
+                    processors = [battery, humidity, link_quality, pressure, temperature, voltage]
+                case "sceneRotary":
+                    processors = [battery, action_scene_rotary, rotations]
+                case "switch":
+                    processors = [action_switch, link_quality, multi_state, temperature]
                 case "vibrationSensor":
-                    self.process_property_battery(zd_dev, json_payload)
-                    self.process_property_link_quality(zd_dev, json_payload)
-                    self.process_property_action_vibration(zd_dev, json_payload)
-                    self.process_property_angles(zd_dev, json_payload)
-                    self.process_property_vibration(zd_dev, json_payload)
-                    self.process_property_strength(zd_dev, json_payload)
-                    self.process_property_voltage(zd_dev, json_payload)
+                    processors = [battery, link_quality, action_vibration, angles, vibration, strength, voltage]
+                case "zigbeeGroupRelay":
+                    processors = [state]
+                case "zigbeeGroupDimmer":
+                    processors = [brightness, color_mode, color, color_temp, state]
+                case _:  # e.g. "illuminanceSensor", "presenceSensor" and "thermostat" which aren't processed yet
+                    processors = list()
+
+            # Drop processors whose enabling property isn't set for this device, so that they aren't invoked per message
+            processor_enabling_props = {
+                "process_property_action": "uspAction",
+                "process_property_action_multi_switch": "uspMultiSwitchAction",
+                "process_property_action_remote_audio": "uspRemoteAudio",
+                "process_property_action_remote_dimmer": "uspRemoteDimmer",
+                "process_property_action_scene_rotary": "uspSceneRotary",
+                "process_property_action_switch": "uspSwitchAction",
+                "process_property_action_vibration": "uspVibration",
+                "process_property_angles": "uspAngles",
+                "process_property_battery": "SupportsBatteryLevel",
+                "process_property_contact": "uspContact",
+                "process_property_energy": "uspEnergy",
+                "process_property_humidity": "uspHumidity",
+                "process_property_illuminance": "uspIlluminance",
+                "process_property_link_quality": "uspLinkQuality",
+                "process_property_occupancy": "uspOccupancy",
+                "process_property_power": "uspPower",
+                "process_property_pressure": "uspPressure",
+                "process_property_radar": "uspPresence",
+                "process_property_rotations": "uspRotations",
+                "process_property_state": "uspOnOff",
+                "process_property_strength": "uspStrength",
+                "process_property_temperature": "uspTemperature",
+                "process_property_vibration": "uspVibration",
+                "process_property_voltage": "uspVoltage",
+            }
+            pipeline = list()
+            for processor_name, processor_args, skip_retained_message in processors:
+                enabling_prop = processor_enabling_props.get(processor_name, None)
+                if enabling_prop is not None and not bool(props.get(enabling_prop, False)):
+                    continue
+                pipeline.append((processor_name, processor_args, skip_retained_message))
 
-            # Now update the Indigo Zigbee device states for all devices in the device group
-            for dev_id, key_value_list in self.key_value_lists.items():
-                dev = indigo.devices[dev_id]
-                if dev.enabled:
-                    dev.updateStatesOnServer(key_value_list)
+            if self.globals[DEBUG]: self.zigbeeLogger.info(f"Compiled processor pipeline for '{dev.name}': {[processor_name for processor_name, _, _ in pipeline]}")
+
+            return props, pipeline
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
+            return dict(), list()
 
     def iterate_grouped_devices(self, dev_id):
         # This method initialises the key value lists for Indigo device updates for each device in a device group
         try:
             self.key_value_lists = dict()
-            dev_id_list = indigo.device.getGroupList(dev_id)
-            for grouped_dev_id in dev_id_list:
+            self.key_value_lists[dev_id] = list()
+            for grouped_dev_id in self.globals[ZD_SECONDARY_DEVICES].get(dev_id, dict()).values():
                 self.key_value_lists[grouped_dev_id] = list()
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_action(self, zd_dev, json_payload):
+    def process_property_action(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "action" in json_payload:
-                if zd_dev.pluginProps.get("uspAction", False):
+                if props.get("uspAction", False):
                     action = json_payload["action"]
                     if action is None or action == "":
                         return
@@ -777,7 +1089,7 @@ class ThreadZigbeeHandler(threading.Thread):
                         button_number = action_split[0]  # e.g. "1"
                         button_action = action_split[1]  # e.g. "single"
                     button_state_id = f"button_{button_number}"
-                    number_of_buttons = int(zd_dev.pluginProps.get("uspNumberOfButtons", 1))
+                    number_of_buttons = int(props.get("uspNumberOfButtons", 1))
                     if int(button_number) <= number_of_buttons:
                         self.key_value_lists[zd_dev.id].append({'key': button_state_id, 'value': button_action})
                         if number_of_buttons == 1:
@@ -789,20 +1101,12 @@ class ThreadZigbeeHandler(threading.Thread):
 
                         self.key_value_lists[zd_dev.id].append({'key': 'lastButtonPressed', 'value': button_number, 'uiValue': button_ui})
 
-                        # Kick off a one-second timer
-                        try:
-                            if zd_dev.id in self.timers:
-                                self.timers[zd_dev.id].cancel()
-                                del self.timers[zd_dev.id]
-                        except Exception:
-                            pass
-
-                        self.timers[zd_dev.id] = threading.Timer(1.0, self.process_property_action_idle_timer, [[zd_dev.id, button_state_id]])
-                        self.timers[zd_dev.id].start()
+                        # Kick off (or push back) a one-second timer to reset the action to idle
+                        self.scheduler.schedule(("action_idle", zd_dev.id), 1.0, self.process_property_action_idle_timer, [zd_dev.id, button_state_id])
 
-                        zd_dev.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
+                        self.indigo_writer.update_state_image(zd_dev.id, indigo.kStateImageSel.SensorOn)
 
-                        if not bool(zd_dev.pluginProps.get("hideButtonBroadcast", False)):
+                        if not bool(props.get("hideButtonBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev.name}\" {button_message_ui} [{button_action}] action")
 
                     else:
@@ -810,99 +1114,79 @@ class ThreadZigbeeHandler(threading.Thread):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_action_vibration(self, zd_dev, json_payload):
+    def process_property_action_vibration(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "action" in json_payload:
-                if zd_dev.pluginProps.get("uspVibration", False):
+                if props.get("uspVibration", False):
                     vibration_action = json_payload["action"]
                     # zd_dev.updateStateOnServer(key="action", value="")  # To force Indigo to recognise a state change
 
-                    if vibration_action != zd_dev.states["action"]:
+                    if vibration_action != self.state_shadow.states(zd_dev)["action"]:
                         self.key_value_lists[zd_dev.id].append({'key': "action", 'value': vibration_action})
-                        if not bool(zd_dev.pluginProps.get("hideVibrationBroadcast", False)):
+                        if not bool(props.get("hideVibrationBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev.name}\" vibration sensor '{vibration_action}' event")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_action_remote_audio(self, zd_dev, json_payload):
+    def process_property_action_remote_audio(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "action" in json_payload:
-                if zd_dev.pluginProps.get("uspRemoteAudio", False):
+                if props.get("uspRemoteAudio", False):
                     remote_action = json_payload["action"]
                     zd_dev.updateStateOnServer(key="action", value="")  # To force Indigo to recognise a state change
+                    self.state_shadow.update_state(zd_dev, "action", "")
 
                     self.key_value_lists[zd_dev.id].append({'key': "action", 'value': remote_action})
                     self.key_value_lists[zd_dev.id].append({'key': 'lastButtonPressed', 'value': remote_action, 'uiValue': remote_action})
 
-                    # Kick off a one-second timer
-                    try:
-                        if zd_dev.id in self.timers:
-                            self.timers[zd_dev.id].cancel()
-                            del self.timers[zd_dev.id]
-                    except Exception:
-                        pass
+                    # Kick off (or push back) a one-second timer to reset the action to idle
+                    self.scheduler.schedule(("action_idle", zd_dev.id), 1.0, self.process_property_action_idle_timer, [zd_dev.id, "action"])
 
-                    self.timers[zd_dev.id] = threading.Timer(1.0, self.process_property_action_idle_timer, [[zd_dev.id, "action"]])
-                    self.timers[zd_dev.id].start()
+                    self.indigo_writer.update_state_image(zd_dev.id, indigo.kStateImageSel.SensorOn)
 
-                    zd_dev.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
-
-                    if not bool(zd_dev.pluginProps.get("hideRemoteAudioBroadcast", False)):
+                    if not bool(props.get("hideRemoteAudioBroadcast", False)):
                         self.zigbeeLogger.info(f"received \"{zd_dev.name}\" {remote_action} action")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_action_remote_dimmer(self, zd_dev, json_payload):
+    def process_property_action_remote_dimmer(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "action" in json_payload:
-                if zd_dev.pluginProps.get("uspRemoteDimmer", False):
+                if props.get("uspRemoteDimmer", False):
                     remote_action = json_payload["action"]
                     zd_dev.updateStateOnServer(key="action", value="")  # To force Indigo to recognise a state change
+                    self.state_shadow.update_state(zd_dev, "action", "")
 
                     self.key_value_lists[zd_dev.id].append({'key': "action", 'value': remote_action})
                     self.key_value_lists[zd_dev.id].append({'key': 'lastButtonPressed', 'value': remote_action, 'uiValue': remote_action})
 
-                    # Kick off a one-second timer
-                    try:
-                        if zd_dev.id in self.timers:
-                            self.timers[zd_dev.id].cancel()
-                            del self.timers[zd_dev.id]
-                    except Exception:
-                        pass
+                    # Kick off (or push back) a one-second timer to reset the action to idle
+                    self.scheduler.schedule(("action_idle", zd_dev.id), 1.0, self.process_property_action_idle_timer, [zd_dev.id, "action"])
 
-                    self.timers[zd_dev.id] = threading.Timer(1.0, self.process_property_action_idle_timer, [[zd_dev.id, "action"]])
-                    self.timers[zd_dev.id].start()
+                    self.indigo_writer.update_state_image(zd_dev.id, indigo.kStateImageSel.SensorOn)
 
-                    zd_dev.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
-
-                    if not bool(zd_dev.pluginProps.get("hideRemoteDimmerBroadcast", False)):
+                    if not bool(props.get("hideRemoteDimmerBroadcast", False)):
                         self.zigbeeLogger.info(f"received \"{zd_dev.name}\" '{remote_action}' action")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_action_scene_rotary(self, zd_dev, json_payload, zd_dev_internal):
+    def process_property_action_scene_rotary(self, zigbee_coordinator_ieee, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
+            zd_dev_internal = self.globals[ZD][zigbee_coordinator_ieee][zd_dev.address]
             if "action" in json_payload:
-                if zd_dev.pluginProps.get("uspSceneRotary", False):
+                if props.get("uspSceneRotary", False):
                     rotary_action = json_payload["action"]
                     zd_dev.updateStateOnServer(key="action", value="")  # To force Indigo to recognise a state change
+                    self.state_shadow.update_state(zd_dev, "action", "")
 
                     self.key_value_lists[zd_dev.id].append({'key': "action", 'value': rotary_action})
                     self.key_value_lists[zd_dev.id].append({'key': 'lastAction', 'value': rotary_action, 'uiValue': rotary_action})
 
                     if rotary_action == "start_rotating":
-                        rotation_variable_id = int(zd_dev.pluginProps.get("uspRotationVariableId", 0))
+                        rotation_variable_id = int(props.get("uspRotationVariableId", 0))
                         if rotation_variable_id != 0:
                             try:
                                 rotation_variable = int(indigo.variables[rotation_variable_id].value)
@@ -912,85 +1196,59 @@ class ThreadZigbeeHandler(threading.Thread):
                                 rotation_variable = 0
                             elif rotation_variable > 100:
                                 rotation_variable = 100
-                            zd_dev_internal[ZD_ROTATION_VARIABLE] = rotation_variable
-                            zd_dev_internal[ZD_ROTATION_INITIAL] = rotation_variable
-
-                    # Kick off a one-second timer
-                    try:
-                        if zd_dev.id in self.timers:
-                            self.timers[zd_dev.id].cancel()
-                            del self.timers[zd_dev.id]
-                    except Exception:
-                        pass
+                            zd_dev_internal.rotation_variable = rotation_variable
+                            zd_dev_internal.rotation_initial = rotation_variable
 
-                    self.timers[zd_dev.id] = threading.Timer(1.0, self.process_property_action_idle_timer, [[zd_dev.id, "action"]])
-                    self.timers[zd_dev.id].start()
+                    # Kick off (or push back) a one-second timer to reset the action to idle
+                    self.scheduler.schedule(("action_idle", zd_dev.id), 1.0, self.process_property_action_idle_timer, [zd_dev.id, "action"])
 
-                    zd_dev.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
+                    self.indigo_writer.update_state_image(zd_dev.id, indigo.kStateImageSel.SensorOn)
 
-                    if not bool(zd_dev.pluginProps.get("hideSceneRotaryBroadcast", False)):
+                    if not bool(props.get("hideSceneRotaryBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev.name}\" rotary knob '{rotary_action}' event")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_action_multi_switch(self, zd_dev, json_payload):
+    def process_property_action_multi_switch(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "action" in json_payload:
-                if zd_dev.pluginProps.get("uspMultiSwitchAction", False):
+                if props.get("uspMultiSwitchAction", False):
                     multi_switch_action = json_payload["action"]
                     zd_dev.updateStateOnServer(key="action", value="")  # To force Indigo to recognise a state change
+                    self.state_shadow.update_state(zd_dev, "action", "")
 
                     self.key_value_lists[zd_dev.id].append({'key': "action", 'value': multi_switch_action})
                     self.key_value_lists[zd_dev.id].append({'key': 'lastAction', 'value': multi_switch_action, 'uiValue': multi_switch_action})
 
-                    # Kick off a one-second timer
-                    try:
-                        if zd_dev.id in self.timers:
-                            self.timers[zd_dev.id].cancel()
-                            del self.timers[zd_dev.id]
-                    except Exception:
-                        pass
+                    # Kick off (or push back) a one-second timer to reset the action to idle
+                    self.scheduler.schedule(("action_idle", zd_dev.id), 1.0, self.process_property_action_idle_timer, [zd_dev.id, "action"])
 
-                    self.timers[zd_dev.id] = threading.Timer(1.0, self.process_property_action_idle_timer, [[zd_dev.id, "action"]])
-                    self.timers[zd_dev.id].start()
+                    self.indigo_writer.update_state_image(zd_dev.id, indigo.kStateImageSel.SensorOn)
 
-                    zd_dev.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
-
-                    if not bool(zd_dev.pluginProps.get("hideMultiSwitchActionBroadcast", False)):
+                    if not bool(props.get("hideMultiSwitchActionBroadcast", False)):
                         self.zigbeeLogger.info(f"received \"{zd_dev.name}\" multi-switch '{multi_switch_action}' event")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_action_switch(self, zd_dev, json_payload):
+    def process_property_action_switch(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "action" in json_payload:
-                if zd_dev.pluginProps.get("uspSwitchAction", False):
+                if props.get("uspSwitchAction", False):
                     multi_switch_action = json_payload["action"]
                     zd_dev.updateStateOnServer(key="action", value="")  # To force Indigo to recognise a state change
+                    self.state_shadow.update_state(zd_dev, "action", "")
 
                     self.key_value_lists[zd_dev.id].append({'key': "action", 'value': multi_switch_action})
                     self.key_value_lists[zd_dev.id].append({'key': 'lastAction', 'value': multi_switch_action, 'uiValue': multi_switch_action})
 
-                    # Kick off a one-second timer
-                    try:
-                        if zd_dev.id in self.timers:
-                            self.timers[zd_dev.id].cancel()
-                            del self.timers[zd_dev.id]
-                    except Exception:
-                        pass
-
-                    self.timers[zd_dev.id] = threading.Timer(1.0, self.process_property_action_idle_timer, [[zd_dev.id, "action"]])
-                    self.timers[zd_dev.id].start()
+                    # Kick off (or push back) a one-second timer to reset the action to idle
+                    self.scheduler.schedule(("action_idle", zd_dev.id), 1.0, self.process_property_action_idle_timer, [zd_dev.id, "action"])
 
-                    zd_dev.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
+                    self.indigo_writer.update_state_image(zd_dev.id, indigo.kStateImageSel.SensorOn)
 
-                    if not bool(zd_dev.pluginProps.get("hideSwitchActionBroadcast", False)):
+                    if not bool(props.get("hideSwitchActionBroadcast", False)):
                         self.zigbeeLogger.info(f"received \"{zd_dev.name}\" switch '{multi_switch_action}' event")
 
         except Exception as exception_error:
@@ -999,35 +1257,29 @@ class ThreadZigbeeHandler(threading.Thread):
     def process_property_action_idle_timer(self, parameters):
         try:
             zd_dev_id = parameters[0]
-            zd_dev = indigo.devices[zd_dev_id]
+            zd_dev = self.device_cache.device(zd_dev_id)
 
             # self.zigbeeLogger.warning(f"Timer for {zd_dev.name} [{zd_dev.address}] invoked for set_idle")
-            try:
-                if zd_dev_id in self.timers:
-                    self.timers[zd_dev.id].cancel()
-                del self.timers[zd_dev.id]
-            except Exception:
-                pass
 
             button_state_id = parameters[1]
-            zd_dev.updateStateOnServer(button_state_id, "idle")
-            zd_dev.updateStateImageOnServer(indigo.kStateImageSel.SensorOff)
+            key_value_list = self.state_shadow.changed_states(zd_dev, [{'key': button_state_id, 'value': "idle"}])
+            if len(key_value_list) > 0:
+                self.indigo_writer.update_states(zd_dev.id, key_value_list)
+            self.indigo_writer.update_state_image(zd_dev.id, indigo.kStateImageSel.SensorOff)
 
             # TODO: Kick off timer to change state to "idle" + set UI image
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_angles(self, zd_dev, json_payload):
+    def process_property_angles(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
-            if zd_dev.pluginProps.get("uspAngles", False):
+            if props.get("uspAngles", False):
                 angles_broadcast_ui = ""
 
                 angle = json_payload.get("angle", None)
                 try:
-                    zd_dev_state_angle = int(zd_dev.states["angle"])
+                    zd_dev_state_angle = int(self.state_shadow.states(zd_dev)["angle"])
                 except ValueError:
                     zd_dev_state_angle = 0
                 if angle is not None and int(angle) != zd_dev_state_angle:
@@ -1036,7 +1288,7 @@ class ThreadZigbeeHandler(threading.Thread):
 
                 angle_x = json_payload.get("angle_x", None)
                 try:
-                    zd_dev_state_angle_x = int(zd_dev.states["angle_x"])
+                    zd_dev_state_angle_x = int(self.state_shadow.states(zd_dev)["angle_x"])
                 except ValueError:
                     zd_dev_state_angle_x = 0
                 if angle_x is not None and int(angle_x) != zd_dev_state_angle_x:
@@ -1045,7 +1297,7 @@ class ThreadZigbeeHandler(threading.Thread):
 
                 angle_x_absolute = json_payload.get("angle_x_absolute", None)
                 try:
-                    zd_dev_state_angle_x_absolute = int(zd_dev.states["angle_x_absolute"])
+                    zd_dev_state_angle_x_absolute = int(self.state_shadow.states(zd_dev)["angle_x_absolute"])
                 except ValueError:
                     zd_dev_state_angle_x_absolute = 0
                 if angle_x_absolute is not None and int(angle_x_absolute) != zd_dev_state_angle_x_absolute:
@@ -1054,7 +1306,7 @@ class ThreadZigbeeHandler(threading.Thread):
 
                 angle_y = json_payload.get("angle_y", None)
                 try:
-                    zd_dev_state_angle_y = int(zd_dev.states["angle_y"])
+                    zd_dev_state_angle_y = int(self.state_shadow.states(zd_dev)["angle_y"])
                 except ValueError:
                     zd_dev_state_angle_y = 0
                 if angle_y is not None and int(angle_y) != zd_dev_state_angle_y:
@@ -1063,7 +1315,7 @@ class ThreadZigbeeHandler(threading.Thread):
 
                 angle_y_absolute = json_payload.get("angle_y_absolute", None)
                 try:
-                    zd_dev_state_angle_y_absolute = int(zd_dev.states["angle_y_absolute"])
+                    zd_dev_state_angle_y_absolute = int(self.state_shadow.states(zd_dev)["angle_y_absolute"])
                 except ValueError:
                     zd_dev_state_angle_y_absolute = 0
                 if angle_y_absolute is not None and int(angle_y_absolute) != zd_dev_state_angle_y_absolute:
@@ -1072,14 +1324,14 @@ class ThreadZigbeeHandler(threading.Thread):
 
                 angle_z = json_payload.get("angle_z", None)
                 try:
-                    zd_dev_state_angle_z = int(zd_dev.states["angle_z"])
+                    zd_dev_state_angle_z = int(self.state_shadow.states(zd_dev)["angle_z"])
                 except ValueError:
                     zd_dev_state_angle_z = 0
                 if angle_z is not None and int(angle_z) != zd_dev_state_angle_z:
                     self.key_value_lists[zd_dev.id].append({'key': "angle_z", 'value': angle_z})
                     angles_broadcast_ui = f"{angles_broadcast_ui} Angle_Z: {angle_z},"
 
-                if not bool(zd_dev.pluginProps.get("hideAnglesBroadcast", False)):
+                if not bool(props.get("hideAnglesBroadcast", False)):
                     if len(angles_broadcast_ui) > 0:
                         if angles_broadcast_ui[-1] == ",":
                             angles_broadcast_ui = angles_broadcast_ui[:-1]
@@ -1088,15 +1340,14 @@ class ThreadZigbeeHandler(threading.Thread):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_rotations(self, zd_dev, json_payload, zd_dev_internal):
+    def process_property_rotations(self, zigbee_coordinator_ieee, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
-            if zd_dev.pluginProps.get("uspRotations", False):
+            zd_dev_internal = self.globals[ZD][zigbee_coordinator_ieee][zd_dev.address]
+            if props.get("uspRotations", False):
                 rotations_broadcast_ui = ""
 
                 try:
-                    zd_dev_state_rotation_angle = int(zd_dev.states["rotation_angle"])
+                    zd_dev_state_rotation_angle = int(self.state_shadow.states(zd_dev)["rotation_angle"])
                 except ValueError:
                     zd_dev_state_rotation_angle = 0
                 action_rotation_angle = json_payload.get("action_rotation_angle", None)
@@ -1107,10 +1358,10 @@ class ThreadZigbeeHandler(threading.Thread):
                             self.key_value_lists[zd_dev.id].append({'key': "rotation_angle", 'value': action_rotation_angle})
                             rotations_broadcast_ui = f"{rotations_broadcast_ui} Rotation Angle: {action_rotation_angle},"
 
-                        rotation_variable_id = int(zd_dev.pluginProps.get("uspRotationVariableId", 0))
+                        rotation_variable_id = int(props.get("uspRotationVariableId", 0))
                         if rotation_variable_id != 0:
                             try:
-                                rotation_factor = int(zd_dev.pluginProps.get("uspRotationVariableFactor", 1))
+                                rotation_factor = int(props.get("uspRotationVariableFactor", 1))
                             except ValueError as exception_error:
                                 rotation_factor = 1
 
@@ -1126,7 +1377,7 @@ class ThreadZigbeeHandler(threading.Thread):
                             action_rotation_change = int(action_rotation_angle / 12)  # action_rotation_angle is multiple of 12
                             action_rotation_change = action_rotation_change * rotation_factor
                             try:
-                                action_rotation_new_value = zd_dev_internal[ZD_ROTATION_INITIAL] + action_rotation_change
+                                action_rotation_new_value = zd_dev_internal.rotation_initial + action_rotation_change
                                 if action_rotation_new_value < 0:
                                     action_rotation_new_value = 0
                                 elif action_rotation_new_value > 100:
@@ -1139,7 +1390,7 @@ class ThreadZigbeeHandler(threading.Thread):
                         pass
 
                 try:
-                    zd_dev_state_rotation_angle_speed = int(zd_dev.states["rotation_angle_speed"])
+                    zd_dev_state_rotation_angle_speed = int(self.state_shadow.states(zd_dev)["rotation_angle_speed"])
                 except ValueError:
                     zd_dev_state_rotation_angle_speed = 0
                 action_rotation_angle_speed = json_payload.get("action_rotation_angle_speed", None)
@@ -1153,7 +1404,7 @@ class ThreadZigbeeHandler(threading.Thread):
                         pass
 
                 try:
-                    zd_dev_state_rotation_percent = int(zd_dev.states["rotation_percent"])
+                    zd_dev_state_rotation_percent = int(self.state_shadow.states(zd_dev)["rotation_percent"])
                 except ValueError:
                     zd_dev_state_rotation_percent = 0
                 action_rotation_percent = json_payload.get("action_rotation_percent", None)
@@ -1167,7 +1418,7 @@ class ThreadZigbeeHandler(threading.Thread):
                         pass
 
                 try:
-                    zd_dev_state_rotation_percent_positive = int(zd_dev.states["rotation_percent_positive"])
+                    zd_dev_state_rotation_percent_positive = int(self.state_shadow.states(zd_dev)["rotation_percent_positive"])
                 except ValueError:
                     zd_dev_state_rotation_percent_positive = 0
                 action_rotation_percent_positive = json_payload.get("action_rotation_percent", None)
@@ -1185,7 +1436,7 @@ class ThreadZigbeeHandler(threading.Thread):
                         pass
 
                 try:
-                    zd_dev_state_rotation_percent_speed = int(zd_dev.states["rotation_percent_speed"])
+                    zd_dev_state_rotation_percent_speed = int(self.state_shadow.states(zd_dev)["rotation_percent_speed"])
                 except ValueError:
                     zd_dev_state_rotation_percent_speed = 0
                 action_rotation_percent_speed = json_payload.get("action_rotation_percent_speed", None)
@@ -1199,7 +1450,7 @@ class ThreadZigbeeHandler(threading.Thread):
                         pass
 
                 try:
-                    zd_dev_state_rotation_time = int(zd_dev.states["rotation_time"])
+                    zd_dev_state_rotation_time = int(self.state_shadow.states(zd_dev)["rotation_time"])
                 except ValueError:
                     zd_dev_state_rotation_time = 0
                 action_rotation_time = json_payload.get("action_rotation_time", None)
@@ -1212,7 +1463,7 @@ class ThreadZigbeeHandler(threading.Thread):
                     except ValueError as exception_error:
                         pass
 
-                if not bool(zd_dev.pluginProps.get("hideRotationsBroadcast", False)):
+                if not bool(props.get("hideRotationsBroadcast", False)):
                     if len(rotations_broadcast_ui) > 0:
                         if rotations_broadcast_ui[-1] == ",":  # Check for and remove trailing comma
                             rotations_broadcast_ui = rotations_broadcast_ui[:-1]
@@ -1221,12 +1472,10 @@ class ThreadZigbeeHandler(threading.Thread):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_battery(self, zd_dev, json_payload):
+    def process_property_battery(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "battery" in json_payload:
-                if zd_dev.pluginProps.get("SupportsBatteryLevel", False):
+                if props.get("SupportsBatteryLevel", False):
                     valid = False
                     try:
                         battery_level = int(json_payload["battery"])
@@ -1241,8 +1490,9 @@ class ThreadZigbeeHandler(threading.Thread):
                             self.zigbeeLogger.warning(
                                 f"received battery level event with an invalid payload of \"{json_payload['battery']}\" for device \"{zd_dev.name}\". Event discarded and ignored.")
                     if valid:
-                        if zd_dev.states["batteryLevel"] != battery_level:  # noqa: reference before assignment
+                        if self.reporting_filter.report(zd_dev.id, zd_dev.id, "batteryLevel", battery_level) and self.state_shadow.states(zd_dev)["batteryLevel"] != battery_level:  # noqa: reference before assignment
                             self.key_value_lists[zd_dev.id].append({'key': 'batteryLevel', 'value': battery_level})
+                            self.reporting_filter.written(zd_dev.id, zd_dev.id, "batteryLevel", battery_level)
                             self.zigbeeLogger.info(f"received \"{zd_dev.name}\" battery level {battery_level}%")
                         else:
                             if self.globals[DEBUG]: self.zigbeeLogger.info(f"received \"{zd_dev.name}\" unchanged battery level: {battery_level}%")
@@ -1250,10 +1500,8 @@ class ThreadZigbeeHandler(threading.Thread):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_brightness(self, zd_dev, json_payload):
+    def process_property_brightness(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "brightness" in json_payload:
                 valid = False
                 try:
@@ -1268,27 +1516,27 @@ class ThreadZigbeeHandler(threading.Thread):
                 except ValueError:
                     self.zigbeeLogger.info(f"received brightness event with an invalid payload of \"{json_payload['brightness']}\" for device \"{zd_dev.name}\". Event discarded and ignored.")
                 if valid:
-                    if "brightnessLevel" in zd_dev.states:
-                        if zd_dev.states["brightnessLevel"] != brightness_100:  # noqa: reference before assignment
+                    if "brightnessLevel" in self.state_shadow.states(zd_dev):
+                        if self.state_shadow.states(zd_dev)["brightnessLevel"] != brightness_100:  # noqa: reference before assignment
                             brighten_dim_ui = "set"
                             if brightness_100 > 0:
-                                if brightness_100 > zd_dev.brightness:
+                                if brightness_100 > self.state_shadow.states(zd_dev).get("brightnessLevel", 0):
                                     brighten_dim_ui = "brighten"
                                 else:
                                     brighten_dim_ui = "dim"
 
                             if brightness_100 > 0:
-                                zd_dev.updateStateImageOnServer(indigo.kStateImageSel.DimmerOn)
+                                self.indigo_writer.update_state_image(zd_dev.id, indigo.kStateImageSel.DimmerOn)
                             else:
-                                zd_dev.updateStateImageOnServer(indigo.kStateImageSel.DimmerOff)
+                                self.indigo_writer.update_state_image(zd_dev.id, indigo.kStateImageSel.DimmerOff)
                             self.key_value_lists[zd_dev.id].append({'key': 'brightnessLevel', 'value': brightness_100, 'uiValue': brightness_100_ui})  # noqa: reference before assignment
-                            if bool(zd_dev.pluginProps.get("SupportsWhite", False)):
+                            if bool(props.get("SupportsWhite", False)):
                                 self.key_value_lists[zd_dev.id].append({'key': 'whiteLevel', 'value': brightness_100})  # noqa: reference before assignment
 
-                            if not bool(zd_dev.pluginProps.get("hideDimmerBroadcast", False)):
+                            if not bool(props.get("hideDimmerBroadcast", False)):
                                 self.zigbeeLogger.info(f"received {brighten_dim_ui} \"{zd_dev.name}\" to brightness level {brightness_100_ui}")
                         else:
-                            if not bool(zd_dev.pluginProps.get("hideDimmerBroadcast", False)):
+                            if not bool(props.get("hideDimmerBroadcast", False)):
                                 if self.globals[DEBUG]: self.zigbeeLogger.info(f"received \"{zd_dev.name}\" unchanged brightness level {brightness_100_ui}")  # noqa: reference before assignment
                     else:
                         self.zigbeeLogger.error(f"received \"{zd_dev.name}\" status update of \"{brightness_100_ui}\" for missing brightnessLevel state.")  # noqa: reference before assignment
@@ -1296,10 +1544,8 @@ class ThreadZigbeeHandler(threading.Thread):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_color(self, zd_dev, json_payload):
+    def process_property_color(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if ("color_mode" in json_payload and json_payload["color_mode"] != "color_temp") and "color" in json_payload and "brightness" in json_payload:
                 valid = False
                 color_mode = json_payload["color_mode"]
@@ -1324,71 +1570,32 @@ class ThreadZigbeeHandler(threading.Thread):
                 if valid:
                     try:
                         if color_mode == "xy":
-                            # convert x and y to RGB Start . . .
-                            z_value = 1.0
-                            observer_value = '10'
-                            xyz_color = xyYColor(x, y, z_value, observer=observer_value)
-                            rgb = convert_color(xyz_color, sRGBColor)
-                            rgb_tuple = rgb.get_value_tuple()
-
-                            rgb_tuple_red = rgb_tuple[0]
-                            rgb_tuple_green = rgb_tuple[1]
-                            rgb_tuple_blue = rgb_tuple[2]
-
-                            if rgb_tuple_red > 1.0:
-                                rgb_tuple_red = 1.0
-                            if rgb_tuple_green > 1.0:
-                                rgb_tuple_green = 1.0
-                            if rgb_tuple_blue > 1.0:
-                                rgb_tuple_blue = 1.0
-
-                            # native_red = rgb_tuple_red * 255
-                            # native_green = rgb_tuple_green * 255
-                            # native_blue = rgb_tuple_blue * 255
-
-                            # Convert to Indigo RGB values (0 - 100)
-                            red = int(rgb_tuple_red * 100)
-                            green = int(rgb_tuple_green * 100)
-                            blue = int(rgb_tuple_blue * 100)
-
-                            # . . . convert x and y to RGB End
+                            red, green, blue = xy_to_indigo_rgb(x, y)  # Indigo RGB values (0 - 100)
                         else:
-                            hue_for_colorsys = float(hue) / 360.0  # noqa: reference before assignment
-                            saturation_for_colorsys = float(saturation) / 255.0  # noqa: reference before assignment
-                            value_for_colorsys = float(brightness) / 255.0  # noqa: reference before assignment
-                            red, green, blue = colorsys.hsv_to_rgb(hue_for_colorsys, saturation_for_colorsys, value_for_colorsys)
-                            red = int(red * 100.0)
-                            green = int(green * 100.0)
-                            blue = int(blue * 100.0)
+                            red, green, blue = hsv_to_indigo_rgb(hue, saturation, brightness)  # noqa: reference before assignment
                     except Exception:  # noqa: too wide exception
                         return
 
-                    self.key_value_lists[zd_dev.id].append({"key": "redLevel", "value": red})
-                    self.key_value_lists[zd_dev.id].append({"key": "greenLevel", "value": green})
-                    self.key_value_lists[zd_dev.id].append({"key": "blueLevel", "value": blue})
-
-                    if (zd_dev.states["redLevel"] != red or
-                        zd_dev.states["greenLevel"] != green or
-                        zd_dev.states["blueLevel"] != blue):  # noqa: reference before assignment
+                    if (self.state_shadow.states(zd_dev)["redLevel"] != red or
+                        self.state_shadow.states(zd_dev)["greenLevel"] != green or
+                        self.state_shadow.states(zd_dev)["blueLevel"] != blue):  # noqa: reference before assignment
 
                         self.key_value_lists[zd_dev.id].append({"key": "redLevel", "value": red})
                         self.key_value_lists[zd_dev.id].append({"key": "greenLevel", "value": green})
                         self.key_value_lists[zd_dev.id].append({"key": "blueLevel", "value": blue})
-                        if not bool(zd_dev.pluginProps.get("hideDimmerBroadcast", False)):
+                        if not bool(props.get("hideDimmerBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev.name}\" color update of R={red}%, G={green}%, B={blue}%")
-                            # self.zigbeeLogger.info(f"previous \"{zd_dev.name}\" color values were R={int(zd_dev.states['redLevel'])}%, G={int(zd_dev.states['greenLevel'])}%, B={int(zd_dev.states['blueLevel'])}%")
+                            # self.zigbeeLogger.info(f"previous \"{zd_dev.name}\" color values were R={int(self.state_shadow.states(zd_dev)['redLevel'])}%, G={int(self.state_shadow.states(zd_dev)['greenLevel'])}%, B={int(self.state_shadow.states(zd_dev)['blueLevel'])}%")
                     else:
-                        if not bool(zd_dev.pluginProps.get("hideDimmerBroadcast", False)):
+                        if not bool(props.get("hideDimmerBroadcast", False)):
                             pass
                             if self.globals[DEBUG]: self.zigbeeLogger.info(f"received \"{zd_dev.name}\" unchanged color update of R={red}%, G={green}%, B={blue}%")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_color_mode(self, zd_dev, json_payload):
+    def process_property_color_mode(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "color_mode" in json_payload:
                 valid = False
                 try:
@@ -1408,10 +1615,8 @@ class ThreadZigbeeHandler(threading.Thread):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_color_temp(self, zd_dev, json_payload):
+    def process_property_color_temp(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "color_mode" in json_payload and json_payload["color_mode"] == "color_temp" and "color_temp" in json_payload and "brightness" in json_payload:
                 valid = False
                 try:
@@ -1423,68 +1628,65 @@ class ThreadZigbeeHandler(threading.Thread):
                 except ValueError:
                     self.zigbeeLogger.info(f"received color event with an invalid payload of \"{json_payload['brightness']}\" for device \"{zd_dev.name}\". Event discarded and ignored.")
                 if valid:
-                    if zd_dev.states["whiteTemperature"] != white_temperature:  # noqa: reference before assignment
+                    if self.state_shadow.states(zd_dev)["whiteTemperature"] != white_temperature:  # noqa: reference before assignment
                         self.key_value_lists[zd_dev.id].append({"key": "whiteTemperature", "value": white_temperature, "uiValue": white_temperature_ui})  # noqa: reference before assignment
-                        if not bool(zd_dev.pluginProps.get("hideDimmerBroadcast", False)):
+                        if not bool(props.get("hideDimmerBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev.name}\" white temperature update of {white_temperature_ui}")
-                            # self.zigbeeLogger.info(f"previous \"{zd_dev.name}\" white temperature value was {int(zd_dev.states['whiteTemperature'])}°K")
+                            # self.zigbeeLogger.info(f"previous \"{zd_dev.name}\" white temperature value was {int(self.state_shadow.states(zd_dev)['whiteTemperature'])}°K")
                     else:
                         if self.globals[DEBUG]: self.zigbeeLogger.info(f"received \"{zd_dev.name}\" unchanged white temperature update of {white_temperature_ui}")  # noqa: reference before assignment
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_contact(self, zd_dev, json_payload):
+    def process_property_contact(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "contact" in json_payload:
-                if zd_dev.pluginProps.get("uspContact", False):
+                if props.get("uspContact", False):
                     on_off_state = False if json_payload["contact"] == True else True
                     on_off_state_ui = "closed" if json_payload["contact"] == True else "open"
-                    if zd_dev.states["onOffState"] != on_off_state:
+                    if self.state_shadow.states(zd_dev)["onOffState"] != on_off_state:
                         self.key_value_lists[zd_dev.id].append({'key': 'onOffState', 'value': on_off_state, 'uiValue': on_off_state_ui})
-                        if not bool(zd_dev.pluginProps.get("hideContactBroadcast", False)):
+                        if not bool(props.get("hideContactBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev.name}\" contact sensor {on_off_state_ui} event")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_energy(self, zd_dev, json_payload):
+    def process_property_energy(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "energy" in json_payload:
-                if zd_dev.pluginProps.get("uspEnergy", False):
-                    energy_units_ui = f" {zd_dev.pluginProps.get('uspEnergyUnits', '')}"
+                if props.get("uspEnergy", False):
+                    energy_units_ui = f" {props.get('uspEnergyUnits', '')}"
                     try:
                         energy = float(json_payload["energy"])
                     except ValueError:
                         return
-                    if "accumEnergyTotal" in zd_dev.states:
-                        decimal_places = int(zd_dev.pluginProps.get("uspEnergyDecimalPlaces", 0))
+                    if "accumEnergyTotal" in self.state_shadow.states(zd_dev):
+                        decimal_places = int(props.get("uspEnergyDecimalPlaces", 0))
                         value, uiValue = self.processDecimalPlaces(energy, decimal_places, energy_units_ui, INDIGO_NO_SPACE_BEFORE_UNITS)
-                        if zd_dev.states["accumEnergyTotal"] != value:  # noqa: reference before assignment
+                        if self.reporting_filter.report(zd_dev.id, zd_dev.id, "accumEnergyTotal", value, {'key': 'accumEnergyTotal', 'value': value, 'uiValue': uiValue}) and self.state_shadow.states(zd_dev)["accumEnergyTotal"] != value:  # noqa: reference before assignment
                             self.key_value_lists[zd_dev.id].append({'key': 'accumEnergyTotal', 'value': value, 'uiValue': uiValue})
-                            if not bool(zd_dev.pluginProps.get("hideEnergyBroadcast", False)):
+                            self.reporting_filter.written(zd_dev.id, zd_dev.id, "accumEnergyTotal", value)
+                            if not bool(props.get("hideEnergyBroadcast", False)):
                                 self.zigbeeLogger.info(f"received \"{zd_dev.name}\" accumulated energy total update to {uiValue}")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_humidity(self, zd_dev, json_payload):
+    def process_property_humidity(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.pluginProps.get("uspHumidity", False) or not "humidity" in json_payload:
+            if not props.get("uspHumidity", False) or not "humidity" in json_payload:
                 return
 
-            uspHumidityIndigo = zd_dev.pluginProps.get("uspHumidityIndigo", INDIGO_PRIMARY_DEVICE_ADDITIONAL_STATE)
+            uspHumidityIndigo = props.get("uspHumidityIndigo", INDIGO_PRIMARY_DEVICE_ADDITIONAL_STATE)
             zd_dev_to_process = zd_dev
             update_secondary_device = False
             state_to_update = "humidity"  # Primary device
-            secondary_dev_id = zd_dev.pluginProps.get("secondaryDeviceHumiditySensor", 0)  # Returns int zero if no secondary humidity device
+            secondary_dev_id = props.get("secondaryDeviceHumiditySensor", 0)  # Returns int zero if no secondary humidity device
             if uspHumidityIndigo == INDIGO_SECONDARY_DEVICE and secondary_dev_id != 0:  # noqa: Duplicate code
-                if secondary_dev_id in indigo.devices:
-                    zd_dev_to_process = indigo.devices[secondary_dev_id]
+                if self.device_cache.exists(secondary_dev_id):
+                    zd_dev_to_process = self.device_cache.device(secondary_dev_id)
                     update_secondary_device = True
                     state_to_update = "sensorValue"  # Secondary device
 
@@ -1506,17 +1708,18 @@ class ThreadZigbeeHandler(threading.Thread):
                 valid = False
 
             if valid:
-                decimal_places = int(zd_dev.pluginProps.get("uspHumidityDecimalPlaces", 0))
+                decimal_places = int(props.get("uspHumidityDecimalPlaces", 0))
                 humidity_value, ui_humidity_value = self.processDecimalPlaces(humidity, decimal_places, "%", INDIGO_ONE_SPACE_BEFORE_UNITS)  # noqa: reference before assignment
-                if state_to_update in zd_dev_to_process.states:
-                    if zd_dev_to_process.states[state_to_update] != humidity:  # noqa: Reference bdeore assignment
+                if state_to_update in self.state_shadow.states(zd_dev_to_process):
+                    if self.reporting_filter.report(zd_dev.id, zd_dev_to_process.id, state_to_update, humidity_value, {'key': state_to_update, 'value': humidity_value, 'uiValue': ui_humidity_value}) and self.state_shadow.states(zd_dev_to_process)[state_to_update] != humidity:  # noqa: Reference bdeore assignment
                         if state_to_update == "sensorValue":
-                            zd_dev_to_process.updateStateImageOnServer(indigo.kStateImageSel.HumiditySensor)
+                            self.indigo_writer.update_state_image(zd_dev_to_process.id, indigo.kStateImageSel.HumiditySensor)
                         self.key_value_lists[zd_dev_to_process.id].append({'key': state_to_update, 'value': humidity_value, 'uiValue': ui_humidity_value})
-                        if not bool(zd_dev.pluginProps.get("hideHumidityBroadcast", False)):
+                        self.reporting_filter.written(zd_dev.id, zd_dev_to_process.id, state_to_update, humidity_value)
+                        if not bool(props.get("hideHumidityBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev_to_process.name}\" humidity level {ui_humidity_value}")
                     else:
-                        if not bool(zd_dev.pluginProps.get("hideHumidityBroadcast", False)):
+                        if not bool(props.get("hideHumidityBroadcast", False)):
                             if self.globals[DEBUG]: self.zigbeeLogger.info(f"received \"{zd_dev_to_process.name}\" unchanged humidity level {ui_humidity_value}")
                 else:
                     self.zigbeeLogger.error(f"received \"{zd_dev_to_process.name}\" status update of \"{ui_humidity_value}\" for missing humidity state.")
@@ -1524,22 +1727,22 @@ class ThreadZigbeeHandler(threading.Thread):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_illuminance(self, zd_dev, json_payload):
+    def process_property_illuminance(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.pluginProps.get("uspIlluminance", False):
+            if not props.get("uspIlluminance", False):
                 return
 
             if not "illuminance" in json_payload and not "illuminance_lux" in json_payload:
                 return
 
-            uspIlluminanceIndigo = zd_dev.pluginProps.get("uspIlluminanceIndigo", INDIGO_PRIMARY_DEVICE_ADDITIONAL_STATE)
+            uspIlluminanceIndigo = props.get("uspIlluminanceIndigo", INDIGO_PRIMARY_DEVICE_ADDITIONAL_STATE)
             zd_dev_to_process = zd_dev
             update_secondary_device = False
             state_to_update = "illuminance"  # Primary device
-            secondary_dev_id = zd_dev.pluginProps.get("secondaryDeviceIlluminanceSensor", 0)  # Returns int zero if no secondary illuminance device
+            secondary_dev_id = props.get("secondaryDeviceIlluminanceSensor", 0)  # Returns int zero if no secondary illuminance device
             if uspIlluminanceIndigo == INDIGO_SECONDARY_DEVICE and secondary_dev_id != 0:  # noqa: Duplicate code
-                if secondary_dev_id in indigo.devices:
-                    zd_dev_to_process = indigo.devices[secondary_dev_id]
+                if self.device_cache.exists(secondary_dev_id):
+                    zd_dev_to_process = self.device_cache.device(secondary_dev_id)
                     update_secondary_device = True
                     state_to_update = "sensorValue"  # Secondary device
 
@@ -1569,18 +1772,19 @@ class ThreadZigbeeHandler(threading.Thread):
                 valid = False
 
             if valid:
-                decimal_places = int(zd_dev.pluginProps.get("uspIlluminanceDecimalPlaces", 0))
-                illuminance_units_ui = zd_dev.pluginProps.get("uspIlluminanceUnits", "")
+                decimal_places = int(props.get("uspIlluminanceDecimalPlaces", 0))
+                illuminance_units_ui = props.get("uspIlluminanceUnits", "")
                 illuminance_value, ui_illuminance_value = self.processDecimalPlaces(illuminance, decimal_places, illuminance_units_ui, INDIGO_ONE_SPACE_BEFORE_UNITS)  # noqa: reference before assignment
-                if state_to_update in zd_dev_to_process.states:
-                    if zd_dev_to_process.states[state_to_update] != illuminance:  # noqa: Reference bdeore assignment
+                if state_to_update in self.state_shadow.states(zd_dev_to_process):
+                    if self.reporting_filter.report(zd_dev.id, zd_dev_to_process.id, state_to_update, illuminance_value, {'key': state_to_update, 'value': illuminance_value, 'uiValue': ui_illuminance_value}) and self.state_shadow.states(zd_dev_to_process)[state_to_update] != illuminance:  # noqa: Reference bdeore assignment
                         if state_to_update == "sensorValue":
-                            zd_dev_to_process.updateStateImageOnServer(indigo.kStateImageSel.LightSensor)
+                            self.indigo_writer.update_state_image(zd_dev_to_process.id, indigo.kStateImageSel.LightSensor)
                         self.key_value_lists[zd_dev_to_process.id].append({'key': state_to_update, 'value': illuminance_value, 'uiValue': ui_illuminance_value})
-                        if not bool(zd_dev.pluginProps.get("hideIlluminanceBroadcast", False)):
+                        self.reporting_filter.written(zd_dev.id, zd_dev_to_process.id, state_to_update, illuminance_value)
+                        if not bool(props.get("hideIlluminanceBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev_to_process.name}\" illuminance {ui_illuminance_value}")
                     else:
-                        if not bool(zd_dev.pluginProps.get("hideIlluminanceBroadcast", False)):
+                        if not bool(props.get("hideIlluminanceBroadcast", False)):
                             if self.globals[DEBUG]: self.zigbeeLogger.info(f"received \"{zd_dev_to_process.name}\" unchanged illuminance {ui_illuminance_value}")
                 else:
                     self.zigbeeLogger.error(f"received \"{zd_dev_to_process.name}\" status update of \"{ui_illuminance_value}\" for missing illuminance state.")
@@ -1588,22 +1792,26 @@ class ThreadZigbeeHandler(threading.Thread):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_topic_last_seen(self, zd_dev, json_payload):
+    def process_topic_last_seen(self, zd_dev, zd_dev_internal, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
-
             if "last_seen" in json_payload:
                 valid = False
                 try:
                     ts = int(json_payload["last_seen"]) / 1000
-                    last_seen = datetime.datetime.utcfromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
                     valid = True
                 except ValueError:
                     self.zigbeeLogger.info(f"received last_seen event with an invalid payload of \"{json_payload['last_seen']}\" for device \"{zd_dev.name}\". Event discarded and ignored.")
                 if valid:
-                    if "last_seen" in zd_dev.states:
-                        if zd_dev.states["last_seen"] != last_seen:  # noqa: reference before assignment
+                    if ts <= zd_dev_internal.get(ZD_LAST_SEEN, 0.0):
+                        return  # Not later than the time already held (e.g. a message processed out of order) - last seen never moves backwards
+                    zd_dev_internal.last_seen = ts  # Exact time last seen (seconds since epoch) is always held in memory
+                    # The 'last_seen' state is only updated if the update interval has passed since it was last updated
+                    if ts - zd_dev_internal.get(ZD_LAST_SEEN_WRITTEN, 0.0) < self.globals[LAST_SEEN_UPDATE_INTERVAL]:  # noqa: reference before assignment
+                        return
+                    last_seen = _format_last_seen(int(ts))
+                    if "last_seen" in self.state_shadow.states(zd_dev):
+                        if self.state_shadow.states(zd_dev)["last_seen"] != last_seen:  # noqa: reference before assignment
+                            zd_dev_internal.last_seen_written = ts
                             self.key_value_lists[zd_dev.id].append({'key': 'last_seen', 'value': last_seen})
                             # self.key_value_lists[zd_dev.id].append({'key': 'id', 'value': last_seen})  #TODO: Remove - SQL Logger Test
                             if self.globals[DEBUG]: self.zigbeeLogger.info(f"received \"{zd_dev.name}\" last seen {last_seen}")
@@ -1613,25 +1821,25 @@ class ThreadZigbeeHandler(threading.Thread):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_link_quality(self, zd_dev, json_payload):
+    def process_property_link_quality(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "linkquality" in json_payload:
-                if zd_dev.pluginProps.get("uspLinkQuality", False):
+                if props.get("uspLinkQuality", False):
                     linkquality = json_payload["linkquality"]
-                    self.key_value_lists[zd_dev.id].append({'key': 'linkQuality', 'value': linkquality})
+                    if self.reporting_filter.report(zd_dev.id, zd_dev.id, "linkQuality", linkquality) and self.state_shadow.states(zd_dev).get("linkQuality", None) != linkquality:
+                        self.key_value_lists[zd_dev.id].append({'key': 'linkQuality', 'value': linkquality})
+                        self.reporting_filter.written(zd_dev.id, zd_dev.id, "linkQuality", linkquality)
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_multi_state(self, zd_dev, json_payload):
+    def process_property_multi_state(self, zd_dev, props, json_payload):
         try:
             if "state_l1" in json_payload and zd_dev.enabled:
                 on_off_state = True if json_payload["state_l1"] == "ON" else False
                 on_off_state_ui = "on" if on_off_state else "off"
-                if (zd_dev.states["onOffState"] != on_off_state) or ("onOffState.ui" in zd_dev.states and (zd_dev.states["onOffState.ui"] != on_off_state_ui)):
+                if (self.state_shadow.states(zd_dev)["onOffState"] != on_off_state) or ("onOffState.ui" in self.state_shadow.states(zd_dev) and (self.state_shadow.states(zd_dev)["onOffState.ui"] != on_off_state_ui)):
                     self.key_value_lists[zd_dev.id].append({'key': 'onOffState', 'value': on_off_state, 'uiValue': on_off_state_ui})
-                    if not bool(zd_dev.pluginProps.get(f"hideStateL1Broadcast", False)):
+                    if not bool(props.get(f"hideStateL1Broadcast", False)):
                         self.zigbeeLogger.info(f"received \"{zd_dev.name}\" state L1 [On|off] '{on_off_state_ui}' event")
                 else:
                     if self.globals[DEBUG]: self.zigbeeLogger.info(f"received \"{zd_dev.name}\" unchanged state L1 [On|off] {on_off_state_ui} event")
@@ -1640,9 +1848,9 @@ class ThreadZigbeeHandler(threading.Thread):
                 if "state_left" in json_payload and zd_dev.enabled:
                     on_off_state = True if json_payload["state_left"] == "ON" else False
                     on_off_state_ui = "on" if on_off_state else "off"
-                    if (zd_dev.states["onOffState"] != on_off_state) or ("onOffState.ui" in zd_dev.states and (zd_dev.states["onOffState.ui"] != on_off_state_ui)):
+                    if (self.state_shadow.states(zd_dev)["onOffState"] != on_off_state) or ("onOffState.ui" in self.state_shadow.states(zd_dev) and (self.state_shadow.states(zd_dev)["onOffState.ui"] != on_off_state_ui)):
                         self.key_value_lists[zd_dev.id].append({'key': 'onOffState', 'value': on_off_state, 'uiValue': on_off_state_ui})
-                        if not bool(zd_dev.pluginProps.get(f"hideStateLeftBroadcast", False)):
+                        if not bool(props.get(f"hideStateLeftBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev.name}\" state Left [On|off] '{on_off_state_ui}' event")
                     else:
                         if self.globals[DEBUG]: self.zigbeeLogger.info(f"received \"{zd_dev.name}\" unchanged state Left [On|off] {on_off_state_ui} event")
@@ -1670,9 +1878,9 @@ class ThreadZigbeeHandler(threading.Thread):
                         secondary_device_id_property_key = f"secondaryDeviceMultiOutlet{switch}"
                     else:
                         return
-                    secondary_dev_id = zd_dev.pluginProps.get(secondary_device_id_property_key, 0)
+                    secondary_dev_id = props.get(secondary_device_id_property_key, 0)
                     # TODO: Check for zero
-                    secondary_dev = indigo.devices[secondary_dev_id]
+                    secondary_dev = self.device_cache.device(secondary_dev_id)
                     if not secondary_dev.enabled:
                         return
                     if switch == "state_right":
@@ -1691,10 +1899,10 @@ class ThreadZigbeeHandler(threading.Thread):
                         on_off_state = True if json_payload[secondary_state_name] == "ON" else False
                         on_off_state_ui = "on" if on_off_state else "off"
 
-                        if (secondary_dev.states["onOffState"] != on_off_state) or ("onOffState.ui" in secondary_dev.states and (secondary_dev.states["onOffState.ui"] != on_off_state_ui)):
+                        if (self.state_shadow.states(secondary_dev)["onOffState"] != on_off_state) or ("onOffState.ui" in self.state_shadow.states(secondary_dev) and (self.state_shadow.states(secondary_dev)["onOffState.ui"] != on_off_state_ui)):
                             self.key_value_lists[secondary_dev_id].append({'key': 'onOffState', 'value': on_off_state, 'uiValue': on_off_state_ui})
                             broadcast_property_name = f"hideState{secondary_state_name_ui}Broadcast"
-                            if not bool(zd_dev.pluginProps.get(broadcast_property_name, False)):
+                            if not bool(props.get(broadcast_property_name, False)):
                                 self.zigbeeLogger.info(f"received \"{secondary_dev.name}\" state{secondary_state_name_ui} [On|off] '{on_off_state_ui}' event")
                         else:
                             if self.globals[DEBUG]: self.zigbeeLogger.info(f"received \"{secondary_dev.name}\" unchanged state{secondary_state_name_ui} [On|off] {on_off_state_ui} event")
@@ -1711,9 +1919,9 @@ class ThreadZigbeeHandler(threading.Thread):
                         secondary_device_id_property_key = f"secondaryDeviceMultiDimmer{dimmer}"
                     else:
                         return
-                    secondary_dev_id = zd_dev.pluginProps.get(secondary_device_id_property_key, 0)
+                    secondary_dev_id = props.get(secondary_device_id_property_key, 0)
                     # TODO: Check for zero
-                    secondary_dev = indigo.devices[secondary_dev_id]
+                    secondary_dev = self.device_cache.device(secondary_dev_id)
                     if not secondary_dev.enabled:
                         return
                     secondary_state_name = f"brightness_l{switch}"
@@ -1732,26 +1940,26 @@ class ThreadZigbeeHandler(threading.Thread):
                         except ValueError:
                             self.zigbeeLogger.info(f"received brightness event with an invalid payload of \"{json_payload['brightness']}\" for device \"{secondary_dev.name}\". Event discarded and ignored.")
                         if valid:
-                            if "brightnessLevel" in secondary_dev.states:
-                                if secondary_dev.states["brightnessLevel"] != brightness_100:  # noqa: reference before assignment
+                            if "brightnessLevel" in self.state_shadow.states(secondary_dev):
+                                if self.state_shadow.states(secondary_dev)["brightnessLevel"] != brightness_100:  # noqa: reference before assignment
                                     brighten_dim_ui = "set"
                                     if brightness_100 > 0:
-                                        if brightness_100 > secondary_dev.brightness:
+                                        if brightness_100 > self.state_shadow.states(secondary_dev).get("brightnessLevel", 0):
                                             brighten_dim_ui = "brighten"
                                         else:
                                             brighten_dim_ui = "dim"
                                     if brightness_100 > 0:
-                                        secondary_dev.updateStateImageOnServer(indigo.kStateImageSel.DimmerOn)
+                                        self.indigo_writer.update_state_image(secondary_dev.id, indigo.kStateImageSel.DimmerOn)
                                     else:
-                                        secondary_dev.updateStateImageOnServer(indigo.kStateImageSel.DimmerOff)
+                                        self.indigo_writer.update_state_image(secondary_dev.id, indigo.kStateImageSel.DimmerOff)
                                     self.key_value_lists[secondary_dev.id].append({'key': 'brightnessLevel', 'value': brightness_100, 'uiValue': brightness_100_ui})  # noqa: reference before assignment
-                                    if bool(zd_dev.pluginProps.get("SupportsWhite", False)):
+                                    if bool(props.get("SupportsWhite", False)):
                                         self.key_value_lists[secondary_dev.id].append({'key': 'whiteLevel', 'value': brightness_100})  # noqa: reference before assignment
 
-                                    if not bool(secondary_dev.pluginProps.get("hideDimmerBroadcast", False)):
+                                    if not bool(self.device_cache.props(secondary_dev_id).get("hideDimmerBroadcast", False)):
                                         self.zigbeeLogger.info(f"received {brighten_dim_ui} \"{secondary_dev.name}\" to brightness level {brightness_100_ui}")
                                 else:
-                                    if not bool(secondary_dev.pluginProps.get("hideDimmerBroadcast", False)):
+                                    if not bool(self.device_cache.props(secondary_dev_id).get("hideDimmerBroadcast", False)):
                                         if self.globals[DEBUG]: self.zigbeeLogger.info(
                                             f"received \"{secondary_dev.name}\" unchanged brightness level {brightness_100_ui}")  # noqa: reference before assignment
                             else:
@@ -1780,26 +1988,22 @@ class ThreadZigbeeHandler(threading.Thread):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_occupancy(self, zd_dev, json_payload):
+    def process_property_occupancy(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "occupancy" in json_payload:
-                if zd_dev.pluginProps.get("uspOccupancy", False):
+                if props.get("uspOccupancy", False):
                     # on_off_state = False if json_payload["occupancy"] == True else True  # TODO: Is this needed?
                     on_off_state_ui = "on" if json_payload["occupancy"] == True else "off"
                     on_off_state = json_payload["occupancy"]
-                    if zd_dev.states["onOffState"] != on_off_state:
+                    if self.state_shadow.states(zd_dev)["onOffState"] != on_off_state:
                         self.key_value_lists[zd_dev.id].append({'key': 'onOffState', 'value': on_off_state, 'uiValue': on_off_state_ui})
-                        if not bool(zd_dev.pluginProps.get("hideMotionBroadcast", False)):
+                        if not bool(props.get("hideMotionBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev.name}\" motion sensor '{on_off_state_ui}' event")
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_position(self, zd_dev, json_payload):
+    def process_property_position(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "position" in json_payload:
                 valid = False
                 try:
@@ -1808,27 +2012,27 @@ class ThreadZigbeeHandler(threading.Thread):
                 except ValueError:
                     self.zigbeeLogger.info(f"received position event with an invalid payload of \"{json_payload['position']}\" for device \"{zd_dev.name}\". Event discarded and ignored.")
                 if valid:
-                    if "brightnessLevel" in zd_dev.states:
-                        if zd_dev.states["brightnessLevel"] != position:  # noqa: reference before assignment
+                    if "brightnessLevel" in self.state_shadow.states(zd_dev):
+                        if self.state_shadow.states(zd_dev)["brightnessLevel"] != position:  # noqa: reference before assignment
                             if position > 0:
                                 position_ui = "open"
-                                zd_dev.updateStateImageOnServer(indigo.kStateImageSel.DimmerOn)
+                                self.indigo_writer.update_state_image(zd_dev.id, indigo.kStateImageSel.DimmerOn)
                             else:
                                 position_ui = "close"
-                                zd_dev.updateStateImageOnServer(indigo.kStateImageSel.DimmerOff)
+                                self.indigo_writer.update_state_image(zd_dev.id, indigo.kStateImageSel.DimmerOff)
                             self.key_value_lists[zd_dev.id].append({'key': 'brightnessLevel', 'value': position, 'uiValue': position_ui})  # noqa: reference before assignment
-                            if not bool(zd_dev.pluginProps.get("hidePositionBroadcast", False)):
+                            if not bool(props.get("hidePositionBroadcast", False)):
                                 if position == 0:
                                     position_ui = "to closed"
                                 elif position == 100:
                                     position_ui = "fully open"
-                                elif position > zd_dev.brightness:
+                                elif position > self.state_shadow.states(zd_dev).get("brightnessLevel", 0):
                                     position_ui = f"opening to position {position}%"
                                 else:
                                     position_ui = f"closing to position {position}%"
                                 self.zigbeeLogger.info(f"received position \"{zd_dev.name}\" {position_ui}")
                         else:
-                            if not bool(zd_dev.pluginProps.get("hidePositionBroadcast", False)):
+                            if not bool(props.get("hidePositionBroadcast", False)):
                                 if self.globals[DEBUG]: self.zigbeeLogger.info(f"received \"{zd_dev.name}\" unchanged position {position}%")  # noqa: reference before assignment
                     else:
                         self.zigbeeLogger.error(f"received \"{zd_dev.name}\" position update of \"{position}\" for missing brightnessLevel state.")  # noqa: reference before assignment
@@ -1836,24 +2040,22 @@ class ThreadZigbeeHandler(threading.Thread):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_power(self, zigbee_coordinator_ieee, zd_dev, json_payload):
+    def process_property_power(self, zigbee_coordinator_ieee, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "power" in json_payload:
-                if zd_dev.pluginProps.get("uspPower", False):
+                if props.get("uspPower", False):
 
-                    power_units_ui = f" {zd_dev.pluginProps.get('uspPowerUnits', '')}"
+                    power_units_ui = f" {props.get('uspPowerUnits', '')}"
                     try:
                         power = float(json_payload["power"])
                     except ValueError:
                         return
-                    minimumPowerLevel = float(zd_dev.pluginProps.get("uspPowerMinimumReportingLevel", 0.0))
-                    reportingPowerHysteresis = float(zd_dev.pluginProps.get("uspPowerReportingHysteresis", 6.0))
+                    minimumPowerLevel = float(props.get("uspPowerMinimumReportingLevel", 0.0))
+                    reportingPowerHysteresis = float(props.get("uspPowerReportingHysteresis", 6.0))
                     if reportingPowerHysteresis > 0.0:  # noqa [Duplicated code fragment!]
                         reportingPowerHysteresis = reportingPowerHysteresis / 2
 
-                    previousPowerLevel = float(self.globals[ZD][zigbee_coordinator_ieee][zd_dev.address].get(ZD_PREVIOUS_POWER_LEVEL, float(zd_dev.states["curEnergyLevel"])))
+                    previousPowerLevel = float(self.globals[ZD][zigbee_coordinator_ieee][zd_dev.address].get(ZD_PREVIOUS_POWER_LEVEL, float(self.state_shadow.states(zd_dev)["curEnergyLevel"])))
 
                     # Determine if power state should be reported depending on hysteresis
                     report_power_state = False
@@ -1872,17 +2074,20 @@ class ThreadZigbeeHandler(threading.Thread):
                     if report_power_state:
                         self.globals[ZD][zigbee_coordinator_ieee][zd_dev.address][ZD_PREVIOUS_POWER_LEVEL] = power
 
-                    decimal_places = int(zd_dev.pluginProps.get("uspPowerDecimalPlaces", 0))
+                    decimal_places = int(props.get("uspPowerDecimalPlaces", 0))
                     value, uiValue = self.processDecimalPlaces(power, decimal_places, power_units_ui, INDIGO_NO_SPACE_BEFORE_UNITS)
-                    self.key_value_lists[zd_dev.id].append({'key': 'curEnergyLevel', 'value': value, 'uiValue': uiValue})
+                    report_filter_state = self.reporting_filter.report(zd_dev.id, zd_dev.id, "curEnergyLevel", value, {'key': 'curEnergyLevel', 'value': value, 'uiValue': uiValue})
+                    if report_filter_state or report_power_state:  # Always written if outside the power reporting hysteresis
+                        self.key_value_lists[zd_dev.id].append({'key': 'curEnergyLevel', 'value': value, 'uiValue': uiValue})
+                        self.reporting_filter.written(zd_dev.id, zd_dev.id, "curEnergyLevel", value)  # Measure the filter from the value written
                     if report_power_state:
-                        if not bool(zd_dev.pluginProps.get("hidePowerBroadcast", False)):
+                        if not bool(props.get("hidePowerBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev.name}\" power update to {uiValue}")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_power_left_right(self, zigbee_coordinator_ieee, zd_dev, json_payload):
+    def process_property_power_left_right(self, zigbee_coordinator_ieee, zd_dev, props, json_payload):
         try:
             power_process_list = list()
 
@@ -1890,26 +2095,26 @@ class ThreadZigbeeHandler(threading.Thread):
                 if zd_dev.enabled:
                     power_process_list.append(("power_left", "Left", zd_dev, ZD_PREVIOUS_POWER_LEVEL_LEFT))
             if "power_right" in json_payload:
-                zd_dev_secondary_id = zd_dev.pluginProps.get("secondaryDeviceMultiSocket", 0)  # Returns int zero if no secondary pressure device
+                zd_dev_secondary_id = props.get("secondaryDeviceMultiSocket", 0)  # Returns int zero if no secondary pressure device
                 if zd_dev_secondary_id != 0:
-                    zd_dev_secondary = indigo.devices[zd_dev_secondary_id]
+                    zd_dev_secondary = self.device_cache.device(zd_dev_secondary_id)
                     if zd_dev_secondary.enabled:
                         power_process_list.append(("power_right", "Right", zd_dev_secondary, ZD_PREVIOUS_POWER_LEVEL_RIGHT))
 
             for json_payload_power_state, side, zd_dev_to_process, zd_previous_power_level_contant in power_process_list:
-                if zd_dev.pluginProps.get(f"uspPower{side}", False):
+                if props.get(f"uspPower{side}", False):
                     usp_power_units = f"uspPower{side}Units"
-                    power_units_ui = f" {zd_dev.pluginProps.get(usp_power_units, '')}"
+                    power_units_ui = f" {props.get(usp_power_units, '')}"
                     try:
                         power = float(json_payload[json_payload_power_state])
                     except ValueError:
                         return
-                    minimumPowerLevel = float(zd_dev.pluginProps.get(f"uspPower{side}MinimumReportingLevel", 0.0))
-                    reportingPowerHysteresis = float(zd_dev.pluginProps.get(f"uspPower{side}ReportingHysteresis", 6.0))
+                    minimumPowerLevel = float(props.get(f"uspPower{side}MinimumReportingLevel", 0.0))
+                    reportingPowerHysteresis = float(props.get(f"uspPower{side}ReportingHysteresis", 6.0))
                     if reportingPowerHysteresis > 0.0:  # noqa [Duplicated code fragment!]
                         reportingPowerHysteresis = reportingPowerHysteresis / 2
 
-                    previousPowerLevel = float(self.globals[ZD][zigbee_coordinator_ieee][zd_dev_to_process.address].get(zd_previous_power_level_contant, float(zd_dev_to_process.states["curEnergyLevel"])))
+                    previousPowerLevel = float(self.globals[ZD][zigbee_coordinator_ieee][zd_dev_to_process.address].get(zd_previous_power_level_contant, float(self.state_shadow.states(zd_dev_to_process)["curEnergyLevel"])))
 
                     # Determine if power state should be reported depending on hysteresis
                     report_power_state = False
@@ -1928,29 +2133,32 @@ class ThreadZigbeeHandler(threading.Thread):
                     if report_power_state:
                         self.globals[ZD][zigbee_coordinator_ieee][zd_dev.address][zd_previous_power_level_contant] = power
 
-                    decimal_places = int(zd_dev.pluginProps.get(f"uspPower{side}DecimalPlaces", 0))
+                    decimal_places = int(props.get(f"uspPower{side}DecimalPlaces", 0))
                     value, uiValue = self.processDecimalPlaces(power, decimal_places, power_units_ui, INDIGO_NO_SPACE_BEFORE_UNITS)
-                    self.key_value_lists[zd_dev_to_process.id].append({'key': 'curEnergyLevel', 'value': value, 'uiValue': uiValue})
+                    report_filter_state = self.reporting_filter.report(zd_dev.id, zd_dev_to_process.id, "curEnergyLevel", value, {'key': 'curEnergyLevel', 'value': value, 'uiValue': uiValue})
+                    if report_filter_state or report_power_state:  # Always written if outside the power reporting hysteresis
+                        self.key_value_lists[zd_dev_to_process.id].append({'key': 'curEnergyLevel', 'value': value, 'uiValue': uiValue})
+                        self.reporting_filter.written(zd_dev.id, zd_dev_to_process.id, "curEnergyLevel", value)  # Measure the filter from the value written
                     if report_power_state:
-                        if not bool(zd_dev.pluginProps.get(f"hidePower{side}Broadcast", False)):
+                        if not bool(props.get(f"hidePower{side}Broadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev_to_process.name}\" power update to {uiValue}")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_pressure(self, zd_dev, json_payload):
+    def process_property_pressure(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.pluginProps.get("uspPressure", False) or not "pressure" in json_payload:
+            if not props.get("uspPressure", False) or not "pressure" in json_payload:
                 return
 
-            uspPressureIndigo = zd_dev.pluginProps.get("uspPressureIndigo", INDIGO_PRIMARY_DEVICE_ADDITIONAL_STATE)
+            uspPressureIndigo = props.get("uspPressureIndigo", INDIGO_PRIMARY_DEVICE_ADDITIONAL_STATE)
             zd_dev_to_process = zd_dev
             update_secondary_device = False
             state_to_update = "pressure"  # Primary device
-            secondary_dev_id = zd_dev.pluginProps.get("secondaryDevicePressureSensor", 0)  # Returns int zero if no secondary pressure device
+            secondary_dev_id = props.get("secondaryDevicePressureSensor", 0)  # Returns int zero if no secondary pressure device
             if uspPressureIndigo == INDIGO_SECONDARY_DEVICE and secondary_dev_id != 0:  # noqa: Duplicate code
-                if secondary_dev_id in indigo.devices:
-                    zd_dev_to_process = indigo.devices[secondary_dev_id]
+                if self.device_cache.exists(secondary_dev_id):
+                    zd_dev_to_process = self.device_cache.device(secondary_dev_id)
                     update_secondary_device = True
                     state_to_update = "sensorValue"  # Secondary device
             if not zd_dev_to_process.enabled:
@@ -1970,16 +2178,17 @@ class ThreadZigbeeHandler(threading.Thread):
                 valid = False
 
             if valid:
-                decimal_places = int(zd_dev.pluginProps.get("uspPressureDecimalPlaces", 0))
-                pressure_units_ui = zd_dev.pluginProps.get("uspPressureUnits", "")
+                decimal_places = int(props.get("uspPressureDecimalPlaces", 0))
+                pressure_units_ui = props.get("uspPressureUnits", "")
                 pressure_value, ui_pressure_value = self.processDecimalPlaces(pressure, decimal_places, pressure_units_ui, INDIGO_ONE_SPACE_BEFORE_UNITS)  # noqa: reference before assignment
-                if state_to_update in zd_dev_to_process.states:
-                    if zd_dev_to_process.states[state_to_update] != pressure_value:  # noqa: Reference before assignment
+                if state_to_update in self.state_shadow.states(zd_dev_to_process):
+                    if self.reporting_filter.report(zd_dev.id, zd_dev_to_process.id, state_to_update, pressure_value, {'key': state_to_update, 'value': pressure_value, 'uiValue': ui_pressure_value}) and self.state_shadow.states(zd_dev_to_process)[state_to_update] != pressure_value:  # noqa: Reference before assignment
                         self.key_value_lists[zd_dev_to_process.id].append({'key': state_to_update, 'value': pressure_value, 'uiValue': ui_pressure_value})
-                        if not bool(zd_dev.pluginProps.get("hidePressureBroadcast", False)):
+                        self.reporting_filter.written(zd_dev.id, zd_dev_to_process.id, state_to_update, pressure_value)
+                        if not bool(props.get("hidePressureBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev_to_process.name}\" pressure level {ui_pressure_value}")
                     else:
-                        if not bool(zd_dev.pluginProps.get("hidePressureBroadcast", False)):
+                        if not bool(props.get("hidePressureBroadcast", False)):
                             if self.globals[DEBUG]: self.zigbeeLogger.info(f"received \"{zd_dev_to_process.name}\" unchanged pressure level {ui_pressure_value}")
                 else:
                     self.zigbeeLogger.error(f"received \"{zd_dev_to_process.name}\" status update of \"{ui_pressure_value}\" for missing pressure state.")
@@ -1987,13 +2196,11 @@ class ThreadZigbeeHandler(threading.Thread):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_radar(self, zd_dev, json_payload):
+    def process_property_radar(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             # Check for Radar [Presence & Presence Event] e.g. Aqara FP1
             if "presence" in json_payload and "presence_event" in json_payload:
-                if zd_dev.pluginProps.get("uspPresence", False) and zd_dev.pluginProps.get("uspPresenceEvent", False):
+                if props.get("uspPresence", False) and props.get("uspPresenceEvent", False):
                     try:
                         on_off_state = bool(json_payload["presence"])  # Can be null on Zigbee2mqtt startup
                     except ValueError:
@@ -2004,52 +2211,50 @@ class ThreadZigbeeHandler(threading.Thread):
                         if presence_event in ["enter", "left_enter", "right_enter", "approach"]:
                             on_off_state = True
                     on_off_state_ui = "on" if on_off_state == True else "off"
-                    if (zd_dev.states["onOffState"] != on_off_state) or (zd_dev.states["presence"] != presence) or (zd_dev.states["presenceEvent"] != presence_event):
+                    if (self.state_shadow.states(zd_dev)["onOffState"] != on_off_state) or (self.state_shadow.states(zd_dev)["presence"] != presence) or (self.state_shadow.states(zd_dev)["presenceEvent"] != presence_event):
                         self.key_value_lists[zd_dev.id].append({'key': 'onOffState', 'value': on_off_state, 'uiValue': on_off_state_ui})
                         self.key_value_lists[zd_dev.id].append({'key': 'presence', 'value': presence})
                         self.key_value_lists[zd_dev.id].append({'key': 'presenceEvent', 'value': presence_event})
-                        if not bool(zd_dev.pluginProps.get("hidePresenceBroadcast", False)):
+                        if not bool(props.get("hidePresenceBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev.name}\" radar sensor '{on_off_state_ui}', presence '{presence}', presence event '{presence_event}'")
 
             # Check for Radar [Presence & Presence Event] e.g. Aqara FP1
             elif "presence" in json_payload:
-                if zd_dev.pluginProps.get("uspPresence", False):
+                if props.get("uspPresence", False):
                     try:
                         on_off_state = bool(json_payload["presence"])  # Can be null on Zigbee2mqtt startup
                     except ValueError:
                         on_off_state = False
                     presence = json_payload["presence"]
                     on_off_state_ui = "on" if on_off_state == True else "off"
-                    if (zd_dev.states["onOffState"] != on_off_state) or (zd_dev.states["presence"] != presence):
+                    if (self.state_shadow.states(zd_dev)["onOffState"] != on_off_state) or (self.state_shadow.states(zd_dev)["presence"] != presence):
                         self.key_value_lists[zd_dev.id].append({'key': 'onOffState', 'value': on_off_state, 'uiValue': on_off_state_ui})
                         self.key_value_lists[zd_dev.id].append({'key': 'presence', 'value': presence})
-                        if not bool(zd_dev.pluginProps.get("hidePresenceBroadcast", False)):
+                        if not bool(props.get("hidePresenceBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev.name}\" radar sensor '{on_off_state_ui}', presence '{presence}'")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_state(self, zd_dev, json_payload):
+    def process_property_state(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "state" in json_payload:
                 if zd_dev.deviceTypeId in ("outlet", "dimmer", "switch", "zigbeeGroupRelay", "zigbeeGroupDimmer"):
-                    if zd_dev.pluginProps.get("uspOnOff", False):
+                    if props.get("uspOnOff", False):
                         on_off_state = True if json_payload["state"] == "ON" else False
                         on_off_state_ui = "on" if on_off_state else "off"
-                        if (zd_dev.states["onOffState"] != on_off_state) or ("onOffState.ui" in zd_dev.states and (zd_dev.states["onOffState.ui"] != on_off_state_ui)):
+                        if (self.state_shadow.states(zd_dev)["onOffState"] != on_off_state) or ("onOffState.ui" in self.state_shadow.states(zd_dev) and (self.state_shadow.states(zd_dev)["onOffState.ui"] != on_off_state_ui)):
                             self.key_value_lists[zd_dev.id].append({'key': 'onOffState', 'value': on_off_state, 'uiValue': on_off_state_ui})
-                            if not bool(zd_dev.pluginProps.get("hideStateBroadcast", False)):
+                            if not bool(props.get("hideStateBroadcast", False)):
                                 self.zigbeeLogger.info(f"received \"{zd_dev.name}\" state [On|off] '{on_off_state_ui}' event")
                             if zd_dev.deviceTypeId == "dimmer" or zd_dev.deviceTypeId == "zigbeeGroupDimmer":
                                 if on_off_state:
-                                    zd_dev.updateStateImageOnServer(indigo.kStateImageSel.DimmerOn)
+                                    self.indigo_writer.update_state_image(zd_dev.id, indigo.kStateImageSel.DimmerOn)
                                 else:
-                                    zd_dev.updateStateImageOnServer(indigo.kStateImageSel.DimmerOff)
+                                    self.indigo_writer.update_state_image(zd_dev.id, indigo.kStateImageSel.DimmerOff)
                                     brightness_level_ui = "0"
                                     self.key_value_lists[zd_dev.id].append({'key': 'brightnessLevel', 'value': 0, 'uiValue': brightness_level_ui})
-                                    if bool(zd_dev.pluginProps.get("SupportsWhite", False)):
+                                    if bool(props.get("SupportsWhite", False)):
                                         self.key_value_lists[zd_dev.id].append({'key': 'whiteLevel', 'value': 0})
                         else:
                             if self.globals[DEBUG]: self.zigbeeLogger.info(f"received \"{zd_dev.name}\" unchanged state [On|off] {on_off_state_ui} event")
@@ -2058,54 +2263,50 @@ class ThreadZigbeeHandler(threading.Thread):
             # error_message = f"{exception_error}, Payload:{json_payload}"
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_strength(self, zd_dev, json_payload):
+    def process_property_strength(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "strength" in json_payload:
-                if zd_dev.pluginProps.get("uspStrength", False):
+                if props.get("uspStrength", False):
                     strength = json_payload["strength"]
                     # zd_dev.updateStateOnServer(key="action", value="")  # To force Indigo to recognise a state change
 
-                    if strength != zd_dev.states["strength"]:
+                    if strength != self.state_shadow.states(zd_dev)["strength"]:
                         self.key_value_lists[zd_dev.id].append({"key": "strength", "value": strength})
-                        if not bool(zd_dev.pluginProps.get("hideVibrationBroadcast", False)):
+                        if not bool(props.get("hideVibrationBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev.name}\" vibration sensor strength '{strength}' event")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_tamper(self, zd_dev, json_payload):
+    def process_property_tamper(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "tamper" in json_payload:
-                if zd_dev.pluginProps.get("uspTamper", False):
+                if props.get("uspTamper", False):
                     tamper = False if json_payload["tamper"] == False else True
                     self.key_value_lists[zd_dev.id].append({'key': 'tamper', 'value': tamper})
-                    if not bool(zd_dev.pluginProps.get("hideTamperBroadcast", False)):
+                    if not bool(props.get("hideTamperBroadcast", False)):
                         self.zigbeeLogger.info(f"received \"{zd_dev.name}\" contact sensor {tamper} event")
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_temperature(self, zd_dev, json_payload):
+    def process_property_temperature(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.pluginProps.get("uspTemperature", False):
+            if not props.get("uspTemperature", False):
                 return
             if not "temperature" in json_payload and not "device_temperature" in json_payload:
                 return
 
-            uspTemperatureIndigo = zd_dev.pluginProps.get("uspTemperatureIndigo", INDIGO_PRIMARY_DEVICE_ADDITIONAL_STATE)
+            uspTemperatureIndigo = props.get("uspTemperatureIndigo", INDIGO_PRIMARY_DEVICE_ADDITIONAL_STATE)
             zd_dev_to_process = zd_dev
             update_secondary_device = False
             state_to_update = "sensorValue"  # Primary device - Main UI State
             if uspTemperatureIndigo == INDIGO_PRIMARY_DEVICE_ADDITIONAL_STATE:
                 state_to_update = "temperature"  # Primary device - Additional State
-            secondary_dev_id = zd_dev.pluginProps.get("secondaryDeviceTemperatureSensor", 0)  # Returns int zero if no secondary temperature device
+            secondary_dev_id = props.get("secondaryDeviceTemperatureSensor", 0)  # Returns int zero if no secondary temperature device
             if uspTemperatureIndigo == INDIGO_SECONDARY_DEVICE and secondary_dev_id != 0:
-                if secondary_dev_id in indigo.devices:
-                    zd_dev_to_process = indigo.devices[secondary_dev_id]
+                if self.device_cache.exists(secondary_dev_id):
+                    zd_dev_to_process = self.device_cache.device(secondary_dev_id)
                     update_secondary_device = True
                     state_to_update = "sensorValue"  # Primary device
             if not zd_dev_to_process.enabled:
@@ -2118,7 +2319,7 @@ class ThreadZigbeeHandler(threading.Thread):
             # The "temperature" (primary) or "sensorValue" (secondary) state will be updated on the 'zd_dev_to_process' device if valid and has a changed value
 
             try:
-                temperatureUnitsConversion = zd_dev.pluginProps.get("uspTemperatureUnitsConversion", "C")
+                temperatureUnitsConversion = props.get("uspTemperatureUnitsConversion", "C")
                 if temperatureUnitsConversion in ["C", "F>C"]:  # noqa [Duplicated code fragment!]
                     temperature_unit_ui = "°C"
                 else:
@@ -2142,17 +2343,18 @@ class ThreadZigbeeHandler(threading.Thread):
                 return
 
             if valid:
-                decimal_places = int(zd_dev.pluginProps.get("uspTemperatureDecimalPlaces", 0))
+                decimal_places = int(props.get("uspTemperatureDecimalPlaces", 0))
                 temperature_value, ui_temperature_value = self.processDecimalPlaces(temperature, decimal_places, temperature_unit_ui, INDIGO_ONE_SPACE_BEFORE_UNITS)  # noqa: reference before assignment
-                if state_to_update in zd_dev_to_process.states:
-                    if zd_dev_to_process.states[state_to_update] != temperature_value:
+                if state_to_update in self.state_shadow.states(zd_dev_to_process):
+                    if self.reporting_filter.report(zd_dev.id, zd_dev_to_process.id, state_to_update, temperature_value, {'key': state_to_update, 'value': temperature_value, 'uiValue': ui_temperature_value}) and self.state_shadow.states(zd_dev_to_process)[state_to_update] != temperature_value:
                         self.key_value_lists[zd_dev_to_process.id].append({'key': state_to_update, 'value': temperature_value, 'uiValue': ui_temperature_value})
+                        self.reporting_filter.written(zd_dev.id, zd_dev_to_process.id, state_to_update, temperature_value)
                         if state_to_update == "sensorValue":
-                            zd_dev_to_process.updateStateImageOnServer(indigo.kStateImageSel.TemperatureSensor)
-                        if not bool(zd_dev.pluginProps.get("hideTemperatureBroadcast", False)):
+                            self.indigo_writer.update_state_image(zd_dev_to_process.id, indigo.kStateImageSel.TemperatureSensor)
+                        if not bool(props.get("hideTemperatureBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev.name}\" temperature {ui_temperature_value}")
                     else:
-                        if not bool(zd_dev.pluginProps.get("hideTemperatureBroadcast", False)):
+                        if not bool(props.get("hideTemperatureBroadcast", False)):
                             if self.globals[DEBUG]: self.zigbeeLogger.info(f"received \"{zd_dev.name}\" unchanged temperature {ui_temperature_value}")
                 else:
                     self.zigbeeLogger.error(f"received \"{zd_dev_to_process.name}\" update of \"{ui_temperature_value}\" for missing temperature state.")
@@ -2160,14 +2362,12 @@ class ThreadZigbeeHandler(threading.Thread):
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_vibration(self, zd_dev, json_payload):
+    def process_property_vibration(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.enabled:
-                return
             if "vibration" in json_payload:
-                if zd_dev.pluginProps.get("uspVibration", False):
-                    state_on_off_state = zd_dev.states["onOffState"]
-                    state_action = zd_dev.states["action"]
+                if props.get("uspVibration", False):
+                    state_on_off_state = self.state_shadow.states(zd_dev)["onOffState"]
+                    state_action = self.state_shadow.states(zd_dev)["action"]
                     # on_off_state = False if json_payload["vibration"] == True else True  # TODO: Is this needed?
                     on_off_state_ui = "on" if json_payload["vibration"] == True else "off"
                     on_off_state = json_payload["vibration"]
@@ -2175,26 +2375,26 @@ class ThreadZigbeeHandler(threading.Thread):
                         self.key_value_lists[zd_dev.id].append({'key': 'onOffState', 'value': on_off_state, 'uiValue': on_off_state_ui})
                         if not on_off_state:  # i.e. "off"
                             self.key_value_lists[zd_dev.id].append({"key": "action", "value": "idle"})
-                        if not bool(zd_dev.pluginProps.get("hideVibrationBroadcast", False)):
+                        if not bool(props.get("hideVibrationBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev.name}\" vibration sensor '{on_off_state_ui}' event")
                     a = 1
                     b = a + 1
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
 
-    def process_property_voltage(self, zd_dev, json_payload):
+    def process_property_voltage(self, zd_dev, props, json_payload):
         try:
-            if not zd_dev.pluginProps.get("uspVoltage", False) or not "voltage" in json_payload:
+            if not props.get("uspVoltage", False) or not "voltage" in json_payload:
                 return
 
-            uspVoltageIndigo = zd_dev.pluginProps.get("uspVoltageIndigo", INDIGO_PRIMARY_DEVICE_ADDITIONAL_STATE)
+            uspVoltageIndigo = props.get("uspVoltageIndigo", INDIGO_PRIMARY_DEVICE_ADDITIONAL_STATE)
             zd_dev_to_process = zd_dev
             update_secondary_device = False
             state_to_update = "voltage"  # Primary device
-            secondary_dev_id = zd_dev.pluginProps.get("secondaryDeviceVoltageSensor", 0)  # Returns int zero if no secondary voltage device
+            secondary_dev_id = props.get("secondaryDeviceVoltageSensor", 0)  # Returns int zero if no secondary voltage device
             if uspVoltageIndigo == INDIGO_SECONDARY_DEVICE and secondary_dev_id != 0:
-                if secondary_dev_id in indigo.devices:
-                    zd_dev_to_process = indigo.devices[secondary_dev_id]
+                if self.device_cache.exists(secondary_dev_id):
+                    zd_dev_to_process = self.device_cache.device(secondary_dev_id)
                     update_secondary_device = True
                     state_to_update = "sensorValue"  # Primary device
             if not zd_dev_to_process.enabled:
@@ -2214,15 +2414,16 @@ class ThreadZigbeeHandler(threading.Thread):
                 valid = False
 
             if valid:
-                decimal_places = int(zd_dev.pluginProps.get("uspVoltageDecimalPlaces", 0))
+                decimal_places = int(props.get("uspVoltageDecimalPlaces", 0))
                 voltage_value, ui_voltage_value = self.processDecimalPlaces(voltage, decimal_places, "Volts", INDIGO_ONE_SPACE_BEFORE_UNITS)  # noqa: reference before assignment
-                if state_to_update in zd_dev_to_process.states:
-                    if zd_dev_to_process.states[state_to_update] != voltage_value:
+                if state_to_update in self.state_shadow.states(zd_dev_to_process):
+                    if self.reporting_filter.report(zd_dev.id, zd_dev_to_process.id, state_to_update, voltage_value, {'key': state_to_update, 'value': voltage_value, 'uiValue': ui_voltage_value}) and self.state_shadow.states(zd_dev_to_process)[state_to_update] != voltage_value:
                         self.key_value_lists[zd_dev_to_process.id].append({'key': state_to_update, 'value': voltage_value, 'uiValue': ui_voltage_value})
-                        if not bool(zd_dev.pluginProps.get("hideVoltageBroadcast", False)):
+                        self.reporting_filter.written(zd_dev.id, zd_dev_to_process.id, state_to_update, voltage_value)
+                        if not bool(props.get("hideVoltageBroadcast", False)):
                             self.zigbeeLogger.info(f"received \"{zd_dev_to_process.name}\" voltage {ui_voltage_value}")
                     else:
-                        if not bool(zd_dev.pluginProps.get("hideVoltageBroadcast", False)):
+                        if not bool(props.get("hideVoltageBroadcast", False)):
                             if self.globals[DEBUG]: self.zigbeeLogger.info(f"received \"{zd_dev_to_process.name}\" unchanged voltage {ui_voltage_value}")
                 else:
                     self.zigbeeLogger.error(f"received \"{zd_dev_to_process.name}\" update of \"{ui_voltage_value}\" for missing voltage state.")
@@ -2312,15 +2513,7 @@ class ThreadZigbeeHandler(threading.Thread):
 
     def determine_secondary_device_id(self, dev_id, secondary_dev_type_id):
         try:
-            # TODO: Use links stored in Primary
-            dev_id_list = indigo.device.getGroupList(dev_id)
-            secondary_dev_id = 0
-            if len(dev_id_list) > 1:
-                for grouped_dev_id in dev_id_list:
-                    if grouped_dev_id != dev_id and indigo.devices[grouped_dev_id].deviceTypeId == secondary_dev_type_id:
-                        secondary_dev_id = grouped_dev_id
-                        break
-            return secondary_dev_id
+            return self.globals[ZD_SECONDARY_DEVICES].get(dev_id, dict()).get(secondary_dev_type_id, 0)
 
         except Exception as exception_error:
             self.exception_handler(exception_error, True)  # Log error and display failing statement
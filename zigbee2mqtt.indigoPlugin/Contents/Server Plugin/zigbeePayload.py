@@ -0,0 +1,50 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Zigbee2mqtt - Plugin © Autolog 2023
+#
+
+import json
+
+
+# noinspection PyPep8Naming
+class ZigbeeSetPayload:
+
+    # This class builds the JSON payload of a single Zigbee2mqtt '/set' command.
+    #
+    # All the attributes to be set by an Indigo action (e.g. color, brightness and color temperature) are merged into
+    # one JSON object, so that the Zigbee device is sent one command rather than one per attribute. Setting an attribute
+    # that has already been set replaces its value. The transition (seconds) is added to the payload if greater than
+    # zero, otherwise the device's default transition applies.
+
+    def __init__(self, transition=0.0):
+        self.attributes = dict()
+        self.transition = transition
+
+    def __bool__(self):
+        return len(self.attributes) > 0
+
+    def set(self, attribute, value):
+        self.attributes[attribute] = value
+        return self
+
+    def set_brightness(self, level, attribute="brightness"):
+        # level is an Indigo level (0 - 100)
+        return self.set(attribute, int((level * 255) / 100))
+
+    def set_color_rgb(self, red, green, blue):
+        return self.set("color", {"r": red, "g": green, "b": blue})
+
+    def set_color_temp(self, mired):
+        return self.set("color_temp", mired)
+
+    def coalesce_attribute(self):
+        # Returns the attributes set (e.g. "brightness,color"), used to coalesce the command only with later commands
+        # that set exactly the same attributes - a command setting other attributes must not replace it
+        return ",".join(sorted(self.attributes))
+
+    def payload(self):
+        attributes = dict(self.attributes)
+        if self.transition > 0.0 and len(attributes) > 0:
+            attributes["transition"] = self.transition
+        return json.dumps(attributes, separators=(",", ":"))
@@ -0,0 +1,190 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Zigbee2mqtt - Plugin © Autolog 2023
+#
+
+import collections
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from constants import *
+
+
+# noinspection PyPep8Naming
+class TokenBucket:
+
+    # This class paces commands to a sustained rate (commands per second) while allowing a burst of up to burst
+    # commands to be sent at once. A rate of zero doesn't limit the commands.
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(max(1, burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def delay(self, now):
+        # Returns the seconds until a command can be sent (zero if it can be sent now)
+        if self.rate <= 0.0:
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate > 0.0:
+            self.tokens -= 1.0
+
+
+# noinspection PyPep8Naming
+class ThreadZigbeePublisher(threading.Thread):
+
+    # This class publishes the plugin's MQTT commands to a Zigbee Coordinator's MQTT Broker, in the order they are made.
+    #
+    # Commands that set a level (e.g. brightness from a control page slider) are published with a coalesce key of
+    # (topic, attribute) and are held for the coalescing window: a later command with the same key that arrives within
+    # the window replaces the pending command's payload, so that only the latest value is published rather than a flood
+    # of obsolete ones. Discrete commands (e.g. on / off / toggle) have no coalesce key and are never coalesced.
+    # Queuing a command for a topic closes any pending coalescing of other commands for that topic, so that a later
+    # value can't be published ahead of a command that was made after the value it replaces.
+    #
+    # Commands are paced by a token bucket so that e.g. an action group switching many devices doesn't overload the
+    # Zigbee Coordinator. Commands to Zigbee groups (which are broadcast on the Zigbee network) have a separate budget
+    # from commands to Zigbee devices, but all commands are published in the order they are made (a group command
+    # waiting for its budget holds up the commands behind it) so that e.g. a device turned on after its group is turned
+    # off ends up on. The queue depth and the time the last command waited to be published are written to the Zigbee
+    # Coordinator device states.
+
+    def __init__(self, pluginGlobals, event, zc_dev_id):
+        try:
+            threading.Thread.__init__(self)
+
+            self.globals = pluginGlobals
+            self.zc_dev_id = zc_dev_id
+
+            zc_internal = self.globals[ZC][self.zc_dev_id]
+            self.buckets = {False: TokenBucket(zc_internal.get(MQTT_PUBLISH_RATE, 0), zc_internal.get(MQTT_PUBLISH_BURST, 1)),  # Zigbee devices
+                            True: TokenBucket(zc_internal.get(MQTT_GROUP_PUBLISH_RATE, 0), zc_internal.get(MQTT_GROUP_PUBLISH_BURST, 1))}  # Zigbee groups
+
+            self.condition = threading.Condition()
+            self.queue = collections.deque()  # Entries are lists of: [time due, topic, payload, coalesce key, group command, time queued]
+            self.pending = dict()  # Coalesce key -> queued entry still accepting later values
+
+            self.published = 0
+            self.collapsed = 0
+            self.waits = 0
+            self.wait_total = 0.0
+            self.wait_maximum = 0.0
+            self.reported_states = (None, None)  # (queue depth, wait milliseconds) last written to the Zigbee Coordinator device
+
+            self.publisherLogger = logging.getLogger("Plugin.MQTT")
+
+            self.threadStop = event
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def exception_handler(self, exception_error_message, log_failing_statement):
+        filename, line_number, method, statement = traceback.extract_tb(sys.exc_info()[2])[-1]  # noqa [Ignore duplicate code warning]
+        module = filename.split('/')
+        log_message = f"'{exception_error_message}' in module '{module[-1]}', method '{method} [{self.globals[PLUGIN_INFO][PLUGIN_VERSION]}]'"
+        if log_failing_statement:
+            log_message = log_message + f"\n   Failing statement [line {line_number}]: '{statement}'"
+        else:
+            log_message = log_message + f" at line {line_number}"
+        self.publisherLogger.error(log_message)
+
+    def run(self):
+        try:
+            while not self.threadStop.is_set():
+                with self.condition:
+                    entry = None
+                    while entry is None and not self.threadStop.is_set():
+                        if not self.queue:
+                            self.condition.wait()
+                            continue
+                        now = time.monotonic()
+                        bucket = self.buckets[self.queue[0][4]]
+                        delay = self.queue[0][0] - now
+                        if delay <= 0.0:
+                            delay = bucket.delay(now)
+                        if delay > 0.0:
+                            self.condition.wait(delay)
+                            continue
+                        bucket.take()
+                        entry = self.queue.popleft()
+                        if entry[3] is not None and self.pending.get(entry[3], None) is entry:
+                            del self.pending[entry[3]]
+                        wait = now - entry[5]
+                        self.waits += 1
+                        self.wait_total += wait
+                        self.wait_maximum = max(self.wait_maximum, wait)
+                        queue_depth = len(self.queue)
+                if entry is not None:
+                    self.send(entry[1], entry[2])
+                    self.report_states(queue_depth, wait)
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def stop(self):
+        self.threadStop.set()
+        with self.condition:
+            self.condition.notify()
+
+    def publish(self, topic, payload, coalesce_key=None, group=False):
+        # Queues the command - coalesce_key (topic, attribute) is None for a discrete command which is never coalesced
+        # and group is True for a command to a Zigbee group
+        with self.condition:
+            if coalesce_key is not None:
+                pending_entry = self.pending.get(coalesce_key, None)
+                if pending_entry is not None:
+                    pending_entry[2] = payload  # Latest value wins
+                    self.collapsed += 1
+                    return
+            for pending_key in [pending_key for pending_key in self.pending if pending_key[0] == topic]:
+                del self.pending[pending_key]  # Later values for the topic must be published after this command
+            now = time.monotonic()
+            if coalesce_key is not None:
+                entry = [now + PUBLISH_COALESCE_WINDOW, topic, payload, coalesce_key, group, now]
+                self.pending[coalesce_key] = entry
+            else:
+                entry = [now, topic, payload, None, group, now]
+            self.queue.append(entry)
+            self.condition.notify()
+
+    def send(self, topic, payload):
+        try:
+            zc_internal = self.globals[ZC][self.zc_dev_id]
+            if not zc_internal.get(MQTT_CONNECTED, False):
+                self.publisherLogger.warning(f"Unable to publish MQTT topic '{topic}' as the Zigbee Coordinator is not connected to its MQTT Broker")
+                return
+            zc_internal.mqtt_client.publish(topic, payload)
+            self.published += 1
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def report_states(self, queue_depth, wait):
+        # Writes the queue depth and the wait of the command just published to the Zigbee Coordinator device states (via
+        # the Indigo writer so that they are batched) when they change
+        try:
+            states = (queue_depth, int(wait * 1000))
+            if states == self.reported_states:
+                return
+            self.reported_states = states
+            self.globals[INDIGO_WRITER_THREAD].update_states(self.zc_dev_id, [{'key': "publishQueueDepth", 'value': states[0]},
+                                                                              {'key': "publishWaitTime", 'value': states[1], 'uiValue': f"{states[1]} ms"}])
+
+        except Exception as exception_error:
+            self.exception_handler(exception_error, True)  # Log error and display failing statement
+
+    def statistics(self):
+        with self.condition:
+            average_wait = self.wait_total / self.waits if self.waits > 0 else 0.0
+            return self.published, self.collapsed, len(self.queue), average_wait, self.wait_maximum
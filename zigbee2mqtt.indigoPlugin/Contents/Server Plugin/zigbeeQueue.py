@@ -0,0 +1,188 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Zigbee2mqtt - Plugin © Autolog 2023
+#
+
+import collections
+import json
+import queue
+import threading
+import time
+
+from constants import *
+
+
+# noinspection PyPep8Naming
+class ZigbeePriorityQueue:
+
+    # This class is the Zigbee handler queue (put / get / qsize / empty as queue.Queue). Each message is queued in the
+    # lane for its priority (see QUEUE_PRIORITY_* constants) and get returns the oldest message from the highest
+    # priority (lowest value) lane that has messages waiting, so that e.g. button actions don't wait behind telemetry.
+    #
+    # Messages with the same order key (the Zigbee device) are always returned in the order they were queued: queuing a
+    # message ahead of older messages for its key still waiting in lower priority lanes moves those messages up to its
+    # lane first, so that e.g. older telemetry is never processed after (and written over) a newer update.
+    #
+    # Queue entries are lists of: [sequence, command, zc_dev_id, topic, topic_list, payload, time received]
+
+    PRIORITIES = (QUEUE_PRIORITY_STOP_THREAD, QUEUE_PRIORITY_COMMAND_HIGH, QUEUE_PRIORITY_COMMAND_MEDIUM, QUEUE_PRIORITY_POLLING, QUEUE_PRIORITY_LOW)
+
+    def __init__(self):
+        self.mutex = threading.Lock()
+        self.not_empty = threading.Condition(self.mutex)
+        self.lanes = {priority: collections.deque() for priority in self.PRIORITIES}  # Priority -> deque of (coalesce key, order key, entry)
+        self.waiting = dict()  # Order key -> dict of priority -> number of entries waiting in that lane
+        self.size = 0
+
+    def put(self, entry, priority=QUEUE_PRIORITY_COMMAND_MEDIUM, coalesce_key=None, coalescable=True, order_key=None):  # noqa [parameter value is not used]
+        with self.mutex:
+            self.append(priority, None, order_key, entry)
+
+    def put_stop(self):
+        # Queue the sentinel that stops the Zigbee handler - it goes ahead of any messages still waiting
+        self.put([0, MQTT_PROCESS_COMMAND_HANDLE_STOP_THREAD, 0, "", list(), "", 0.0], priority=QUEUE_PRIORITY_STOP_THREAD)
+
+    def append(self, priority, coalesce_key, order_key, entry):
+        # Must be called with the mutex held
+        if order_key is not None:
+            self.promote(order_key, priority)
+            lane_counts = self.waiting.setdefault(order_key, dict())
+            lane_counts[priority] = lane_counts.get(priority, 0) + 1
+        self.lanes[priority].append((coalesce_key, order_key, entry))
+        self.size += 1
+        self.not_empty.notify()
+
+    def promote(self, order_key, priority):
+        # Must be called with the mutex held - moves the entries for the order key waiting in lower priority lanes (in
+        # the order they were queued) to the end of the priority's lane
+        lane_counts = self.waiting.get(order_key, None)
+        if lane_counts is None:
+            return
+        for lower_priority in sorted(lane_priority for lane_priority in lane_counts if lane_priority > priority):
+            lower_lane = self.lanes[lower_priority]
+            kept = collections.deque()
+            while lower_lane:
+                item = lower_lane.popleft()
+                if item[1] == order_key:
+                    self.lanes[priority].append(item)
+                    self.moved(item[0], item[2], priority)
+                else:
+                    kept.append(item)
+            self.lanes[lower_priority] = kept
+            lane_counts[priority] = lane_counts.get(priority, 0) + lane_counts.pop(lower_priority)
+
+    def moved(self, coalesce_key, entry, priority):
+        # Called with the mutex held when an entry has been moved to the priority's lane
+        pass
+
+    def get(self, block=True, timeout=None):
+        with self.not_empty:
+            if not block:
+                if self.size == 0:
+                    raise queue.Empty
+            elif timeout is None:
+                while self.size == 0:
+                    self.not_empty.wait()
+            else:
+                end_time = time.monotonic() + timeout
+                while self.size == 0:
+                    remaining = end_time - time.monotonic()
+                    if remaining <= 0.0:
+                        raise queue.Empty
+                    self.not_empty.wait(remaining)
+            for priority, lane in self.lanes.items():  # Lanes are held in priority order
+                if lane:
+                    coalesce_key, order_key, entry = lane.popleft()
+                    self.size -= 1
+                    if order_key is not None:
+                        lane_counts = self.waiting[order_key]
+                        lane_counts[priority] -= 1
+                        if lane_counts[priority] == 0:
+                            del lane_counts[priority]
+                            if len(lane_counts) == 0:
+                                del self.waiting[order_key]
+                    self.taken(coalesce_key, entry)
+                    return entry
+
+    def taken(self, coalesce_key, entry):
+        # Called with the mutex held once an entry has been removed from the queue for processing
+        pass
+
+    def qsize(self):
+        with self.mutex:
+            return self.size
+
+    def lane_sizes(self):
+        with self.mutex:
+            return {priority: len(lane) for priority, lane in self.lanes.items()}
+
+    def empty(self):
+        with self.mutex:
+            return self.size == 0
+
+
+# noinspection PyPep8Naming
+class ZigbeeCoalescingQueue(ZigbeePriorityQueue):
+
+    # This class extends the Zigbee handler priority queue. Messages queued with a coalesce key (the device topic) are
+    # "latest wins": if an unprocessed message with the same key is still waiting, the newer JSON payload is merged into
+    # it (or replaces it if not a JSON object) so that a burst results in at most one queued entry per device.
+    # If the newer message has a higher priority than the waiting one, the merged entry (with the other messages for its
+    # order key waiting in lower lanes) moves up to the newer message's lane. The merged entry keeps the time the first
+    # of the merged messages was received.
+
+    PAYLOAD_INDEX = 5
+
+    def __init__(self):
+        super().__init__()
+        self.pending = dict()  # Coalesce key -> (priority, queued entry) not yet processed
+        self.coalesced_count = 0
+
+    def put(self, entry, priority=QUEUE_PRIORITY_COMMAND_MEDIUM, coalesce_key=None, coalescable=True, order_key=None):
+        with self.mutex:
+            if coalesce_key is not None:
+                if coalescable:
+                    pending_priority, pending_entry = self.pending.get(coalesce_key, (None, None))
+                    if pending_entry is not None:
+                        pending_entry[0] = entry[0]  # Sequence of the latest message
+                        pending_entry[self.PAYLOAD_INDEX] = self.merge_payloads(pending_entry[self.PAYLOAD_INDEX], entry[self.PAYLOAD_INDEX])
+                        self.coalesced_count += 1
+                        if priority < pending_priority:  # Promote the merged entry to the newer message's (higher) priority
+                            if order_key is not None:
+                                self.promote(order_key, priority)
+                            else:
+                                pending_lane = self.lanes[pending_priority]
+                                for index, (_, _, queued_entry) in enumerate(pending_lane):
+                                    if queued_entry is pending_entry:
+                                        del pending_lane[index]
+                                        break
+                                self.size -= 1
+                                self.append(priority, coalesce_key, None, pending_entry)
+                            self.pending[coalesce_key] = (priority, pending_entry)
+                        return
+                    self.pending[coalesce_key] = (priority, entry)
+                else:
+                    # Not to be coalesced (e.g. a button action) - later messages for this key must queue behind it to keep their order
+                    self.pending.pop(coalesce_key, None)
+            self.append(priority, coalesce_key, order_key, entry)
+
+    def moved(self, coalesce_key, entry, priority):
+        if coalesce_key is not None and self.pending.get(coalesce_key, (None, None))[1] is entry:
+            self.pending[coalesce_key] = (priority, entry)
+
+    def taken(self, coalesce_key, entry):
+        if coalesce_key is not None and self.pending.get(coalesce_key, (None, None))[1] is entry:
+            del self.pending[coalesce_key]
+
+    @staticmethod
+    def merge_payloads(queued_payload, latest_payload):
+        try:
+            queued_json = json.loads(queued_payload)
+            latest_json = json.loads(latest_payload)
+        except ValueError:
+            return latest_payload
+        if not isinstance(queued_json, dict) or not isinstance(latest_json, dict):
+            return latest_payload
+        queued_json.update(latest_json)
+        return json.dumps(queued_json)
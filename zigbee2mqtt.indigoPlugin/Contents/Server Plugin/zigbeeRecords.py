@@ -0,0 +1,285 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Zigbee2mqtt - Plugin © Autolog 2023
+#
+
+import timeit
+import tracemalloc
+
+from constants import *
+
+
+# noinspection PyPep8Naming
+class ZigbeeRecord:
+
+    # This class is the base of the compact (__slots__) records held in the Zigbee coordinator, device, group and model
+    # registries (self.globals[ZC], self.globals[ZD], self.globals[ZG] and self.globals[ZD_MODELS]).
+    #
+    # Hot path code uses the record attributes directly. The rest of the plugin can carry on using the constant_id labels
+    # as though the record were a dict (record[ZD_FRIENDLY_NAME], ZD_FRIENDLY_NAME in record, record.get(...) etc.)
+    # as each subclass maps its labels to its attributes in FIELDS. An attribute that hasn't been set is treated as a
+    # missing key. Setting a label that isn't in FIELDS raises KeyError.
+
+    __slots__ = ()
+
+    FIELDS = dict()  # constant_id label -> attribute name
+
+    def __getitem__(self, label):
+        try:
+            return getattr(self, self.FIELDS[label])
+        except AttributeError:
+            raise KeyError(label) from None
+
+    def __setitem__(self, label, value):
+        setattr(self, self.FIELDS[label], value)
+
+    def __delitem__(self, label):
+        try:
+            delattr(self, self.FIELDS[label])
+        except AttributeError:
+            raise KeyError(label) from None
+
+    def __contains__(self, label):
+        attribute = self.FIELDS.get(label, None)
+        return attribute is not None and hasattr(self, attribute)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{attribute}={getattr(self, attribute)!r}' for attribute in self.FIELDS.values() if hasattr(self, attribute))})"
+
+    def get(self, label, default=None):
+        attribute = self.FIELDS.get(label, None)
+        if attribute is None:
+            return default
+        return getattr(self, attribute, default)
+
+    def setdefault(self, label, default=None):
+        attribute = self.FIELDS[label]
+        if not hasattr(self, attribute):
+            setattr(self, attribute, default)
+        return getattr(self, attribute)
+
+    def pop(self, label, *default):
+        attribute = self.FIELDS.get(label, None)
+        if attribute is not None and hasattr(self, attribute):
+            value = getattr(self, attribute)
+            delattr(self, attribute)
+            return value
+        if default:
+            return default[0]
+        raise KeyError(label)
+
+    def keys(self):
+        return [label for label, attribute in self.FIELDS.items() if hasattr(self, attribute)]
+
+    def values(self):
+        return [getattr(self, attribute) for attribute in self.FIELDS.values() if hasattr(self, attribute)]
+
+    def items(self):
+        return [(label, getattr(self, attribute)) for label, attribute in self.FIELDS.items() if hasattr(self, attribute)]
+
+
+# noinspection PyPep8Naming
+class ZigbeeCoordinatorRecord(ZigbeeRecord):
+
+    # Zigbee Coordinator - self.globals[ZC][Indigo Coordinator Id]
+
+    FIELDS = {
+        CH_EVENT: "ch_event",
+        CH_THREAD: "ch_thread",
+        MQTT_CLIENT: "mqtt_client",
+        MQTT_CLIENT_ID: "mqtt_client_id",
+        MQTT_CLIENT_PREFIX: "mqtt_client_prefix",
+        MQTT_COALESCE_MESSAGES: "mqtt_coalesce_messages",
+        MQTT_CONNECTED: "mqtt_connected",
+        MQTT_ENCRYPTION_KEY: "mqtt_encryption_key",
+        MQTT_GROUP_PUBLISH_BURST: "mqtt_group_publish_burst",
+        MQTT_GROUP_PUBLISH_RATE: "mqtt_group_publish_rate",
+        MQTT_IP: "mqtt_ip",
+        MQTT_MESSAGES_DROPPED: "mqtt_messages_dropped",
+        MQTT_MESSAGES_RECEIVED: "mqtt_messages_received",
+        MQTT_PASSWORD: "mqtt_password",
+        MQTT_PORT: "mqtt_port",
+        MQTT_PROTOCOL: "mqtt_protocol",
+        MQTT_PUBLISH_BURST: "mqtt_publish_burst",
+        MQTT_PUBLISH_RATE: "mqtt_publish_rate",
+        MQTT_PUBLISH_TO_ZIGBEE2MQTT: "mqtt_publish_to_zigbee2mqtt",
+        MQTT_ROOT_TOPIC: "mqtt_root_topic",
+        MQTT_SUBSCRIBE_TO_ZIGBEE2MQTT: "mqtt_subscribe_to_zigbee2mqtt",
+        MQTT_USERNAME: "mqtt_username",
+        ZC_DEVICES_HASH: "devices_hash",
+        ZC_DEVICES_KNOWN: "devices_known",
+        ZC_DEVICES_PEAK_RSS: "devices_peak_rss",
+        ZC_DEVICES_PEAK_RSS_INCREASE: "devices_peak_rss_increase",
+        ZC_IEEE: "ieee",
+        ZC_INDIGO_DEVICE_ID: "indigo_device_id",
+        ZH_EVENT: "zh_event",
+        ZH_EXPRESS_THREAD: "zh_express_thread",
+        ZH_THREAD: "zh_thread",
+        ZH_WORKERS: "zh_workers",
+        ZP_EVENT: "zp_event",
+        ZP_THREAD: "zp_thread",
+    }
+
+    __slots__ = tuple(FIELDS.values())
+
+
+# noinspection PyPep8Naming
+class ZigbeeDeviceRecord(ZigbeeRecord):
+
+    # Zigbee device - self.globals[ZD][Zigbee Coordinator Address][Zigbee Device Address]
+
+    FIELDS = {
+        ZD_DEFINITION: "definition",
+        ZD_DEFINITION_HASH: "definition_hash",
+        ZD_DESCRIPTION_USER: "description_user",
+        ZD_DISABLED: "disabled",
+        ZD_FRIENDLY_NAME: "friendly_name",
+        ZD_INDIGO_DEVICE_ID: "indigo_device_id",
+        ZD_LAST_SEEN: "last_seen",
+        ZD_LAST_SEEN_WRITTEN: "last_seen_written",
+        ZD_MANUFACTURER: "manufacturer",
+        ZD_MESSAGE_COUNT: "message_count",
+        ZD_MODEL_DEFINITION: "model_definition",
+        ZD_MODEL_ID: "model_id",
+        ZD_POWER_SOURCE: "power_source",
+        ZD_PREVIOUS_POWER_LEVEL: "previous_power_level",
+        ZD_PREVIOUS_POWER_LEVEL_LEFT: "previous_power_level_left",
+        ZD_PREVIOUS_POWER_LEVEL_RIGHT: "previous_power_level_right",
+        ZD_ROTATION_INITIAL: "rotation_initial",
+        ZD_ROTATION_VARIABLE: "rotation_variable",
+        ZD_SOFTWARE_BUILD_ID: "software_build_id",
+    }
+
+    __slots__ = tuple(FIELDS.values())
+
+
+# noinspection PyPep8Naming
+class ZigbeeDefinitionRecord(ZigbeeRecord):
+
+    # Zigbee device definition (hardware description, vendor and model) - shared by all devices of a Zigbee model
+
+    FIELDS = {
+        ZD_DESCRIPTION_HW: "description_hw",
+        ZD_MODEL: "model",
+        ZD_VENDOR: "vendor",
+    }
+
+    __slots__ = tuple(FIELDS.values())
+
+
+# noinspection PyPep8Naming
+class ZigbeeModelRecord(ZigbeeRecord):
+
+    # Zigbee model definition - self.globals[ZD_MODELS][Zigbee Coordinator Address][(vendor, model, software build id)]
+
+    FIELDS = {
+        ZM_CAPABILITIES: "capabilities",
+        ZM_DEFINITION: "definition",
+        ZM_DEFINITION_HASH: "definition_hash",
+        ZM_EXPOSES: "exposes",
+        ZM_PROPERTIES: "properties",
+        ZM_PROPERTIES_SET: "properties_set",
+        ZM_UNSUPPORTED_PROPERTIES: "unsupported_properties",
+    }
+
+    __slots__ = tuple(FIELDS.values())
+
+
+# noinspection PyPep8Naming
+class ZigbeeGroupRecord(ZigbeeRecord):
+
+    # Zigbee group - self.globals[ZG][Zigbee Coordinator Address][Zigbee Group Friendly Name]
+
+    FIELDS = {
+        ZG_FRIENDLY_NAME: "friendly_name",
+        ZG_ID: "id",
+        ZG_INDIGO_DEVICE_ID: "indigo_device_id",
+        ZG_MEMBERS: "members",
+    }
+
+    __slots__ = tuple(FIELDS.values())
+
+    def __init__(self):
+        self.indigo_device_id = 0  # Not linked to an Indigo group device
+
+
+def benchmark_registry_layouts(device_count=1000):
+    # Compares the memory used by, and the hot path field access time of, a Zigbee device registry of dicts against
+    # one of ZigbeeDeviceRecord for device_count synthetic devices. Returns the results as a list of (label, value).
+
+    def device_fields(device_number):
+        return {
+            ZD_DEFINITION_HASH: f"{device_number:040x}",
+            ZD_DESCRIPTION_USER: "",
+            ZD_DISABLED: False,
+            ZD_FRIENDLY_NAME: f"Zigbee Device {device_number}",
+            ZD_INDIGO_DEVICE_ID: 1000000 + device_number,
+            ZD_MANUFACTURER: "Manufacturer",
+            ZD_MESSAGE_COUNT: 0,
+            ZD_MODEL_ID: "Model",
+            ZD_POWER_SOURCE: "Battery",
+            ZD_SOFTWARE_BUILD_ID: "1.0.0",
+        }
+
+    def build_dicts():
+        registry = dict()
+        for device_number in range(device_count):
+            registry[f"0x{device_number:016x}"] = dict(device_fields(device_number))
+        return registry
+
+    def build_records():
+        registry = dict()
+        for device_number in range(device_count):
+            record = ZigbeeDeviceRecord()
+            for label, value in device_fields(device_number).items():
+                record[label] = value
+            registry[f"0x{device_number:016x}"] = record
+        return registry
+
+    def measure(build):
+        tracemalloc.start()
+        try:
+            registry = build()
+            size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return registry, size
+
+    dict_registry, dict_size = measure(build_dicts)
+    record_registry, record_size = measure(build_records)
+
+    def access_dicts():
+        for zd_dev_internal in dict_registry.values():
+            if zd_dev_internal[ZD_INDIGO_DEVICE_ID] != 0:
+                zd_dev_internal[ZD_MESSAGE_COUNT] += 1
+
+    def access_records():
+        for zd_dev_internal in record_registry.values():
+            if zd_dev_internal.indigo_device_id != 0:
+                zd_dev_internal.message_count += 1
+
+    def access_records_adapter():
+        for zd_dev_internal in record_registry.values():
+            if zd_dev_internal[ZD_INDIGO_DEVICE_ID] != 0:
+                zd_dev_internal[ZD_MESSAGE_COUNT] += 1
+
+    repeat = 100
+    dict_time = min(timeit.repeat(access_dicts, number=repeat, repeat=3)) / (repeat * device_count)
+    record_time = min(timeit.repeat(access_records, number=repeat, repeat=3)) / (repeat * device_count)
+    adapter_time = min(timeit.repeat(access_records_adapter, number=repeat, repeat=3)) / (repeat * device_count)
+
+    return [
+        ("Zigbee Devices:", f"{device_count}"),
+        ("Dict Registry Memory:", f"{dict_size // 1024} KB [{dict_size // device_count} bytes per device]"),
+        ("Record Registry Memory:", f"{record_size // 1024} KB [{record_size // device_count} bytes per device]"),
+        ("Dict Access:", f"{dict_time * 1e9:.0f} ns per device"),
+        ("Record Attribute Access:", f"{record_time * 1e9:.0f} ns per device"),
+        ("Record Label Access:", f"{adapter_time * 1e9:.0f} ns per device"),
+    ]